@@ -0,0 +1,5 @@
+"""
+    Benchmarks of the Unified Image Reader's adapters, read modes and access patterns on synthetic images
+
+    Run with `python -m benchmarks --help` from the repository root.
+"""
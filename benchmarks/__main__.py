@@ -0,0 +1,72 @@
+"""
+    python -m benchmarks [options]
+
+    Generates synthetic images into --workdir (reused across runs), runs every combination of the chosen sizes,
+    tile sizes, compressions, adapters, APIs and access patterns, and writes the results as JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from . import import_time
+from . import runner
+
+
+def comma_separated(cast=str):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "unified_image_reader_benchmarks"),
+                        help="where synthetic images are generated and reused")
+    parser.add_argument("--sizes", type=comma_separated(int), default=[8192],
+                        help="image widths (and heights) in pixels")
+    parser.add_argument("--tile-sizes", type=comma_separated(int), default=[256, 512])
+    parser.add_argument("--compressions", type=comma_separated(), default=["jpeg", "deflate"],
+                        help="e.g. jpeg, deflate, lzw, none")
+    parser.add_argument("--adapters", type=comma_separated(), default=list(runner.ADAPTERS))
+    parser.add_argument("--apis", type=comma_separated(), default=list(runner.APIS))
+    parser.add_argument("--patterns", type=comma_separated(), default=list(runner.PATTERNS))
+    parser.add_argument("--region-size", type=int, default=512)
+    parser.add_argument("--reads", type=int, default=200,
+                        help="regions read per case")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                        help="threads of the threaded pattern")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-isolate", dest="isolate", action="store_false",
+                        help="run every case in this process instead of a fresh one")
+    parser.add_argument("--output", "-o", default="-",
+                        help="JSON output file, - for stdout")
+    args = parser.parse_args(argv)
+
+    def progress(result):
+        summary = result.get("error") or \
+            f"{result['regions_per_second']:.1f} regions/s, {result['mb_per_second']:.1f} MB/s, " \
+            f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms"
+        print(f"{os.path.basename(result['image_path'])} {result['adapter']} {result['api']} {result['pattern']}: {summary}",
+              file=sys.stderr)
+
+    enumerated = runner.cases(args.workdir, args.sizes, args.tile_sizes, args.compressions, args.adapters,
+                              args.apis, args.patterns, args.region_size, args.reads, args.threads, args.seed)
+    report = {
+        "environment": runner.environment(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+        "import_time": import_time.measure(),
+        "results": runner.run(enumerated, args.isolate, progress)
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
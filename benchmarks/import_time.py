@@ -0,0 +1,64 @@
+"""
+    python -m benchmarks.import_time [--repeat N] [--budget-ms MS]
+
+    Measures how long `import unified_image_reader` takes in fresh interpreters, beyond importing numpy (which every
+    worker needs anyway), and checks that the imaging libraries are left to be imported on first use. Exits non-zero
+    when the median exceeds the budget or a lazily imported library was imported.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict
+
+# milliseconds that importing the package may take on top of numpy
+IMPORT_TIME_BUDGET_MS = 50.0
+# modules that only the adapters, ImageReaderDirectory, AsyncImage and parallel_iter may import
+LAZY_MODULES = ("cv2", "pyvips", "slideio", "asyncio", "multiprocessing")
+
+PROBE = """
+import json, sys, time
+import numpy
+start = time.perf_counter()
+import unified_image_reader
+seconds = time.perf_counter() - start
+print(json.dumps({"ms": seconds * 1000, "imported": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure(repeat: int = 5) -> Dict:
+    """
+    measure Import the package in repeat fresh interpreters
+
+    :param repeat: The number of interpreters, defaults to 5
+    :type repeat: int, optional
+    :return: The median and every import time in milliseconds and the lazily imported modules that were imported
+    :rtype: Dict
+    """
+    samples, imported = [], set()
+    for _ in range(repeat):
+        probe = json.loads(subprocess.run([sys.executable, "-c", PROBE], check=True,
+                                          capture_output=True, text=True).stdout)
+        samples.append(probe["ms"])
+        imported.update(probe["imported"])
+    return {"median_ms": statistics.median(samples), "samples_ms": samples, "eagerly_imported": sorted(imported)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time",
+                                     description="Measure the import time of unified_image_reader against a budget")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    args = parser.parse_args(argv)
+    result = measure(args.repeat)
+    result["budget_ms"] = args.budget_ms
+    result["within_budget"] = result["median_ms"] <= args.budget_ms and not result["eagerly_imported"]
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
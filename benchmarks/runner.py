@@ -0,0 +1,238 @@
+"""
+    Timed region reads for every combination of image, adapter, API and access pattern
+"""
+
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import synthetic
+
+ADAPTERS = ("VIPS:IMAGE_CROP", "VIPS:REGION_FETCH",
+            "SlideIO", "ImageReaderDirectory")
+APIS = ("ImageReader", "Image")
+PATTERNS = ("sequential", "random", "strided", "threaded")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    peak_rss_mb The peak resident set size of this process
+
+    :return: Peak RSS in MiB, or None where the resource module is unavailable
+    :rtype: Optional[float]
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def environment() -> Dict:
+    """
+    environment Describe the machine and library versions the benchmarks ran with
+
+    :return: JSON-serializable description of the environment
+    :rtype: Dict
+    """
+    import pyvips
+    description = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pyvips": pyvips.__version__,
+        "libvips": f"{pyvips.version(0)}.{pyvips.version(1)}.{pyvips.version(2)}",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+    try:
+        import slideio
+        description["slideio"] = getattr(slideio, "__version__", None)
+    except ImportError:
+        description["slideio"] = None
+    return description
+
+
+def access_order(pattern: str, number_of_regions: int, reads: int, seed: int = 0, stride: int = 7) -> np.ndarray:
+    """
+    access_order The region indices a pattern reads
+
+    :param pattern: One of PATTERNS
+    :type pattern: str
+    :param number_of_regions: The number of regions of the image
+    :type number_of_regions: int
+    :param reads: The number of regions to read
+    :type reads: int
+    :param seed: Seed of random and threaded orders, defaults to 0
+    :type seed: int, optional
+    :param stride: Step between the regions of a strided order, defaults to 7
+    :type stride: int, optional
+    :raises ValueError: Unknown pattern
+    :return: The region indices in the order they are read
+    :rtype: np.ndarray
+    """
+    reads = min(reads, number_of_regions)
+    if pattern == "sequential":
+        return np.arange(reads)
+    if pattern in ("random", "threaded"):
+        return np.random.default_rng(seed).choice(number_of_regions, size=reads, replace=False)
+    if pattern == "strided":
+        return (np.arange(reads) * stride) % number_of_regions
+    raise ValueError(f"{pattern=} should be one of {PATTERNS}")
+
+
+def open_reader(adapter: str, image_path: str, region_dims: Iterable, reads: int):
+    """
+    open_reader Open a reader of the image (or of a patch directory cut from it) with the given adapter
+
+    :param adapter: One of ADAPTERS
+    :type adapter: str
+    :param image_path: Filepath to the synthetic image
+    :type image_path: str
+    :param region_dims: A set of (width, height) coordinates representing the region dimensions
+    :type region_dims: Iterable
+    :param reads: The number of patches a patch directory needs
+    :type reads: int
+    :raises ValueError: Unknown adapter
+    :return: The reader
+    :rtype: ImageReader
+    """
+    from unified_image_reader import adapters
+    from unified_image_reader.adapters import config as adapters_config
+    from unified_image_reader.image_reader import ImageReader, ImageReaderDirectory
+    if adapter.startswith("VIPS:"):
+        adapters_config.VIPS_GET_REGION = adapter.split(":", 1)[1]
+        return ImageReader(image_path, adapters.VIPS)
+    if adapter == "SlideIO":
+        return ImageReader(image_path, adapters.SlideIO)
+    if adapter == "ImageReaderDirectory":
+        return ImageReaderDirectory(synthetic.patch_directory(image_path, region_dims, reads), persist=False)
+    raise ValueError(f"{adapter=} should be one of {ADAPTERS}")
+
+
+def timed_reads(read: Callable[[int], np.ndarray], order: np.ndarray, threads: int = 1):
+    """
+    timed_reads Read the regions in order, timing every read
+
+    :param read: Reads one region given its index
+    :type read: Callable[[int], np.ndarray]
+    :param order: The region indices to read
+    :type order: np.ndarray
+    :param threads: The number of threads reading concurrently, defaults to 1
+    :type threads: int, optional
+    :return: Wall time in seconds, per-read latencies in seconds and bytes read
+    :rtype: Tuple[float, np.ndarray, int]
+    """
+    def timed_read(region_index):
+        start = time.perf_counter()
+        region = read(int(region_index))
+        return time.perf_counter() - start, region.nbytes
+
+    start = time.perf_counter()
+    if threads > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            timings = list(executor.map(timed_read, order))
+    else:
+        timings = [timed_read(region_index) for region_index in order]
+    wall = time.perf_counter() - start
+    latencies = np.array([t for t, _ in timings])
+    return wall, latencies, sum(n for _, n in timings)
+
+
+def run_case(case: Dict) -> Dict:
+    """
+    run_case Run one benchmark case. Failures are recorded in the result rather than raised so that one unsupported
+    combination doesn't end the run.
+
+    :param case: The case's image_path, adapter, api, pattern, region_size, reads, threads and seed
+    :type case: Dict
+    :return: The case along with its metrics (or its error)
+    :rtype: Dict
+    """
+    from unified_image_reader import Image
+    result = dict(case)
+    region_dims = (case["region_size"], case["region_size"])
+    try:
+        start = time.perf_counter()
+        reader = open_reader(case["adapter"], case["image_path"], region_dims, case["reads"])
+        result["open_seconds"] = time.perf_counter() - start
+        if case["api"] == "Image":
+            read = functools.partial(Image(case["image_path"], reader=reader).get_region,
+                                     region_dims=region_dims)
+        else:
+            read = functools.partial(reader.get_region, region_dims=region_dims)
+        order = access_order(case["pattern"], reader.number_of_regions(region_dims),
+                             case["reads"], case["seed"])
+        read(int(order[0]))  # warm up, e.g. lazily created VIPS regions
+        threads = case["threads"] if case["pattern"] == "threaded" else 1
+        wall, latencies, nbytes = timed_reads(read, order, threads)
+        result.update({
+            "regions": len(order),
+            "seconds": wall,
+            "regions_per_second": len(order) / wall,
+            "mb_per_second": nbytes / wall / (1024 * 1024),
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def cases(workdir: str, sizes: Iterable[int], tile_sizes: Iterable[int], compressions: Iterable[str],
+          adapters: Iterable[str], apis: Iterable[str], patterns: Iterable[str],
+          region_size: int, reads: int, threads: int, seed: int) -> List[Dict]:
+    """
+    cases Generate the synthetic images and enumerate every combination of the parameters
+
+    :return: The cases
+    :rtype: List[Dict]
+    """
+    enumerated = []
+    for size, tile_size, compression in itertools.product(sizes, tile_sizes, compressions):
+        image_path = synthetic.tiled_tiff(workdir, size, tile_size, compression, seed)
+        for adapter, api, pattern in itertools.product(adapters, apis, patterns):
+            enumerated.append({
+                "image_path": image_path, "size": size, "tile_size": tile_size, "compression": compression,
+                "adapter": adapter, "api": api, "pattern": pattern,
+                "region_size": region_size, "reads": reads, "threads": threads, "seed": seed
+            })
+    return enumerated
+
+
+def run(enumerated_cases: Iterable[Dict], isolate: bool = True, progress: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    run Run the cases, by default each in a freshly spawned process so that peak RSS and caches aren't shared between them
+
+    :param enumerated_cases: The cases
+    :type enumerated_cases: Iterable[Dict]
+    :param isolate: Whether to run every case in its own process, defaults to True
+    :type isolate: bool, optional
+    :param progress: Called with every result as it completes, defaults to None
+    :type progress: Optional[Callable[[Dict], None]], optional
+    :return: The results
+    :rtype: List[Dict]
+    """
+    results = []
+    for case in enumerated_cases:
+        if isolate:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_case, case).result()
+        else:
+            result = run_case(case)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return results
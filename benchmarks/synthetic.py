@@ -0,0 +1,106 @@
+"""
+    Synthetic tiled, pyramidal TIFFs (and directories of patches cut from them) generated locally with pyvips
+"""
+
+import os
+from typing import Iterable
+
+import pyvips
+
+# slideio's SVS driver only opens TIFFs whose description identifies them as written by Aperio
+APERIO_DESCRIPTION = "Aperio Image Library v10.0.0\n{width}x{height} [0,0 {width}x{height}] ({tile}x{tile}) {compression}|AppMag = 20|MPP = 0.5"
+
+
+def image_name(size: int, tile_size: int, compression: str) -> str:
+    """
+    image_name The filename of a synthetic image, identifying its parameters
+
+    :param size: Width and height in pixels
+    :type size: int
+    :param tile_size: Width and height of the TIFF tiles in pixels
+    :type tile_size: int
+    :param compression: The TIFF compression, e.g. jpeg, deflate, lzw or none
+    :type compression: str
+    :return: The filename
+    :rtype: str
+    """
+    return f"synthetic-{size}-t{tile_size}-{compression}.tiff"
+
+
+def texture(size: int, seed: int = 0) -> pyvips.Image:
+    """
+    texture An RGB image of smooth noise which compresses about as well as tissue does
+
+    :param size: Width and height in pixels
+    :type size: int
+    :param seed: Seed of the noise, defaults to 0
+    :type seed: int, optional
+    :return: The lazily evaluated image
+    :rtype: pyvips.Image
+    """
+    bands = [pyvips.Image.perlin(size, size, cell_size=128, seed=seed + band)
+             for band in range(3)]
+    return ((bands[0].bandjoin(bands[1:]) + 1) * 127.5).cast("uchar")
+
+
+def tiled_tiff(directory: str, size: int, tile_size: int, compression: str, seed: int = 0) -> str:
+    """
+    tiled_tiff Write a tiled pyramidal TIFF unless it was written before
+
+    :param directory: Where to write the image
+    :type directory: str
+    :param size: Width and height in pixels
+    :type size: int
+    :param tile_size: Width and height of the TIFF tiles in pixels
+    :type tile_size: int
+    :param compression: The TIFF compression, e.g. jpeg, deflate, lzw or none
+    :type compression: str
+    :param seed: Seed of the noise, defaults to 0
+    :type seed: int, optional
+    :return: Filepath to the image
+    :rtype: str
+    """
+    path = os.path.join(directory, image_name(size, tile_size, compression))
+    if os.path.isfile(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    image = texture(size, seed).copy()
+    image.set_type(pyvips.GValue.gstr_type, "image-description", APERIO_DESCRIPTION.format(
+        width=size, height=size, tile=tile_size, compression=compression.upper()))
+    temporary_path = f"{path}.{os.getpid()}.tmp.tiff"
+    image.tiffsave(temporary_path, tile=True, tile_width=tile_size, tile_height=tile_size,
+                   pyramid=True, compression=compression, Q=85)
+    os.replace(temporary_path, path)
+    return path
+
+
+def patch_directory(image_path: str, region_dims: Iterable, count: int, suffix: str = "png") -> str:
+    """
+    patch_directory Cut the first count regions of an image into a directory of image files unless that was done before
+
+    :param image_path: Filepath to the image
+    :type image_path: str
+    :param region_dims: A set of (width, height) coordinates representing the patch dimensions
+    :type region_dims: Iterable
+    :param count: The number of patches
+    :type count: int
+    :param suffix: The file format of the patches, defaults to "png"
+    :type suffix: str, optional
+    :return: Path to the directory
+    :rtype: str
+    """
+    region_width, region_height = region_dims
+    directory = f"{os.path.splitext(image_path)[0]}-patches-{region_width}x{region_height}-{count}-{suffix}"
+    if os.path.isdir(directory):
+        return directory
+    image = pyvips.Image.new_from_file(image_path)
+    columns = image.width // region_width
+    count = min(count, columns * (image.height // region_height))
+    temporary_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(temporary_directory)
+    for i in range(count):
+        top, left = divmod(i, columns)
+        image.crop(left * region_width, top * region_height, region_width, region_height).write_to_file(
+            os.path.join(temporary_directory, f"{i:08d}.{suffix}"))
+    os.replace(temporary_directory, directory)
+    return directory
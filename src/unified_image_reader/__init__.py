@@ -1,5 +1,18 @@
-
-from .image import Image
-from .image_reader import ImageReader
-
-from . import util
+from .image import Image
+from .image_reader import ImageReader
+from .pool import PooledImageReader
+from .collection import ImageCollection
+from .cache import RegionCache
+from .instrumentation import Instrumentation
+from .transform import OutputSpec
+from .sampling import LocalitySampler
+
+from . import util
+
+
+def __getattr__(name):
+    # AsyncImage needs asyncio, which is slow to import and unused by most workers
+    if name == "AsyncImage":
+        from .async_image import AsyncImage
+        return AsyncImage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
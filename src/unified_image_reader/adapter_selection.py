@@ -0,0 +1,263 @@
+"""
+    Choosing an adapter from an image's content rather than its file extension, optionally calibrated by timing
+    sample reads with every adapter able to read it
+"""
+
+import contextlib
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+from . import config
+from . import tiff
+from . import util
+from .adapters import Adapter, registry
+
+# the names of the adapters (see adapters/registry.py) able to read each format detected by tiff.detect_format, the default first
+CONTENT_ADAPTERS = {
+    "svs": ("SlideIO", "VIPS"),
+    "tiff": ("VIPS", "SlideIO"),
+    "bigtiff": ("VIPS", "SlideIO"),
+    "jpeg": ("VIPS",),
+    "png": ("VIPS",),
+    "webp": ("VIPS",)
+}
+
+
+def candidate_adapters(path: str) -> List[str]:
+    """
+    candidate_adapters Get the names of the adapters able to read an image, judging by its content
+
+    :param path: Filepath to the image
+    :type path: str
+    :return: The adapter names, the default first, or an empty list when the format isn't recognized
+    :rtype: List[str]
+    """
+    return list(CONTENT_ADAPTERS.get(tiff.detect_format(path), ()))
+
+
+def _first_available(names: List[str]) -> Optional[type]:
+    """
+    _first_available Import the first of the adapters whose library is installed
+
+    :param names: The adapter names
+    :type names: List[str]
+    :return: The adapter class or None when none of them can be imported
+    :rtype: Optional[type]
+    """
+    for name in names:
+        try:
+            return registry.get(name)
+        except (ImportError, KeyError):
+            continue
+    return None
+
+
+def signature(path: str) -> Optional[str]:
+    """
+    signature Describe what decides which adapter reads an image fastest: its format and, for TIFFs, the compression,
+    tile layout and whether it is a pyramid
+
+    :param path: Filepath to the image
+    :type path: str
+    :return: The signature or None when the format isn't recognized
+    :rtype: Optional[str]
+    """
+    image_format = tiff.detect_format(path)
+    if image_format not in ("svs", "tiff", "bigtiff"):
+        return image_format
+    try:
+        # two directories tell a pyramid from a single level, and their header tags its layout
+        ifds = tiff.read_header(path)
+    except (tiff.TiffFormatException, OSError):
+        return image_format
+    layout = tiff.layout(ifds[0])
+    tiles = f"tiles{layout['tile_width']}x{layout['tile_height']}" if layout["tile_width"] else "strips"
+    return "/".join([image_format, layout["compression"], tiles, f"samples{layout['samples']}",
+                     "pyramid" if len(ifds) > 1 else "flat"])
+
+
+class CalibrationCache():
+
+    """
+    CalibrationCache The fastest adapter found for each image signature, persisted as JSON and shared between processes
+    """
+
+    def __init__(self, path: str = config.ADAPTER_CALIBRATION_PATH):
+        """
+        __init__ Initialize CalibrationCache object
+
+        :param path: Where the choices are persisted, defaults to ADAPTER_CALIBRATION_PATH
+        :type path: str, optional
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded_signature = None
+        self._choices = {}
+
+    def _load(self) -> Dict:
+        """
+        _load Get the persisted choices, reading the file again only when it has changed
+
+        :return: {image signature: {"adapter": name, "seconds_per_read": {name: seconds}}}
+        :rtype: Dict
+        """
+        try:
+            file_signature = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return {}
+        if file_signature != self._loaded_signature:
+            try:
+                with open(self.path) as f:
+                    self._choices = json.load(f)
+            except (OSError, ValueError):
+                self._choices = {}
+            self._loaded_signature = file_signature
+        return self._choices
+
+    def get(self, image_signature: str) -> Optional[str]:
+        """
+        get Get the name of the fastest adapter for an image signature
+
+        :param image_signature: See signature
+        :type image_signature: str
+        :return: The adapter's class name or None when the signature hasn't been calibrated
+        :rtype: Optional[str]
+        """
+        with self._lock:
+            return self._load().get(image_signature, {}).get("adapter")
+
+    def put(self, image_signature: str, adapter: str, seconds_per_read: Dict[str, float]) -> None:
+        """
+        put Persist the fastest adapter for an image signature, writing to a temporary file first
+
+        :param image_signature: See signature
+        :type image_signature: str
+        :param adapter: The adapter's class name
+        :type adapter: str
+        :param seconds_per_read: The median read time of every candidate
+        :type seconds_per_read: Dict[str, float]
+        """
+        with self._lock:
+            choices = dict(self._load())
+            choices[image_signature] = {
+                "adapter": adapter, "seconds_per_read": seconds_per_read}
+            # a choice that can't be written (see util.write_sidecar) only lasts for this process
+            with contextlib.suppress(OSError):
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            util.write_sidecar(self.path, lambda f: json.dump(choices, f, indent=2), mode="w")
+            self._choices = choices
+
+
+_calibration_caches = {}
+
+
+def calibration_cache(path: Optional[str] = None) -> CalibrationCache:
+    """
+    calibration_cache Get the process-wide CalibrationCache of a file
+
+    :param path: Where the choices are persisted, defaults to None (ADAPTER_CALIBRATION_PATH)
+    :type path: Optional[str], optional
+    :return: The CalibrationCache
+    :rtype: CalibrationCache
+    """
+    path = path or config.ADAPTER_CALIBRATION_PATH
+    cache = _calibration_caches.get(path)
+    if cache is None:
+        cache = _calibration_caches.setdefault(path, CalibrationCache(path))
+    return cache
+
+
+def time_adapter(adapter: Union[str, type], path: str, reads: int = config.ADAPTER_CALIBRATION_READS) -> float:
+    """
+    time_adapter Time sample reads of regions spread over the image with an adapter
+
+    :param adapter: The adapter's name or class
+    :type adapter: Union[str, type]
+    :param path: Filepath to the image
+    :type path: str
+    :param reads: The number of timed reads, defaults to ADAPTER_CALIBRATION_READS
+    :type reads: int, optional
+    :return: The median seconds per read
+    :rtype: float
+    """
+    instance: Adapter = registry.get(adapter)(path)
+    width, height = instance.get_width(), instance.get_height()
+    region_dims = (min(width, config.DEFAULT_REGION_DIMS[0]),
+                   min(height, config.DEFAULT_REGION_DIMS[1]))
+    # the first read also pays for lazily opened decoders and isn't timed
+    instance.get_region((0, 0), region_dims)
+    seconds = []
+    for i in range(reads):
+        left = (width - region_dims[0]) * (i + 1) // (reads + 1)
+        top = (height - region_dims[1]) * (i + 1) // (reads + 1)
+        start = time.perf_counter()
+        instance.get_region((left, top), region_dims)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def calibrate(path: str, candidates: Optional[List[str]] = None, reads: int = config.ADAPTER_CALIBRATION_READS,
+              calibration_path: Optional[str] = None) -> Optional[type]:
+    """
+    calibrate Time sample reads with every candidate adapter and remember the fastest one for images with the same signature
+
+    :param path: Filepath to the image
+    :type path: str
+    :param candidates: The names of the adapters to time, defaults to None (candidate_adapters)
+    :type candidates: Optional[List[str]], optional
+    :param reads: The number of timed reads per adapter, defaults to ADAPTER_CALIBRATION_READS
+    :type reads: int, optional
+    :param calibration_path: Where the choice is persisted, defaults to None (ADAPTER_CALIBRATION_PATH)
+    :type calibration_path: Optional[str], optional
+    :return: The fastest adapter or None when none of the candidates can read the image
+    :rtype: Optional[type]
+    """
+    candidates = candidate_adapters(path) if candidates is None else candidates
+    seconds_per_read = {}
+    for name in candidates:
+        try:
+            seconds_per_read[name] = time_adapter(name, path, reads)
+        except Exception:
+            continue  # the adapter isn't installed or can't read this image after all
+    if not seconds_per_read:
+        return None
+    fastest = min(seconds_per_read, key=seconds_per_read.get)
+    image_signature = signature(path)
+    if image_signature is not None:
+        calibration_cache(calibration_path).put(
+            image_signature, fastest, seconds_per_read)
+    return registry.get(fastest)
+
+
+def select_adapter(path: str, calibrate_adapters: bool = False, calibration_path: Optional[str] = None) -> Optional[type]:
+    """
+    select_adapter Choose the adapter of an image from its content: the one calibrated fastest for images with the same
+    signature if there is one, otherwise (calibrating first when asked to) the format's first installed adapter.
+    Only the chosen adapter is imported.
+
+    :param path: Filepath to the image
+    :type path: str
+    :param calibrate_adapters: Whether to time the candidates of a signature that hasn't been calibrated yet, defaults to False
+    :type calibrate_adapters: bool, optional
+    :param calibration_path: Where calibrated choices are persisted, defaults to None (ADAPTER_CALIBRATION_PATH)
+    :type calibration_path: Optional[str], optional
+    :return: The adapter class or None when the format isn't recognized
+    :rtype: Optional[type]
+    """
+    candidates = candidate_adapters(path)
+    if len(candidates) > 1:
+        image_signature = signature(path)
+        if image_signature is not None:
+            fastest = calibration_cache(calibration_path).get(image_signature)
+            if fastest in candidates:
+                candidates.remove(fastest)
+                candidates.insert(0, fastest)
+            elif calibrate_adapters:
+                adapter = calibrate(path, candidates, calibration_path=calibration_path)
+                if adapter is not None:
+                    return adapter
+    return _first_available(candidates)
@@ -1,4 +1,15 @@
 
-from .adapter import Adapter
-from .slideio import SlideIO
-from .vips import VIPS
+from .adapter import Adapter, TileInfo
+from . import registry
+
+
+def __getattr__(name):
+    # adapters (and the libraries they wrap) are imported when first used, see registry.py
+    if not name[:1].isupper():
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}")
+    try:
+        return registry.get(name)
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}") from None
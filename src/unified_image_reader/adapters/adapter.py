@@ -4,26 +4,65 @@
     An implementation of image reading behavior that may map specific libraries to working with specific image formats
 """
 import abc
-from typing import Iterable
+import collections
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
+from . import config
+from .. import encoded, tiff
+
+# the native tile layout of a pyramid level: the (width, height) of its tiles and their compression
+TileInfo = collections.namedtuple("TileInfo", ["width", "height", "compression"])
+
 
 class Adapter(abc.ABC):
 
+    # set by ImageReader.instrument to a Recorder that adapters report the stages of their reads to
+    instrumentation = None
+    # the order of the color bands of the regions the adapter returns
+    channel_order = "RGB"
+    # the TIFF directories of the file, parsed on first use by _tiff_directory
+    _tiff_directories = None
+
     @abc.abstractmethod
-    def get_region(self, region_coordinates: Iterable, region_dims: Iterable) -> np.ndarray:
+    def get_region(self, region_coordinates: Iterable, region_dims: Iterable, level: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
         """get_region Get a pixel region of the image using the adapter library's implementation
 
-        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region
+        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region in the level's pixel space
         :type region_coordinates: Iterable
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
-        :return: A numpy array representative of the pixel region from the image
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to write the region into instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :return: A numpy array representative of the pixel region from the image (out when given)
         :rtype: np.ndarray
         """
         pass
 
+    @staticmethod
+    def _into(region: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        """
+        _into Copy a region into a caller-supplied buffer if there is one
+
+        :param region: The pixel region
+        :type region: np.ndarray
+        :param out: The caller-supplied buffer or None
+        :type out: Optional[np.ndarray]
+        :raises ValueError: out doesn't have the shape of the region
+        :return: out when given, otherwise region
+        :rtype: np.ndarray
+        """
+        if out is None:
+            return region
+        if out.shape != region.shape:
+            raise ValueError(
+                f"out should have the shape of the region {region.shape} but has {out.shape}")
+        np.copyto(out, region, casting="same_kind")
+        return out
+
     @abc.abstractmethod
     def get_width() -> int:
         """
@@ -37,3 +76,217 @@ class Adapter(abc.ABC):
         Get the height property of the image using the adapter library's implementation
         """
         pass
+
+    def get_levels(self) -> List[Tuple[int, int]]:
+        """
+        get_levels Get the (width, height) dimensions of every pyramid level, from full resolution down. Adapters whose
+        library exposes downsampled levels should override this; by default only full resolution is available.
+
+        :return: The dimensions of every level
+        :rtype: List[Tuple[int, int]]
+        """
+        return [(self.get_width(), self.get_height())]
+
+    def close(self) -> None:
+        """
+        close Release the files and decoding state the adapter keeps open between reads. Adapters holding library
+        objects should override this and reopen them if read again; by default there is nothing to release.
+        """
+        pass
+
+    def get_tile_info(self, level: int = 0) -> Optional[TileInfo]:
+        """
+        get_tile_info Get the native tile layout of a pyramid level, so that regions can be aligned to the tiles the
+        library decodes. Adapters should override this when their library or file format exposes it.
+
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The tile layout or None when the level isn't tiled (or its layout is unknown)
+        :rtype: Optional[TileInfo]
+        """
+        return None
+
+    def _tiff_directory(self, filepath: str, level: int = 0) -> Optional[Dict]:
+        """
+        _tiff_directory Find the TIFF directory storing a pyramid level by matching its dimensions against the level's
+
+        :param filepath: Filepath to the image file the adapter opened
+        :type filepath: str
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The directory (see tiff.read_ifds) or None when the file isn't a TIFF or no directory stores the level as is
+        :rtype: Optional[Dict]
+        """
+        if self._tiff_directories is None:
+            try:
+                self._tiff_directories = tiff.read_ifds(filepath) \
+                    if tiff.detect_format(filepath) in ("svs", "tiff", "bigtiff") else []
+            except (OSError, tiff.TiffFormatException):
+                self._tiff_directories = []
+        level_dims = tuple(self.get_levels()[level])
+        for directory in self._tiff_directories:
+            if (directory.get(tiff.IMAGE_WIDTH), directory.get(tiff.IMAGE_LENGTH)) == level_dims:
+                return directory
+        return None
+
+    def _tiff_tile_info(self, filepath: str, level: int = 0) -> Optional[TileInfo]:
+        """
+        _tiff_tile_info Get the tile layout of a pyramid level from the TIFF directory storing it
+
+        :param filepath: Filepath to the image file the adapter opened
+        :type filepath: str
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The tile layout or None when the level isn't stored as TIFF tiles
+        :rtype: Optional[TileInfo]
+        """
+        directory = self._tiff_directory(filepath, level)
+        if directory is None:
+            return None
+        layout = tiff.layout(directory)
+        if layout["tile_width"] is None:
+            return None
+        return TileInfo(layout["tile_width"], layout["tile_height"], layout["compression"])
+
+    def get_encoded_tile(self, tile_index: int, level: int = 0) -> Optional[encoded.EncodedTile]:
+        """
+        get_encoded_tile Get a native tile as stored, without decoding it. Adapters should override this when their
+        library or file format gives access to the stored tiles.
+
+        :param tile_index: The tile's index in row-major order
+        :type tile_index: int
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The encoded tile or None when the adapter can't pass tiles through
+        :rtype: Optional[EncodedTile]
+        """
+        return None
+
+    def _tiff_encoded_tile(self, filepath: str, tile_index: int, level: int = 0) -> Optional[encoded.EncodedTile]:
+        """
+        _tiff_encoded_tile Read a tile's bytes from the TIFF directory storing a pyramid level, merging the directory's
+        JPEGTables into JPEG tiles so that they decode on their own
+
+        :param filepath: Filepath to the image file the adapter opened
+        :type filepath: str
+        :param tile_index: The tile's index in row-major order
+        :type tile_index: int
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :raises IndexError: tile_index is out of range
+        :return: The encoded tile or None when the level isn't stored as interleaved TIFF tiles in a codec
+            encoded.decode_tile decodes (see encoded.DECODABLE_CODECS)
+        :rtype: Optional[EncodedTile]
+        """
+        directory = self._tiff_directory(filepath, level)
+        if directory is None or tiff.TILE_OFFSETS not in directory or \
+                directory.get(tiff.PLANAR_CONFIGURATION, 1) != 1:
+            return None
+        layout = tiff.layout(directory)
+        if layout["compression"] not in encoded.DECODABLE_CODECS:
+            return None  # e.g. lzw or zstd tiles, which the receiver couldn't decode
+        columns = -(-layout["width"] // layout["tile_width"])
+        rows = -(-layout["height"] // layout["tile_height"])
+        if not 0 <= tile_index < columns * rows:
+            raise IndexError(f"{tile_index=} should be in [0, {columns * rows})")
+        data = tiff.read_tile(filepath, directory, tile_index)
+        if layout["compression"] == "jpeg":
+            data = encoded.jpeg_stream(data, directory.get(tiff.JPEG_TABLES),
+                                       rgb=directory.get(tiff.PHOTOMETRIC) == tiff.PHOTOMETRIC_RGB)
+        left = (tile_index % columns) * layout["tile_width"]
+        top = (tile_index // columns) * layout["tile_height"]
+        return encoded.EncodedTile(
+            data, layout["compression"],
+            min(layout["tile_width"], layout["width"] - left), min(layout["tile_height"], layout["height"] - top),
+            layout["tile_width"], layout["tile_height"], layout["samples"],
+            tiff.sample_dtype(directory, tiff.byte_order(filepath)).str,
+            int(directory.get(tiff.PREDICTOR, 1)), level, tile_index)
+
+    def get_bands(self) -> int:
+        """
+        get_bands Get the number of bands (channels) in a pixel region. Adapters should override this when
+        their library exposes it without reading pixels.
+
+        :return: Number of bands
+        :rtype: int
+        """
+        return self.get_region((0, 0), (1, 1)).shape[-1]
+
+    def get_dtype(self) -> np.dtype:
+        """
+        get_dtype Get the dtype of a pixel region. Adapters should override this when their library exposes
+        it without reading pixels.
+
+        :return: The numpy dtype of a pixel region
+        :rtype: np.dtype
+        """
+        return self.get_region((0, 0), (1, 1)).dtype
+
+    def get_thumbnail(self, max_dims: Iterable) -> np.ndarray:
+        """
+        get_thumbnail Get the whole image downscaled to fit within max_dims. Adapters should override this with
+        their library's cheapest low resolution read; the default reads the full image and subsamples it.
+
+        :param max_dims: A set of (width, height) coordinates bounding the thumbnail dimensions
+        :type max_dims: Iterable
+        :return: A numpy array of the downscaled image
+        :rtype: np.ndarray
+        """
+        levels = self.get_levels()
+        # the smallest level that is still at least as large as the thumbnail
+        level = max((i for i, (width, height) in enumerate(levels)
+                     if width >= max_dims[0] or height >= max_dims[1]), default=0)
+        width, height = levels[level]
+        step = max(1, -(-width // max_dims[0]), -(-height // max_dims[1]))
+        return self.get_region((0, 0), (width, height), level)[::step, ::step]
+
+    def get_regions(self, region_coordinates: np.ndarray, region_dims: Iterable, out: np.ndarray, level: int = 0) -> np.ndarray:
+        """
+        get_regions Get many same-sized pixel regions of the image into a preallocated array. When the batch
+        is dense enough its bounding box is read once and sliced, otherwise the regions are read individually.
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param out: An (N, height, width, bands) array to be filled with the regions
+        :type out: np.ndarray
+        :param level: The pyramid level to read from, defaults to 0
+        :type level: int, optional
+        :return: out
+        :rtype: np.ndarray
+        """
+        if len(region_coordinates) == 0:
+            return out
+        region_width, region_height = region_dims
+        left, top = region_coordinates.min(axis=0)
+        right, bottom = region_coordinates.max(axis=0) + (region_width, region_height)
+        bounding_box_area = int(right - left) * int(bottom - top)
+        requested_area = len(region_coordinates) * region_width * region_height
+        if bounding_box_area <= config.BULK_READ_MAX_PIXELS and \
+                bounding_box_area <= config.BULK_READ_MAX_OVERREAD * requested_area:
+            block = self.get_region(
+                (int(left), int(top)), (int(right - left), int(bottom - top)), level)
+            for i, (x, y) in enumerate(region_coordinates - (left, top)):
+                out[i] = block[y:y+region_height, x:x+region_width]
+            return out
+        return self._get_regions_individually(region_coordinates, region_dims, out, level)
+
+    def _get_regions_individually(self, region_coordinates: np.ndarray, region_dims: Iterable, out: np.ndarray, level: int = 0) -> np.ndarray:
+        """
+        _get_regions_individually Fill out with one get_region call per region
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param out: An (N, height, width, bands) array to be filled with the regions
+        :type out: np.ndarray
+        :param level: The pyramid level to read from, defaults to 0
+        :type level: int, optional
+        :return: out
+        :rtype: np.ndarray
+        """
+        for i, (left, top) in enumerate(region_coordinates):
+            self.get_region((int(left), int(top)), region_dims, level, out=out[i])
+        return out
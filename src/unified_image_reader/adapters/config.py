@@ -1,2 +1,17 @@
 
 VIPS_GET_REGION = "IMAGE_CROP"  # alternatively "REGION_FETCH"
+
+# bulk region reads (Adapter.get_regions) read the bounding box of a batch once when it
+# covers at most BULK_READ_MAX_OVERREAD times the pixels requested and BULK_READ_MAX_PIXELS overall
+BULK_READ_MAX_OVERREAD = 2.0
+BULK_READ_MAX_PIXELS = 64 * 1024 * 1024
+
+# the SlideIO driver opening each format detected by tiff.detect_format
+SLIDEIO_DRIVERS = {
+    "svs": "SVS",
+    "tiff": "GDAL",
+    "bigtiff": "GDAL",
+    "jpeg": "GDAL",
+    "png": "GDAL"
+}
+SLIDEIO_DEFAULT_DRIVER = "SVS"
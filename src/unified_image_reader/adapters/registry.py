@@ -0,0 +1,95 @@
+"""
+    Registry of adapters by name
+
+    Adapters are registered as "module:Class" strings and only imported when first looked up, so that importing the
+    package doesn't import every imaging library. Other packages can register adapters through the
+    "unified_image_reader.adapters" entry point group, e.g. in setup.cfg:
+
+        [options.entry_points]
+        unified_image_reader.adapters =
+            MyAdapter = my_package.my_module:MyAdapter
+"""
+
+import importlib
+import threading
+from typing import Dict, List, Union
+
+ENTRY_POINT_GROUP = "unified_image_reader.adapters"
+
+_lock = threading.Lock()
+_targets: Dict[str, Union[str, type]] = {
+    "VIPS": "unified_image_reader.adapters.vips:VIPS",
+    "SlideIO": "unified_image_reader.adapters.slideio:SlideIO",
+    "TileStore": "unified_image_reader.adapters.tile_store:TileStore"
+}
+_entry_points_loaded = False
+
+
+def register(name: str, target: Union[str, type]) -> None:
+    """
+    register Register an adapter, replacing any adapter registered under the same name
+
+    :param name: The name the adapter is looked up by
+    :type name: str
+    :param target: The adapter class or a "module:Class" string importing it
+    :type target: Union[str, type]
+    """
+    with _lock:
+        _targets[name] = target
+
+
+def _load_entry_points() -> None:
+    """
+    _load_entry_points Register the adapters of the entry point group once, without importing them
+    """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    from importlib import metadata
+    try:
+        entry_points = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # python < 3.10
+        entry_points = metadata.entry_points().get(ENTRY_POINT_GROUP, ())
+    with _lock:
+        for entry_point in entry_points:
+            _targets.setdefault(entry_point.name, entry_point.value)
+        _entry_points_loaded = True
+
+
+def names() -> List[str]:
+    """
+    names Get the names of every registered adapter, including those registered through entry points
+
+    :return: The names
+    :rtype: List[str]
+    """
+    _load_entry_points()
+    return list(_targets)
+
+
+def get(name: Union[str, type]) -> type:
+    """
+    get Get an adapter class, importing it on first use
+
+    :param name: The adapter's registered name (an adapter class is returned as is)
+    :type name: Union[str, type]
+    :raises KeyError: No adapter is registered under the name
+    :return: The adapter class
+    :rtype: type
+    """
+    if isinstance(name, type):
+        return name
+    target = _targets.get(name)
+    if target is None:
+        _load_entry_points()
+        target = _targets.get(name)
+        if target is None:
+            raise KeyError(f"no adapter is registered as {name=}")
+    if isinstance(target, str):
+        module_name, _, attribute = target.partition(":")
+        adapter = getattr(importlib.import_module(module_name), attribute)
+        with _lock:
+            if _targets.get(name) == target:
+                _targets[name] = adapter
+        return adapter
+    return target
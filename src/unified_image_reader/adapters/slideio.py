@@ -4,6 +4,9 @@
     An adapter that uses the SlideIO library to implement image reading behavior
     Adapter currently mapped to reading .svs files
 """
+import time
+from typing import List, Optional, Tuple
+
 import numpy as np
 
 try:
@@ -12,19 +15,28 @@ except Exception as e:
     print("You have an issue with your SlideIO installation, it may be because of the dependency on Openslide. Contact Adin at adinbsolomon@gmail.com with any questions!")
     raise e
 
-from .adapter import Adapter
+from .adapter import Adapter, TileInfo
+from ..encoded import EncodedTile
+from . import config
+from .. import tiff
 
 
 class SlideIO(Adapter):
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, driver=None):
         """__init__ Initialize SlideIO adapter object
 
         :param filepath: Filepath to image file to be opened
         :type filepath: str
+        :param driver: The SlideIO driver, defaults to None (chosen from the file's content, see SLIDEIO_DRIVERS)
+        :type driver: str, optional
         """
-
-        self._image = slideio.open_slide(filepath, "SVS").get_scene(0)
+        if driver is None:
+            driver = config.SLIDEIO_DRIVERS.get(
+                tiff.detect_format(filepath), config.SLIDEIO_DEFAULT_DRIVER)
+        self.driver = driver
+        self._filepath = filepath
+        self._image = slideio.open_slide(filepath, driver).get_scene(0)
 
     def get_width(self):
         """get_width Get the width property of the image using SlideIO's implementation
@@ -42,16 +54,109 @@ class SlideIO(Adapter):
         """
         return self._image.size[1]
 
-    def get_region(self, region_coordinates, region_dims) -> np.ndarray:
+    def get_levels(self) -> List[Tuple[int, int]]:
+        """get_levels Get the (width, height) dimensions of every zoom level of the scene using SlideIO's implementation
+
+        :return: The dimensions of every level
+        :rtype: List[Tuple[int, int]]
+        """
+        levels = []
+        for i in range(self._image.num_zoom_levels):
+            size = self._image.get_zoom_level_info(i).size
+            levels.append((size.width, size.height))
+        return levels
+
+    def get_tile_info(self, level: int = 0) -> Optional[TileInfo]:
+        """get_tile_info Get the native tile layout of a pyramid level from the TIFF directory storing it
+
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The tile layout or None when the level isn't stored as TIFF tiles
+        :rtype: Optional[TileInfo]
+        """
+        return self._tiff_tile_info(self._filepath, level)
+
+    def get_encoded_tile(self, tile_index: int, level: int = 0) -> Optional[EncodedTile]:
+        """get_encoded_tile Get a native tile as stored in the TIFF directory of a pyramid level, without decoding it
+
+        :param tile_index: The tile's index in row-major order
+        :type tile_index: int
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The encoded tile or None when the level isn't stored as TIFF tiles encoded.decode_tile decodes
+        :rtype: Optional[EncodedTile]
+        """
+        return self._tiff_encoded_tile(self._filepath, tile_index, level)
+
+    def get_bands(self) -> int:
+        """get_bands Get the number of bands of the image using SlideIO's implementation
+
+        :return: Number of bands
+        :rtype: int
+        """
+        return self._image.num_channels
+
+    def get_dtype(self) -> np.dtype:
+        """get_dtype Get the dtype of the image's pixels using SlideIO's implementation
+
+        :return: The numpy dtype of the first channel
+        :rtype: np.dtype
+        """
+        return np.dtype(self._image.get_channel_data_type(0))
+
+    def get_thumbnail(self, max_dims) -> np.ndarray:
+        """get_thumbnail Get the whole image downscaled to fit within max_dims using SlideIO's scaled read_block
+
+        :param max_dims: A set of (width, height) coordinates bounding the thumbnail dimensions
+        :type max_dims: Iterable
+        :return: A numpy array of the downscaled image
+        :rtype: np.ndarray
+        """
+        width, height = self._image.size
+        scale = min(1, max_dims[0] / width, max_dims[1] / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return self._image.read_block((0, 0, width, height), size=size)
+
+    def get_region(self, region_coordinates, region_dims, level=0, out=None) -> np.ndarray:
         """get_region Get a pixel region of the image using SlideIO's implementation
 
-        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region
+        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region in the level's pixel space
         :type region_coordinates: Iterable
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
-        :return: A numpy array representative of the pixel region from the image
+        :param level: The zoom level to read from, defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to write the region into, defaults to None
+        :type out: np.ndarray, optional
+        :return: A numpy array representative of the pixel region from the image (out when given)
         :rtype: np.ndarray
         """
-        """ Calls the read_block method of a SlideIO Scene object to create an unscaled rectangular region of the image as a numpy array """
-        np_array = self._image.read_block((*region_coordinates, *region_dims))
-        return np_array
+        """ Calls the read_block method of a SlideIO Scene object to create a rectangular region of the image as a numpy array,
+            scaled down from full resolution coordinates for levels other than 0 """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        if level == 0:
+            region = self._image.read_block((*region_coordinates, *region_dims))
+        else:
+            width, height = self._image.size
+            level_width, level_height = self.get_levels()[level]
+            scale_x, scale_y = width / level_width, height / level_height
+            (left, top), (region_width, region_height) = region_coordinates, region_dims
+            x, y = round(left * scale_x), round(top * scale_y)
+            rect = (x, y, min(width - x, round(region_width * scale_x)), min(height - y, round(region_height * scale_y)))
+            # a rect clipped at the edge of the image covers a fraction of the region, read at the same scale
+            size = (min(region_width, max(1, round(rect[2] / scale_x))),
+                    min(region_height, max(1, round(rect[3] / scale_y))))
+            region = self._image.read_block(rect, size=size)
+            if size != (region_width, region_height):
+                # the rest of the region lies past the last full resolution pixel, which is repeated
+                padding = [(0, region_height - size[1]), (0, region_width - size[0])] + [(0, 0)] * (region.ndim - 2)
+                region = np.pad(region, padding, mode="edge")
+        if instrumentation is None:
+            return self._into(region, out)
+        decoded = time.perf_counter()
+        instrumentation.record("decode", decoded - start, region.nbytes)
+        region = self._into(region, out)
+        instrumentation.record("copy", time.perf_counter() - decoded, region.nbytes)
+        return region
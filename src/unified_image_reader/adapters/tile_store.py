@@ -0,0 +1,157 @@
+"""
+    TileStore Adapter
+
+    An adapter that reads regions back from a tile store written by unified_image_reader.tile_store.materialize.
+    Tiles are stored uncompressed in a .npy file and read as np.memmap views, so reads cost almost no CPU.
+    Adapter currently mapped to reading .tiles files
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .adapter import Adapter, TileInfo
+from ..encoded import EncodedTile
+
+TILE_STORE_VERSION = 1
+
+
+class TileStore(Adapter):
+
+    def __init__(self, filepath: str):
+        """__init__ Initialize TileStore adapter object
+
+        :param filepath: Filepath to the tile store's index file
+        :type filepath: str
+        :raises ValueError: The index was written by an unsupported version
+        """
+        with open(filepath) as f:
+            self.index = json.load(f)
+        if self.index.get("version") != TILE_STORE_VERSION:
+            raise ValueError(
+                f"unsupported tile store version {self.index.get('version')} in {filepath}")
+        data_path = os.path.join(os.path.dirname(
+            os.path.abspath(filepath)), self.index["data"])
+        # (rows, columns, tile height, tile width, bands)
+        self._tiles = np.load(data_path, mmap_mode="r")
+        self._rows, self._columns, self._tile_height, self._tile_width, self._bands = self._tiles.shape
+
+    def get_width(self) -> int:
+        """get_width Get the width of the stored area of the image
+
+        :return: Width in pixels
+        :rtype: int
+        """
+        return self._columns * self._tile_width
+
+    def get_height(self) -> int:
+        """get_height Get the height of the stored area of the image
+
+        :return: Height in pixels
+        :rtype: int
+        """
+        return self._rows * self._tile_height
+
+    def get_tile_info(self, level: int = 0) -> TileInfo:
+        """get_tile_info Get the layout of the stored tiles, which are uncompressed
+
+        :param level: The pyramid level, only level 0 is stored
+        :type level: int, optional
+        :return: The tile layout
+        :rtype: TileInfo
+        """
+        return TileInfo(self._tile_width, self._tile_height, "none")
+
+    def get_encoded_tile(self, tile_index: int, level: int = 0) -> EncodedTile:
+        """get_encoded_tile Get a stored tile's raw bytes, which need no decoding
+
+        :param tile_index: The tile's index in row-major order
+        :type tile_index: int
+        :param level: The pyramid level, only level 0 is stored
+        :type level: int, optional
+        :raises IndexError: A level other than 0 was requested or tile_index is out of range
+        :return: The tile
+        :rtype: EncodedTile
+        """
+        if level != 0:
+            raise IndexError(f"a tile store only holds level 0 but {level=}")
+        if not 0 <= tile_index < self._rows * self._columns:
+            raise IndexError(f"{tile_index=} should be in [0, {self._rows * self._columns})")
+        tile = self._tiles[tile_index // self._columns, tile_index % self._columns]
+        return EncodedTile(tile.tobytes(), "none", self._tile_width, self._tile_height, self._tile_width,
+                           self._tile_height, self._bands, self._tiles.dtype.str, 1, level, tile_index)
+
+    def get_bands(self) -> int:
+        """get_bands Get the number of bands of the stored tiles
+
+        :return: Number of bands
+        :rtype: int
+        """
+        return self._bands
+
+    def get_dtype(self) -> np.dtype:
+        """get_dtype Get the dtype of the stored tiles
+
+        :return: The numpy dtype of the tiles
+        :rtype: np.dtype
+        """
+        return self._tiles.dtype
+
+    def get_region(self, region_coordinates, region_dims, level=0, out=None) -> np.ndarray:
+        """get_region Get a pixel region from the stored tiles. A region matching a stored tile is a read-only memmap view;
+        any other region is assembled from the tiles it overlaps.
+
+        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region
+        :type region_coordinates: Iterable
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from, only level 0 is stored
+        :type level: int, optional
+        :param out: A (height, width, bands) array to write the region into, defaults to None
+        :type out: np.ndarray, optional
+        :raises IndexError: A level other than 0 was requested
+        :return: A numpy array representative of the pixel region from the image (out when given)
+        :rtype: np.ndarray
+        """
+        if level != 0:
+            raise IndexError(f"a tile store only holds level 0 but {level=}")
+        left, top = (int(c) for c in region_coordinates)
+        region_width, region_height = region_dims
+        if (region_width, region_height) == (self._tile_width, self._tile_height) and \
+                left % self._tile_width == 0 and top % self._tile_height == 0:
+            return self._into(self._tiles[top // self._tile_height, left // self._tile_width], out)
+        if out is None:
+            out = np.empty((region_height, region_width,
+                           self._bands), dtype=self._tiles.dtype)
+        for row in range(top // self._tile_height, -(-(top + region_height) // self._tile_height)):
+            for column in range(left // self._tile_width, -(-(left + region_width) // self._tile_width)):
+                tile_left, tile_top = column * self._tile_width, row * self._tile_height
+                x0, y0 = max(left, tile_left), max(top, tile_top)
+                x1 = min(left + region_width, tile_left + self._tile_width)
+                y1 = min(top + region_height, tile_top + self._tile_height)
+                out[y0 - top:y1 - top, x0 - left:x1 - left] = \
+                    self._tiles[row, column, y0 - tile_top:y1 - tile_top, x0 - tile_left:x1 - tile_left]
+        return out
+
+    def get_regions(self, region_coordinates, region_dims, out, level=0) -> np.ndarray:
+        """get_regions Get many same-sized pixel regions, gathering whole tiles with one fancy index when the regions match stored tiles
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param out: An (N, height, width, bands) array to be filled with the regions
+        :type out: np.ndarray
+        :param level: The pyramid level to read from, only level 0 is stored
+        :type level: int, optional
+        :return: out
+        :rtype: np.ndarray
+        """
+        tile_dims = (self._tile_width, self._tile_height)
+        if level == 0 and tuple(region_dims) == tile_dims and \
+                not (region_coordinates % tile_dims).any():
+            out[:] = self._tiles[region_coordinates[:, 1] // self._tile_height,
+                                 region_coordinates[:, 0] // self._tile_width]
+            return out
+        return self._get_regions_individually(region_coordinates, region_dims, out, level)
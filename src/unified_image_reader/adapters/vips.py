@@ -5,6 +5,10 @@
     Adapter currently mapped to reading .tif, tiff files
 """
 
+import threading
+import time
+from typing import List, Optional, Tuple
+
 import numpy as np
 
 try:
@@ -13,7 +17,8 @@ except Exception as e:
     print("You have an issue with your pyvips installation, it may be because of the dependency on libvips. Contact Adin at adinbsolomon@gmail.com with any questions!")
     raise e
 
-from .adapter import Adapter
+from .adapter import Adapter, TileInfo
+from ..encoded import EncodedTile
 from . import config
 
 FORMAT_TO_DTYPE = {
@@ -30,6 +35,13 @@ FORMAT_TO_DTYPE = {
 }
 
 
+# loaders that can shrink while decoding, with the shrink factors they support
+SHRINK_ON_LOAD = {
+    'jpegload': (2, 4, 8),
+    'webpload': (2, 4, 8)
+}
+
+
 class VIPS(Adapter):
 
     def __init__(self, filepath: str):
@@ -38,7 +50,113 @@ class VIPS(Adapter):
         :param filepath: Filepath to image file to be opened
         :type filepath: str
         """
-        self._image = pyvips.Image.new_from_file(filepath, access="random")
+        self._filepath = filepath
+        self._lock = threading.Lock()
+        image = pyvips.Image.new_from_file(filepath, access="random")
+        # the loader options and (width, height) of every pyramid level, and the images of the levels opened so far
+        self._level_options = [{}]
+        self._level_dims = [(image.width, image.height)]
+        self._level_images = {0: image}
+        self._bands = image.bands
+        self._format = image.format
+        # the downsampled levels are only looked for once a level other than full resolution is asked for
+        self._levels_discovered = False
+        # reusable pyvips.Regions, one per level per thread since libvips regions are not shared between threads
+        self._thread_local = threading.local()
+
+    def _discover_levels(self) -> None:
+        """_discover_levels Find the downsampled levels VIPS can load directly: openslide levels, TIFF subifds,
+        tiled TIFF pages with the aspect ratio of the full resolution image, or shrink-on-load factors. Only the first
+        call looks for them.
+        """
+        if self._levels_discovered:
+            return
+        base = self._level_image(0)
+        with self._lock:
+            if not self._levels_discovered:
+                self._add_levels(base)
+                self._levels_discovered = True
+
+    def _add_levels(self, base: "pyvips.Image") -> None:
+        """_add_levels Open every candidate level of _discover_levels and keep those that downsample the full resolution image
+
+        :param base: The full resolution image
+        :type base: pyvips.Image
+        """
+        fields = base.get_fields()
+        loader = base.get('vips-loader') if 'vips-loader' in fields else None
+        if 'openslide.level-count' in fields:
+            candidates = [{'level': i} for i in range(1, int(base.get('openslide.level-count')))]
+        elif 'n-subifds' in fields:
+            candidates = [{'subifd': i} for i in range(base.get('n-subifds'))]
+        elif 'n-pages' in fields and 'tile-width' in fields:
+            candidates = [{'page': i} for i in range(1, base.get('n-pages'))]
+        elif loader in SHRINK_ON_LOAD:
+            candidates = [{'shrink': shrink} for shrink in SHRINK_ON_LOAD[loader]]
+        else:
+            candidates = []
+        aspect_ratio = base.width / base.height
+        levels = []
+        for options in candidates:
+            try:
+                image = pyvips.Image.new_from_file(
+                    self._filepath, access="random", **options)
+            except pyvips.Error:
+                continue
+            if 'page' in options and 'tile-width' not in image.get_fields():
+                continue  # e.g. an untiled label or thumbnail page
+            if image.width >= base.width or image.bands != base.bands or \
+                    abs(image.width / image.height - aspect_ratio) > 0.01 * aspect_ratio:
+                continue
+            levels.append((image.width, options, image))
+        levels.sort(key=lambda level: -level[0])
+        for _, options, image in levels:
+            self._level_images[len(self._level_options)] = image
+            self._level_options.append(options)
+            self._level_dims.append((image.width, image.height))
+
+    def _level_image(self, level: int) -> "pyvips.Image":
+        """_level_image Get the image of a pyramid level, opening it again when the adapter was closed
+
+        :param level: The pyramid level (0 is full resolution)
+        :type level: int
+        :return: The VIPS image of the level
+        :rtype: pyvips.Image
+        """
+        if level:
+            self._discover_levels()
+        image = self._level_images.get(level)
+        if image is None:
+            with self._lock:
+                image = self._level_images.get(level)
+                if image is None:
+                    image = self._level_images[level] = pyvips.Image.new_from_file(
+                        self._filepath, access="random", **self._level_options[level])
+        return image
+
+    def close(self) -> None:
+        """close Drop the level images and every thread's regions so that libvips releases the file; reading again reopens them
+        """
+        with self._lock:
+            self._level_images = {}
+            self._thread_local = threading.local()
+
+    def _vips_region(self, level: int) -> "pyvips.Region":
+        """_vips_region Get this thread's reusable region on a pyramid level, creating it on first use
+
+        :param level: The pyramid level (0 is full resolution)
+        :type level: int
+        :return: The region
+        :rtype: pyvips.Region
+        """
+        regions = getattr(self._thread_local, "regions", None)
+        if regions is None:
+            regions = self._thread_local.regions = {}
+        vips_region = regions.get(level)
+        if vips_region is None:
+            vips_region = regions[level] = pyvips.Region.new(
+                self._level_image(level))
+        return vips_region
 
     def get_width(self) -> int:
         """get_height Get the height property of the image using VIPS' implementation
@@ -46,7 +164,7 @@ class VIPS(Adapter):
         :return: Height in pixels
         :rtype: int
         """
-        return self._image.width
+        return self._level_dims[0][0]
 
     def get_height(self) -> int:
         """get_height Get the height property of the image using VIPS' implementation
@@ -54,33 +172,130 @@ class VIPS(Adapter):
         :return: Height in pixels
         :rtype: int
         """
-        return self._image.height
+        return self._level_dims[0][1]
+
+    def get_levels(self) -> List[Tuple[int, int]]:
+        """get_levels Get the (width, height) dimensions of every pyramid level VIPS can load
+
+        :return: The dimensions of every level
+        :rtype: List[Tuple[int, int]]
+        """
+        self._discover_levels()
+        return list(self._level_dims)
+
+    def get_tile_info(self, level: int = 0) -> Optional[TileInfo]:
+        """get_tile_info Get the native tile layout of a pyramid level from the TIFF directory storing it
+
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The tile layout or None when the level isn't stored as TIFF tiles (e.g. a shrink-on-load level)
+        :rtype: Optional[TileInfo]
+        """
+        return self._tiff_tile_info(self._filepath, level)
+
+    def get_encoded_tile(self, tile_index: int, level: int = 0) -> Optional[EncodedTile]:
+        """get_encoded_tile Get a native tile as stored in the TIFF directory of a pyramid level, without decoding it
+
+        :param tile_index: The tile's index in row-major order
+        :type tile_index: int
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The encoded tile or None when the level isn't stored as TIFF tiles encoded.decode_tile decodes
+        :rtype: Optional[EncodedTile]
+        """
+        return self._tiff_encoded_tile(self._filepath, tile_index, level)
+
+    def get_bands(self) -> int:
+        """get_bands Get the number of bands of the image using VIPS' implementation
+
+        :return: Number of bands
+        :rtype: int
+        """
+        return self._bands
+
+    def get_dtype(self) -> np.dtype:
+        """get_dtype Get the dtype of the image's pixels using VIPS' implementation
+
+        :return: The numpy dtype matching the VIPS band format
+        :rtype: np.dtype
+        """
+        return np.dtype(FORMAT_TO_DTYPE[self._format])
+
+    def get_thumbnail(self, max_dims) -> np.ndarray:
+        """get_thumbnail Get the whole image downscaled to fit within max_dims using VIPS' shrink-on-load thumbnailing
 
-    def get_region(self, region_coordinates, region_dims) -> np.ndarray:
+        :param max_dims: A set of (width, height) coordinates bounding the thumbnail dimensions
+        :type max_dims: Iterable
+        :return: A numpy array of the downscaled image
+        :rtype: np.ndarray
+        """
+        thumbnail = pyvips.Image.thumbnail(
+            self._filepath, max_dims[0], height=max_dims[1], size="down")
+        return np.ndarray(
+            buffer=thumbnail.write_to_memory(),
+            dtype=FORMAT_TO_DTYPE[thumbnail.format],
+            shape=[thumbnail.height, thumbnail.width, thumbnail.bands]
+        )
+
+    def get_region(self, region_coordinates, region_dims, level=0, out=None) -> np.ndarray:
         """get_region Get a pixel region of the image using VIPS' implementation
 
-        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region
+        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region in the level's pixel space
         :type region_coordinates: Iterable
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
-        :return: A numpy array representative of the pixel region from the image
+        :param level: The pyramid level to read from, defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to write the region into, defaults to None
+        :type out: np.ndarray, optional
+        :return: A numpy array representative of the pixel region from the image (out when given, otherwise a read-only view of VIPS' buffer)
         :rtype: np.ndarray
         """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        image = self._level_image(level)
         if config.VIPS_GET_REGION == "IMAGE_CROP":
-            output_img = self._image.crop(*region_coordinates, *region_dims)
-            np_output = np.ndarray(
-                buffer=output_img.write_to_memory(),
-                dtype=FORMAT_TO_DTYPE[output_img.format],
-                shape=[output_img.height, output_img.width, output_img.bands]
-            )
-            return np_output
+            bytestring_buffer = image.crop(
+                *region_coordinates, *region_dims).write_to_memory()
         elif config.VIPS_GET_REGION == "REGION_FETCH":
-            vips_region = pyvips.Region.new(self._image)
-            bytestring_buffer = vips_region.fetch(
+            bytestring_buffer = self._vips_region(level).fetch(
                 *region_coordinates, *region_dims)
-            np_output = np.frombuffer(bytestring_buffer, dtype=np.uint8)
-            region = np_output.reshape(*region_dims, 3)
-            return region
         else:
             raise Exception(
                 f"Invalid vips get region mode {config.VIPS_GET_REGION=}")
+        if instrumentation is not None:
+            decoded = time.perf_counter()
+            instrumentation.record(
+                "decode", decoded - start, len(bytestring_buffer))
+        region_width, region_height = region_dims
+        np_output = np.frombuffer(
+            bytestring_buffer, dtype=FORMAT_TO_DTYPE[image.format]
+        ).reshape(region_height, region_width, image.bands)
+        np_output = self._into(np_output, out)
+        if instrumentation is not None:
+            instrumentation.record(
+                "copy", time.perf_counter() - decoded, np_output.nbytes)
+        return np_output
+
+    def _get_regions_individually(self, region_coordinates, region_dims, out, level=0) -> np.ndarray:
+        """_get_regions_individually Fill out with regions fetched through this thread's reusable pyvips.Region rather than one crop per region
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param out: An (N, height, width, bands) array to be filled with the regions
+        :type out: np.ndarray
+        :param level: The pyramid level to read from, defaults to 0
+        :type level: int, optional
+        :return: out
+        :rtype: np.ndarray
+        """
+        region_width, region_height = region_dims
+        vips_region = self._vips_region(level)
+        for i, (left, top) in enumerate(region_coordinates):
+            bytestring_buffer = vips_region.fetch(
+                int(left), int(top), region_width, region_height)
+            out[i] = np.frombuffer(bytestring_buffer, dtype=out.dtype).reshape(out.shape[1:])
+        return out
@@ -0,0 +1,149 @@
+"""
+    An asyncio interface into an Image, offloading decoding to a bounded executor so the event loop never blocks
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from . import config
+from . import image
+
+
+class AsyncImage():
+
+    """
+    AsyncImage An Image whose reads are awaitable. At most `concurrency` reads of this image run at once; cancelling
+    an awaiting task cancels its read if it hasn't started decoding yet.
+    """
+
+    def __init__(self, filepath, reader=None, concurrency: int = 4,
+                 executor: Optional[concurrent.futures.Executor] = None):
+        """
+        __init__ Initialize AsyncImage object
+
+        :param filepath: Filepath to image file to be opened
+        :type filepath: str
+        :param reader: Interface to reading the image file, defaults to None
+        :type reader: ImageReader or custom class supportive of the same functions, optional
+        :param concurrency: The maximum number of concurrent reads of this image, defaults to 4
+        :type concurrency: int, optional
+        :param executor: An executor shared between images, defaults to None (a private thread pool of size concurrency)
+        :type executor: Optional[concurrent.futures.Executor], optional
+        :raises ValueError: concurrency is not positive
+        """
+        if concurrency < 1:
+            raise ValueError(f"{concurrency=} should be positive")
+        self.image = image.Image(filepath, reader)
+        self.concurrency = concurrency
+        self._owns_executor = executor is None
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="unified_image_reader_async")
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(self, function, *args, **kwargs):
+        """
+        _run Run a blocking read on the executor once a concurrency slot is free
+
+        :param function: The blocking function
+        :type function: Callable
+        :return: The function's result
+        :rtype: Any
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def get_region(self, region_identifier, region_dims=config.DEFAULT_REGION_DIMS, level=0) -> np.ndarray:
+        """
+        get_region Get a pixel region from the image without blocking the event loop
+
+        :param region_identifier: A  set of (width, height) coordinates or an indexed region based on region dimensions
+        :type region_identifier: Union[int, Iterable]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: A numpy array representative of the pixel region from the image
+        :rtype: np.ndarray
+        """
+        return await self._run(self.image.get_region, region_identifier, region_dims, level)
+
+    async def get_regions(self, region_identifiers, region_dims=config.DEFAULT_REGION_DIMS, level=0) -> np.ndarray:
+        """
+        get_regions Get many pixel regions from the image in one batch without blocking the event loop
+
+        :param region_identifiers: Either a sequence of region indices or a sequence of (width, height) coordinates
+        :type region_identifiers: Iterable
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: An (N, height, width, bands) numpy array of the pixel regions
+        :rtype: np.ndarray
+        """
+        return await self._run(self.image.get_regions, region_identifiers, region_dims, level)
+
+    def number_of_regions(self, region_dims=config.DEFAULT_REGION_DIMS, level=0) -> int:
+        """
+        number_of_regions Get total number of regions from the image based on region dimensions
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level whose regions are counted, defaults to 0
+        :type level: int, optional
+        :return: Number of regions in the image
+        :rtype: int
+        """
+        return self.image.number_of_regions(region_dims, level)
+
+    @property
+    def dims(self):
+        """
+        dims Get the width and height properties of the image
+
+        :return: Width and height in pixels
+        :rtype: Tuple[int]
+        """
+        return self.image.dims
+
+    async def __aiter__(self) -> AsyncIterator[np.ndarray]:
+        """
+        __aiter__ Iterate over the regions between the Image's start and stop in order, keeping up to `concurrency`
+        reads in flight. Reads still pending when iteration stops early are cancelled.
+
+        :return: An asynchronous iterator over the pixel regions
+        :rtype: AsyncIterator[np.ndarray]
+        """
+        region_indices = iter(self.image._iteration_region_indices())
+        pending = collections.deque()
+        try:
+            for region_index in region_indices:
+                pending.append(asyncio.ensure_future(
+                    self.get_region(int(region_index))))
+                if len(pending) >= self.concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """
+        aclose Stop the private executor, cancelling reads that haven't started
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.image.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        await self.aclose()
+        return None
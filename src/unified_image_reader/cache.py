@@ -0,0 +1,145 @@
+"""
+    A byte-budgeted, thread-safe LRU cache for decoded pixel regions
+"""
+
+import collections
+import threading
+from typing import Hashable, Iterable, Optional
+
+import numpy as np
+
+
+class RegionCache():
+
+    """
+    RegionCache An LRU cache of read-only pixel regions bounded by the total number of bytes it holds.
+    One cache may be shared by several ImageReaders because keys include the image filepath.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        __init__ Initialize RegionCache object
+
+        :param max_bytes: The memory budget of the cache in bytes
+        :type max_bytes: int
+        :raises ValueError: max_bytes is negative
+        """
+        if max_bytes < 0:
+            raise ValueError(f"{max_bytes=} should not be negative")
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(filepath: str, region_coordinates: Iterable, region_dims: Iterable, level: int = 0) -> Hashable:
+        """
+        key Build the cache key of a region
+
+        :param filepath: Filepath of the image the region belongs to
+        :type filepath: str
+        :param region_coordinates: A set of (width, height) coordinates representing the top-left pixel of the region
+        :type region_coordinates: Iterable
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level the region is read from, defaults to 0
+        :type level: int, optional
+        :return: A hashable key
+        :rtype: Hashable
+        """
+        left, top = region_coordinates
+        width, height = region_dims
+        return (filepath, int(left), int(top), int(width), int(height), int(level))
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """
+        get Look up a region and mark it as most recently used
+
+        :param key: A key built by RegionCache.key
+        :type key: Hashable
+        :return: The cached read-only region or None on a miss
+        :rtype: Optional[np.ndarray]
+        """
+        with self._lock:
+            region = self._entries.get(key)
+            if region is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return region
+
+    def put(self, key: Hashable, region: np.ndarray) -> np.ndarray:
+        """
+        put Insert a region, evicting least recently used regions until it fits in the budget.
+        The region is made read-only so that it can be shared without copies.
+
+        :param key: A key built by RegionCache.key
+        :type key: Hashable
+        :param region: The pixel region to cache
+        :type region: np.ndarray
+        :return: The (now read-only) region
+        :rtype: np.ndarray
+        """
+        region.flags.writeable = False
+        if region.nbytes > self.max_bytes:
+            return region
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            while self._entries and self.current_bytes + region.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+            self._entries[key] = region
+            self.current_bytes += region.nbytes
+        return region
+
+    def clear(self) -> None:
+        """
+        clear Drop every cached region (counters are kept)
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        stats Get a snapshot of the cache counters
+
+        :return: hits, misses, evictions, entries, current_bytes and max_bytes
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of cached regions
+
+        :return: The number of cached regions
+        :rtype: int
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        __contains__ Check for a cached region without touching counters or recency
+
+        :param key: A key built by RegionCache.key
+        :type key: Hashable
+        :return: Whether the region is cached
+        :rtype: bool
+        """
+        return key in self._entries
@@ -0,0 +1,270 @@
+"""
+    Many images read as one dataset: a global region index across the images and a bounded set of open readers
+"""
+
+import collections
+import contextlib
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import config
+from . import image_reader
+
+
+class ImageCollection(contextlib.AbstractContextManager):
+
+    """
+    ImageCollection The regions of many images numbered one after another: global region i is local region
+    i - offsets[s] of image s, where offsets are the cumulative region counts of the images. At most max_open readers
+    are kept open at once, the least recently used one being closed to open another.
+    """
+
+    def __init__(self, filepaths: Iterable[str], region_dims=config.DEFAULT_REGION_DIMS, level: int = 0,
+                 max_open: Optional[int] = None, reader_factory: Optional[Callable[[str], image_reader.ImageReader]] = None,
+                 counts: Optional[Sequence[int]] = None):
+        """
+        __init__ Initialize ImageCollection object
+
+        :param filepaths: Filepaths to the image files, in the order their regions are numbered
+        :type filepaths: Iterable[str]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level the regions are read from, defaults to 0
+        :type level: int, optional
+        :param max_open: The maximum number of readers open at once, defaults to None (COLLECTION_MAX_OPEN_READERS)
+        :type max_open: Optional[int], optional
+        :param reader_factory: Opens the reader of a filepath, e.g. a functools.partial of ImageReader with a shared cache, defaults to None (ImageReader)
+        :type reader_factory: Optional[Callable[[str], ImageReader]], optional
+        :param counts: The number of regions of every image when already known (otherwise each image is opened once to count them), defaults to None
+        :type counts: Optional[Sequence[int]], optional
+        :raises ValueError: max_open is not positive or counts doesn't match the filepaths
+        """
+        self.filepaths = list(filepaths)
+        self.region_dims = tuple(region_dims)
+        self.level = level
+        self.max_open = max_open or config.COLLECTION_MAX_OPEN_READERS
+        if self.max_open < 1:
+            raise ValueError(f"{max_open=} should be positive")
+        self._reader_factory = reader_factory or image_reader.ImageReader
+        self._readers = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        if counts is None:
+            counts = [self._count(i) for i in range(len(self.filepaths))]
+        counts = np.asarray(counts, dtype=np.int64)
+        if counts.shape != (len(self.filepaths),):
+            raise ValueError(
+                f"{len(counts)} counts were given for {len(self.filepaths)} filepaths")
+        self.counts = counts
+        # offsets[s] is the global index of the first region of image s and offsets[-1] is the total
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _count(self, image_index: int) -> int:
+        """
+        _count Count the regions of an image
+
+        :param image_index: The position of the image in filepaths
+        :type image_index: int
+        :return: The number of regions
+        :rtype: int
+        """
+        reader = self.reader(image_index)
+        if self.level:
+            return reader.number_of_regions(self.region_dims, self.level)
+        return reader.number_of_regions(self.region_dims)
+
+    def reader(self, image_index: int) -> image_reader.ImageReader:
+        """
+        reader Get the reader of an image, opening it (and closing the least recently used reader if max_open are open) when it isn't open
+
+        :param image_index: The position of the image in filepaths
+        :type image_index: int
+        :return: The reader
+        :rtype: ImageReader
+        """
+        with self._lock:
+            reader = self._readers.get(image_index)
+            if reader is not None:
+                self._readers.move_to_end(image_index)
+                return reader
+            reader = self._reader_factory(self.filepaths[image_index])
+            self.opened += 1
+            self._readers[image_index] = reader
+            while len(self._readers) > self.max_open:
+                _, evicted = self._readers.popitem(last=False)
+                # a reader still in use elsewhere stays usable, it reopens its file if read again
+                evicted.close()
+            return reader
+
+    def locate(self, region_indices: Union[int, Iterable[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        locate Map global region indices to the images they belong to and their indices within those images
+
+        :param region_indices: A global region index or many of them
+        :type region_indices: Union[int, Iterable[int]]
+        :raises IndexError: A region index is out of range
+        :return: The image positions and local region indices, scalars when one index was given
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        region_indices = np.asarray(region_indices, dtype=np.int64)
+        if region_indices.size and (region_indices.min() < 0 or region_indices.max() >= len(self)):
+            raise IndexError(
+                f"region indices should be in [0, {len(self)}), got {region_indices.min()} to {region_indices.max()}")
+        image_indices = np.searchsorted(self.offsets, region_indices, side="right") - 1
+        return image_indices, region_indices - self.offsets[image_indices]
+
+    def get_region(self, region_index: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        get_region Get a pixel region by its global index
+
+        :param region_index: The global region index
+        :type region_index: int
+        :param out: A (height, width, bands) array to refill with the region instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :return: A numpy array representative of the pixel region (out when given)
+        :rtype: np.ndarray
+        """
+        image_index, local_index = self.locate(region_index)
+        options = {}
+        if self.level:
+            options["level"] = self.level
+        if out is not None:
+            options["out"] = out
+        # locate checked the index, so the region is in bounds
+        return self.reader(int(image_index)).get_region(int(local_index), self.region_dims, validate=False, **options)
+
+    def get_regions(self, region_indices: Iterable[int]) -> Union[np.ndarray, List[np.ndarray]]:
+        """
+        get_regions Get many pixel regions by their global indices, reading the regions of each image in one batch
+        in ascending order
+
+        :param region_indices: The global region indices
+        :type region_indices: Iterable[int]
+        :return: The regions in the order asked for, stacked into an (N, height, width, bands) array, or a list of them when their shapes or dtypes differ
+        :rtype: Union[np.ndarray, List[np.ndarray]]
+        """
+        image_indices, local_indices = self.locate(np.atleast_1d(region_indices))
+        regions: List[Optional[np.ndarray]] = [None] * len(local_indices)
+        # a stable sort groups the reads by image and keeps each image's reads in ascending order
+        order = np.lexsort((local_indices, image_indices))
+        boundaries = np.flatnonzero(np.diff(image_indices[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group) == 0:
+                continue
+            reader = self.reader(int(image_indices[group[0]]))
+            options = {"level": self.level} if self.level else {}
+            batch = reader.get_regions(local_indices[group], self.region_dims, validate=False, **options)
+            for position, region in zip(group, batch):
+                regions[position] = region
+        if regions and all(r.shape == regions[0].shape and r.dtype == regions[0].dtype for r in regions):
+            return np.stack(regions)
+        return regions
+
+    def schedule(self, batch_size: int, images_per_batch: Optional[int] = None, shuffle: bool = False,
+                 seed: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        schedule Order every global region index into batches that mix images_per_batch images, each contributing a run
+        of its regions, so that a batch is read with one get_regions call per image. Images join the mix one after
+        another as earlier ones run out of regions, so keeping images_per_batch at or below max_open means no reader
+        is reopened.
+
+        :param batch_size: The number of regions per batch (the last batch may be smaller)
+        :type batch_size: int
+        :param images_per_batch: The number of images mixed in a batch, defaults to None (min(batch_size, max_open))
+        :type images_per_batch: Optional[int], optional
+        :param shuffle: Visit the images and the regions within each image in random order, defaults to False
+        :type shuffle: bool, optional
+        :param seed: Seed of the shuffle, defaults to None
+        :type seed: Optional[int], optional
+        :raises ValueError: batch_size or images_per_batch is not positive
+        :return: An iterator over the batches of global region indices
+        :rtype: Iterator[np.ndarray]
+        """
+        if batch_size < 1:
+            raise ValueError(f"{batch_size=} should be positive")
+        images_per_batch = images_per_batch or min(batch_size, self.max_open)
+        if images_per_batch < 1:
+            raise ValueError(f"{images_per_batch=} should be positive")
+        rng = np.random.default_rng(seed)
+        image_order = np.flatnonzero(self.counts)
+        if shuffle:
+            image_order = rng.permutation(image_order)
+
+        def regions_of(image_index):
+            regions = np.arange(self.offsets[image_index], self.offsets[image_index + 1])
+            return rng.permutation(regions) if shuffle else regions
+
+        pending = iter(image_order)
+        # the remaining regions of every image in the mix
+        active = collections.deque()
+        for image_index in pending:
+            active.append(regions_of(image_index))
+            if len(active) == images_per_batch:
+                break
+        while active:
+            batch, room = [], batch_size
+            while room and active:
+                # one pass over the mix, sharing what is left of the batch evenly between the images not yet visited
+                for images_left in range(len(active), 0, -1):
+                    share = -(-room // images_left)
+                    regions = active.popleft()
+                    batch.append(regions[:share])
+                    room -= min(share, len(regions))
+                    if len(regions) > share:
+                        active.append(regions[share:])
+                    else:
+                        replacement = next(pending, None)
+                        if replacement is not None:
+                            active.append(regions_of(replacement))
+                    if not room:
+                        break
+            yield np.concatenate(batch)
+
+    def iter_batches(self, batch_size: int, **kwargs) -> Iterator[Tuple[np.ndarray, Union[np.ndarray, List[np.ndarray]]]]:
+        """
+        iter_batches Read every region in the batches of schedule
+
+        :param batch_size: The number of regions per batch
+        :type batch_size: int
+        :param kwargs: Passed to schedule, e.g. images_per_batch, shuffle or seed
+        :return: An iterator over (global region indices, regions) pairs
+        :rtype: Iterator[Tuple[np.ndarray, Union[np.ndarray, List[np.ndarray]]]]
+        """
+        for region_indices in self.schedule(batch_size, **kwargs):
+            yield region_indices, self.get_regions(region_indices)
+
+    def close(self) -> None:
+        """
+        close Close every open reader
+        """
+        with self._lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for reader in readers:
+            reader.close()
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of regions of every image together
+
+        :return: The number of regions
+        :rtype: int
+        """
+        return int(self.offsets[-1])
+
+    def __getitem__(self, region_index: int) -> np.ndarray:
+        """
+        __getitem__ Get a pixel region by its global index
+
+        :param region_index: The global region index
+        :type region_index: int
+        :return: The pixel region
+        :rtype: np.ndarray
+        """
+        return self.get_region(region_index)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        self.close()
+        return super().__exit__(exc_type, exc_value, traceback)
@@ -1,2 +1,53 @@
+import os
 
 DEFAULT_REGION_DIMS = (512, 512)
+
+# foreground (tissue) detection on a low resolution pass, see foreground.py
+FOREGROUND_PIXELS_PER_REGION = 8  # thumbnail pixels along each side of a region
+FOREGROUND_MIN_FRACTION = 0.1  # fraction of a region's thumbnail pixels that must be foreground
+FOREGROUND_SATURATION_THRESHOLD = 20  # pixels more saturated than this are foreground
+FOREGROUND_BRIGHTNESS_THRESHOLD = 220  # pixels darker than this are foreground
+
+# whole-slide statistics and thumbnails, see stats.py
+STATS_HISTOGRAM_BINS = 256  # histogram bins per channel
+STATS_MIN_PIXELS = 1 << 22  # statistics are computed on the lowest resolution level with at least this many pixels
+STATS_STRIP_PIXELS = 1 << 20  # pixels read (and summarized at once) per strip, bounding the memory of a pass
+STATS_THUMBNAIL_DIMS = (1024, 1024)
+
+# locality-aware random sampling, see sampling.py
+SAMPLING_BLOCK_REGIONS = 16  # neighbouring regions read together
+SAMPLING_LOCALITY = 0.9  # fraction of regions drawn in blocks of neighbours rather than scattered ones
+SAMPLING_BUFFER_REGIONS = 256  # regions held by the shuffle buffer
+
+# adapter selection, see adapter_selection.py
+ADAPTER_CALIBRATION_READS = 8  # timed sample reads per candidate adapter
+ADAPTER_CALIBRATION_PATH = os.environ.get(
+    "UNIFIED_IMAGE_READER_CALIBRATION",
+    os.path.join(os.path.expanduser("~"), ".cache", "unified_image_reader", "adapter_calibration.json"))
+
+# files whose TIFF header tags are kept parsed, see tiff.read_header
+TIFF_HEADER_CACHE_SIZE = 64
+
+# the maximum number of readers an ImageCollection keeps open, see collection.py
+COLLECTION_MAX_OPEN_READERS = 64
+
+# the maximum number of adapter handles a PooledImageReader opens for one file
+ADAPTER_POOL_MAX_HANDLES = os.cpu_count() or 4
+
+# bulk export, see export.py
+EXPORT_SHARD_SIZE = 256  # regions per shard, the unit of work and of resumption
+EXPORT_MANIFEST_INTERVAL = 5.0  # seconds between saves of the progress manifest while exporting
+EXPORT_OPEN_READERS = 4  # slides each export worker keeps open
+EXPORT_DIRECTORY_BATCH = 32  # files of a directory decoded together by an export worker
+
+# the HTTP tile server, see server.py
+SERVER_HOST = "127.0.0.1"  # localhost only unless another interface is asked for
+SERVER_PORT = 8000
+SERVER_TILE_SIZE = 254  # DeepZoom tiles, 256 pixels with an overlap of 1 on both sides
+SERVER_TILE_OVERLAP = 1
+SERVER_TILE_FORMAT = "jpeg"
+SERVER_MAX_OPEN_SLIDES = 16  # slides the server keeps open
+SERVER_REGION_CACHE_BYTES = 256 * 1024 * 1024  # decoded regions, shared by the open slides
+SERVER_TILE_CACHE_BYTES = 64 * 1024 * 1024  # encoded DeepZoom tiles
+SERVER_MAX_REGION_PIXELS = 4096 * 4096  # the largest region served by one request
+SERVER_MAX_AGE = 3600  # seconds clients may reuse a response before revalidating it
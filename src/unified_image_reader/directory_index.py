@@ -0,0 +1,228 @@
+"""
+    A header index of the image files of an ImageReaderDirectory, built without decoding any pixel data
+"""
+
+import concurrent.futures
+import logging
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from . import util
+
+SIDECAR_SUFFIX = ".regions.npz"
+
+logger = logging.getLogger("unified_image_reader")
+
+
+def is_index_file(path: str) -> bool:
+    """
+    is_index_file Whether a file is a persisted index (or one being written), which is never an image of the directory
+
+    :param path: Filepath to the file
+    :type path: str
+    :return: Whether the file is an index
+    :rtype: bool
+    """
+    name = os.path.basename(path)
+    return name.endswith(SIDECAR_SUFFIX) or (name.endswith(".tmp") and SIDECAR_SUFFIX + "." in name)
+
+
+def read_header(path: str) -> Optional[Tuple[int, int, int, str]]:
+    """
+    read_header Read the dimensions, bands and dtype of an image file from its header. VIPS opens images lazily, so
+    only the header is parsed; files VIPS can't open are decoded with OpenCV instead.
+
+    :param path: Filepath to the image file
+    :type path: str
+    :return: (width, height, bands, dtype name) as decode returns the file, or None when it isn't a readable image
+    :rtype: Optional[Tuple[int, int, int, str]]
+    """
+    import pyvips
+    try:
+        # revalidate, since libvips would otherwise hand back the image it cached for a file that has changed since
+        image = pyvips.Image.new_from_file(path, revalidate=True)
+    except pyvips.Error:
+        region = decode(path)
+        if region is None:
+            return None
+        return region.shape[1], region.shape[0], region.shape[2], region.dtype.name
+    from .adapters.vips import FORMAT_TO_DTYPE
+    # OpenCV converts CMYK to BGR
+    bands = 3 if image.interpretation == "cmyk" else image.bands
+    return image.width, image.height, bands, np.dtype(FORMAT_TO_DTYPE[image.format]).name
+
+
+def decode(path: str, bands: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    decode Decode an image file with OpenCV, keeping its bands and bit depth (color bands in BGR order)
+
+    :param path: Filepath to the image file
+    :type path: str
+    :param bands: The number of bands of the file from its header, defaults to None (as OpenCV decodes it)
+    :type bands: Optional[int], optional
+    :return: A (height, width, bands) array or None when the file isn't a readable image
+    :rtype: Optional[np.ndarray]
+    """
+    import cv2 as cv
+    if bands == 1:
+        flags = cv.IMREAD_GRAYSCALE | cv.IMREAD_ANYDEPTH
+    elif bands == 3:
+        flags = cv.IMREAD_COLOR | cv.IMREAD_ANYDEPTH
+    else:
+        flags = cv.IMREAD_UNCHANGED
+    region = cv.imread(path, flags)
+    if region is None:
+        return None
+    if region.ndim == 2:
+        return region[..., np.newaxis]
+    if bands == 2 and region.shape[2] == 4:
+        # OpenCV decodes gray images with alpha as BGRA
+        return np.stack([cv.cvtColor(region[..., :3], cv.COLOR_BGR2GRAY), region[..., 3]], axis=-1)
+    return region
+
+
+class DirectoryIndex():
+
+    """
+    DirectoryIndex The sorted filepaths of a collection of image files along with the (width, height), bands and dtype
+    of each file.
+    The size and modification time of every file are kept so that only new or changed files have their headers read
+    again.
+    """
+
+    def __init__(self, paths: Iterable[str], dims: np.ndarray, bands: np.ndarray, dtypes: np.ndarray,
+                 signatures: np.ndarray):
+        """
+        __init__ Initialize DirectoryIndex object
+
+        :param paths: The filepaths of the image files
+        :type paths: Iterable[str]
+        :param dims: An (N, 2) array of the (width, height) of each file
+        :type dims: np.ndarray
+        :param bands: An (N,) array of the number of bands of each file
+        :type bands: np.ndarray
+        :param dtypes: An (N,) array of the names of the dtypes of each file
+        :type dtypes: np.ndarray
+        :param signatures: An (N, 2) array of the size and modification time of each file
+        :type signatures: np.ndarray
+        """
+        self.paths = list(paths)
+        self.dims = dims
+        self.bands = bands
+        self.dtypes = dtypes
+        self.signatures = signatures
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of indexed files
+
+        :return: The number of files
+        :rtype: int
+        """
+        return len(self.paths)
+
+    def uniform_dims(self) -> Optional[Tuple[int, int]]:
+        """
+        uniform_dims Get the (width, height) shared by every file
+
+        :return: The shared dimensions or None when the files differ in size (or there are none)
+        :rtype: Optional[Tuple[int, int]]
+        """
+        if len(self) == 0 or (self.dims != self.dims[0]).any():
+            return None
+        return tuple(int(d) for d in self.dims[0])
+
+    @classmethod
+    def build(cls, paths: Iterable[str], previous: Optional["DirectoryIndex"] = None,
+              executor: Optional[concurrent.futures.Executor] = None) -> "DirectoryIndex":
+        """
+        build Read the headers of the image files, reusing the entries of a previous index for unchanged files.
+        Index files and files that aren't readable images are left out.
+
+        :param paths: The filepaths of the image files
+        :type paths: Iterable[str]
+        :param previous: An index built earlier, defaults to None
+        :type previous: Optional[DirectoryIndex], optional
+        :param executor: Executor the headers are read on, defaults to None (the calling thread)
+        :type executor: Optional[concurrent.futures.Executor], optional
+        :return: The DirectoryIndex
+        :rtype: DirectoryIndex
+        """
+        paths = sorted(p for p in paths if not is_index_file(p))
+        signatures = np.array([util.file_signature(p) for p in paths], dtype=np.int64).reshape(-1, 2)
+        known = {}
+        if previous is not None:
+            known = {p: i for i, p in enumerate(previous.paths)}
+        headers: List[Optional[tuple]] = [None] * len(paths)
+        stale = []
+        for i, path in enumerate(paths):
+            j = known.get(path)
+            if j is not None and (previous.signatures[j] == signatures[i]).all():
+                headers[i] = (*previous.dims[j], previous.bands[j], previous.dtypes[j])
+            else:
+                stale.append(i)
+        read = executor.map if executor is not None else map
+        for i, header in zip(stale, read(read_header, [paths[i] for i in stale])):
+            headers[i] = header
+        readable = [i for i, header in enumerate(headers) if header is not None]
+        if len(readable) < len(paths):
+            logger.warning("skipping %d files that aren't readable images, e.g. %s",
+                           len(paths) - len(readable), paths[headers.index(None)])
+        return cls([paths[i] for i in readable],
+                   np.array([headers[i][:2] for i in readable], dtype=np.int64).reshape(-1, 2),
+                   np.array([headers[i][2] for i in readable], dtype=np.int64),
+                   np.array([headers[i][3] for i in readable], dtype=str),
+                   signatures[readable])
+
+    def save(self, path: str) -> bool:
+        """
+        save Persist the index atomically (see util.write_sidecar)
+
+        :param path: Where to write the index
+        :type path: str
+        :return: Whether the index was written
+        :rtype: bool
+        """
+        return util.write_sidecar(path, lambda f: np.savez(
+            f, paths=np.array(self.paths, dtype=str), dims=self.dims, bands=self.bands, dtypes=self.dtypes,
+            signatures=self.signatures))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["DirectoryIndex"]:
+        """
+        load Read a persisted index
+
+        :param path: Where the index was written
+        :type path: str
+        :return: The DirectoryIndex or None when it is missing or unreadable
+        :rtype: Optional[DirectoryIndex]
+        """
+        try:
+            with np.load(path) as data:
+                return cls(data["paths"].tolist(), data["dims"], data["bands"], data["dtypes"], data["signatures"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def for_files(cls, paths: Iterable[str], index_path: Optional[str] = None,
+                  executor: Optional[concurrent.futures.Executor] = None) -> "DirectoryIndex":
+        """
+        for_files Bring the index persisted at index_path up to date with the files, persisting it again if anything changed
+
+        :param paths: The filepaths of the image files
+        :type paths: Iterable[str]
+        :param index_path: Where the index is persisted, defaults to None (not persisted)
+        :type index_path: Optional[str], optional
+        :param executor: Executor the headers are read on, defaults to None (the calling thread)
+        :type executor: Optional[concurrent.futures.Executor], optional
+        :return: The DirectoryIndex
+        :rtype: DirectoryIndex
+        """
+        previous = cls.load(index_path) if index_path is not None else None
+        index = cls.build(paths, previous, executor)
+        if index_path is not None and (previous is None or previous.paths != index.paths or
+                                       not np.array_equal(previous.signatures, index.signatures)):
+            index.save(index_path)
+        return index
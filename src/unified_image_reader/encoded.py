@@ -0,0 +1,87 @@
+"""
+    Compressed tiles passed through as stored, and the decoding of them on the receiving side
+
+    A storage node ships EncodedTiles (from ImageReader.get_encoded_tile) instead of decoded regions, so tiles are
+    neither decoded nor re-encoded before they reach the transport; decode_tile turns one back into pixels.
+"""
+
+import collections
+import zlib
+
+import numpy as np
+
+# a stored tile and what decoding it needs:
+#   data: the compressed bytes, a self-contained stream for jpeg (tables merged in), webp and jpeg2000
+#   codec: the compression name (see tiff.COMPRESSION_NAMES)
+#   width, height: the pixels of the tile inside the image, less than the stored tile along the right and bottom edges
+#   tile_width, tile_height: the dimensions the tile is stored with
+#   bands, dtype: the samples per pixel and their numpy dtype name
+#   predictor: the TIFF predictor undone after decompressing (1 none, 2 horizontal differencing)
+#   level, tile_index: where the tile comes from
+EncodedTile = collections.namedtuple("EncodedTile", [
+    "data", "codec", "width", "height", "tile_width", "tile_height", "bands", "dtype", "predictor", "level", "tile_index"])
+
+# codecs whose streams an image library decodes on its own
+IMAGE_CODECS = ("jpeg", "webp", "jpeg2000")
+# codecs of raw samples, decompressed (if at all) by zlib
+SAMPLE_CODECS = {
+    "none": lambda data: data,
+    "deflate": zlib.decompress
+}
+DECODABLE_CODECS = (*IMAGE_CODECS, *SAMPLE_CODECS)
+
+# an Adobe APP14 segment with transform 0, telling JPEG decoders that the three components are RGB rather than YCbCr
+ADOBE_RGB_SEGMENT = b"\xff\xee\x00\x0eAdobe\x00\x64\x00\x00\x00\x00\x00"
+
+
+def jpeg_stream(data: bytes, tables: bytes = None, rgb: bool = False) -> bytes:
+    """
+    jpeg_stream Make a TIFF JPEG tile decodable on its own by merging in the file's shared JPEGTables and, for tiles
+    of RGB (rather than YCbCr) pixels, marking their color space
+
+    :param data: The tile's bytes, a JPEG stream that may lack its quantization and Huffman tables
+    :type data: bytes
+    :param tables: The JPEGTables of the tile's directory, a JPEG stream of nothing but tables, defaults to None
+    :type tables: bytes, optional
+    :param rgb: Whether the tile's components are RGB, defaults to False
+    :type rgb: bool, optional
+    :return: A standalone JPEG stream
+    :rtype: bytes
+    """
+    # both streams start with SOI (FFD8) and end with EOI (FFD9): keep the tile's SOI, then the tables, then the tile
+    segments = [data[:2]]
+    if rgb:
+        segments.append(ADOBE_RGB_SEGMENT)
+    if tables:
+        segments.append(tables[2:-2])
+    segments.append(data[2:])
+    return b"".join(segments)
+
+
+def decode_tile(tile: EncodedTile) -> np.ndarray:
+    """
+    decode_tile Decode an EncodedTile into its pixels, cropped to the part of the tile inside the image
+
+    :param tile: The encoded tile
+    :type tile: EncodedTile
+    :raises ValueError: The tile's codec isn't decodable (see DECODABLE_CODECS)
+    :return: A (height, width, bands) numpy array of the tile's pixels
+    :rtype: np.ndarray
+    """
+    if tile.codec in IMAGE_CODECS:
+        import pyvips  # only receivers of compressed tiles need VIPS
+        from .adapters.vips import FORMAT_TO_DTYPE
+        image = pyvips.Image.new_from_buffer(tile.data, "")
+        pixels = np.ndarray(buffer=image.write_to_memory(), dtype=FORMAT_TO_DTYPE[image.format],
+                            shape=[image.height, image.width, image.bands])
+    elif tile.codec in SAMPLE_CODECS:
+        dtype = np.dtype(tile.dtype)
+        pixels = np.frombuffer(SAMPLE_CODECS[tile.codec](tile.data), dtype=dtype,
+                               count=tile.tile_width * tile.tile_height * tile.bands)
+        pixels = pixels.reshape(tile.tile_height, tile.tile_width, tile.bands)
+        if tile.predictor == 2:
+            # horizontal differencing stores each sample as the difference from its left neighbour
+            pixels = np.cumsum(pixels, axis=1, dtype=dtype)
+    else:
+        raise ValueError(f"tiles compressed with {tile.codec} can't be decoded, only {DECODABLE_CODECS}")
+    return pixels[:tile.height, :tile.width]
@@ -0,0 +1,466 @@
+"""
+    uir-export SLIDE [SLIDE ...] --output DIRECTORY [options]
+
+    Exports every region of many slides (or directories of image files, read as ImageReaderDirectory) as PNG or JPEG
+    files or as npz or tar shards. The regions of each slide are cut into shards of consecutive regions that a process
+    pool exports, every shard being written atomically. A manifest in the output directory records the finished shards,
+    so a rerun after an interruption only exports the unfinished ones.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import config
+from . import util
+from .image_reader import ImageReader, ImageReaderDirectory
+from .transform import OutputSpec
+
+FORMATS = ("png", "jpeg", "npz", "tar")
+# the codecs tar shards can store regions with
+TAR_CODECS = ("png", "jpeg")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ExportException(Exception):
+    pass
+
+
+def slide_names(paths: Iterable[str]) -> List[str]:
+    """
+    slide_names Name the output directory of every slide after its file, numbering the slides whose names collide
+
+    :param paths: Filepaths to the slides
+    :type paths: Iterable[str]
+    :return: The name of every slide
+    :rtype: List[str]
+    """
+    paths = list(paths)
+    stems = [os.path.splitext(os.path.basename(os.path.normpath(p)))[0] for p in paths]
+    return [stem if stems.count(stem) == 1 else f"{stem}-{i}" for i, stem in enumerate(stems)]
+
+
+@functools.lru_cache(maxsize=config.EXPORT_OPEN_READERS)
+def _reader(path: str) -> ImageReader:
+    """
+    _reader Open a slide once per worker process, as consecutive shards mostly come from the same slides
+
+    :param path: Filepath to the slide, or to a directory of image files
+    :type path: str
+    :return: The reader
+    :rtype: ImageReader
+    """
+    if os.path.isdir(path):
+        # OpenCV decodes BGR, the other readers RGB
+        return ImageReaderDirectory(path, output_spec=OutputSpec(channel_order="RGB"))
+    return ImageReader(path)
+
+
+def _count(path: str, region_dims: Tuple[int, int], level: int) -> int:
+    """
+    _count Count the regions of a slide
+
+    :return: The number of regions
+    :rtype: int
+    """
+    reader = _reader(path)
+    if isinstance(reader, ImageReaderDirectory):
+        return reader.number_of_regions()
+    return reader.number_of_regions(region_dims, level)
+
+
+def _regions(path: str, region_dims: Tuple[int, int], level: int, start: int, stop: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    _regions Read the regions start to stop of a slide, a band of them at a time
+
+    :return: An iterator of (region index, region) pairs
+    :rtype: Iterator[Tuple[int, np.ndarray]]
+    """
+    reader = _reader(path)
+    if isinstance(reader, ImageReaderDirectory):
+        return _directory_regions(reader, start, stop)
+    return reader.iter_bands(region_dims, level, start=start, stop=stop)
+
+
+def _directory_regions(reader: ImageReaderDirectory, start: int, stop: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    _directory_regions Read the files start to stop of a directory, decoding a batch of them at a time on the reader's
+    thread pool
+
+    :return: An iterator of (region index, region) pairs
+    :rtype: Iterator[Tuple[int, np.ndarray]]
+    """
+    for batch_start in range(start, stop, config.EXPORT_DIRECTORY_BATCH):
+        indices = range(batch_start, min(batch_start + config.EXPORT_DIRECTORY_BATCH, stop))
+        yield from zip(indices, reader.get_regions(indices, validate=False))
+
+
+def slide_signature(path: str) -> List:
+    """
+    slide_signature Identify a version of a slide so that a resumed export redoes the slides that changed since. A
+    directory's modification time doesn't change when one of its files is overwritten, so a directory is identified by
+    the number of its files and a digest of their paths and signatures, from its header index.
+
+    :param path: Filepath to the slide, or to a directory of image files
+    :type path: str
+    :return: The signature, as stored in the manifest
+    :rtype: List
+    """
+    if not os.path.isdir(path):
+        return list(util.file_signature(path))
+    # builds (or brings up to date) the index persisted next to the directory, which the workers then load
+    reader = ImageReaderDirectory(path)
+    reader.close()
+    digest = hashlib.sha1()
+    for file_path, (size, mtime) in zip(reader.index.paths, reader.index.signatures.tolist()):
+        digest.update(f"{os.path.relpath(file_path, path)}\0{size}\0{mtime}\n".encode())
+    return [len(reader.index), digest.hexdigest()]
+
+
+def encode(region: np.ndarray, codec: str, quality: int = 90) -> bytes:
+    """
+    encode Compress a region into an image file's bytes with VIPS
+
+    :param region: A (height, width, bands) array
+    :type region: np.ndarray
+    :param codec: "png" or "jpeg"
+    :type codec: str
+    :param quality: The JPEG quality, defaults to 90
+    :type quality: int, optional
+    :return: The bytes of the image file
+    :rtype: bytes
+    """
+    import pyvips  # only the export workers encode
+    image = pyvips.Image.new_from_array(np.ascontiguousarray(region))
+    return image.write_to_buffer(".png" if codec == "png" else f".jpg[Q={quality}]")
+
+
+def shard_path(directory: str, export_format: str, shard_index: int) -> str:
+    """
+    shard_path Get the path of an npz or tar shard
+
+    :param directory: The output directory of the slide
+    :type directory: str
+    :param export_format: "npz" or "tar"
+    :type export_format: str
+    :param shard_index: The index of the shard within the slide
+    :type shard_index: int
+    :return: The path
+    :rtype: str
+    """
+    return os.path.join(directory, f"shard-{shard_index:06d}.{export_format}")
+
+
+def export_shard(path: str, directory: str, region_dims: Tuple[int, int], level: int, export_format: str,
+                 shard_index: int, start: int, stop: int, quality: int = 90, tar_codec: str = "png") -> int:
+    """
+    export_shard Export the regions start to stop of a slide: as one file per region for png and jpeg, or as one shard
+    file holding the regions (and their indices) for npz and tar. Runs in an export worker.
+
+    :param path: Filepath to the slide, or to a directory of image files
+    :type path: str
+    :param directory: The output directory of the slide
+    :type directory: str
+    :param region_dims: A set of (width, height) coordinates representing the region dimensions
+    :type region_dims: Tuple[int, int]
+    :param level: The pyramid level to read from
+    :type level: int
+    :param export_format: One of FORMATS
+    :type export_format: str
+    :param shard_index: The index of the shard within the slide
+    :type shard_index: int
+    :param start: The first region index
+    :type start: int
+    :param stop: The region index to stop before
+    :type stop: int
+    :param quality: The JPEG quality, defaults to 90
+    :type quality: int, optional
+    :param tar_codec: The codec of the regions in tar shards, defaults to "png"
+    :type tar_codec: str, optional
+    :raises ExportException: The regions of an npz shard differ in shape
+    :return: The number of regions exported
+    :rtype: int
+    """
+    os.makedirs(directory, exist_ok=True)
+    regions = _regions(path, region_dims, level, start, stop)
+    if export_format in ("png", "jpeg"):
+        extension = "png" if export_format == "png" else "jpg"
+        for region_index, region in regions:
+            data = encode(region, export_format, quality)
+            util.write_atomically(os.path.join(directory, f"{region_index:08d}.{extension}"),
+                                  lambda f: f.write(data))
+    elif export_format == "npz":
+        indices, arrays = [], []
+        for region_index, region in regions:
+            indices.append(region_index)
+            arrays.append(np.array(region))  # bands are reused by the next read
+        if len({a.shape for a in arrays}) > 1:
+            raise ExportException(
+                f"the regions of shard {shard_index} of {path} differ in shape, export them as png, jpeg or tar")
+        util.write_atomically(shard_path(directory, export_format, shard_index),
+                              lambda f: np.savez(f, indices=np.array(indices, dtype=np.int64), regions=np.stack(arrays)))
+    elif export_format == "tar":
+        extension = "png" if tar_codec == "png" else "jpg"
+
+        def write_tar(f):
+            with tarfile.open(fileobj=f, mode="w") as tar:
+                for region_index, region in regions:
+                    data = encode(region, tar_codec, quality)
+                    member = tarfile.TarInfo(f"{region_index:08d}.{extension}")
+                    member.size = len(data)
+                    tar.addfile(member, io.BytesIO(data))
+        util.write_atomically(shard_path(directory, export_format, shard_index), write_tar)
+    else:
+        raise ExportException(f"{export_format=} should be one of {FORMATS}")
+    return stop - start
+
+
+class ExportManifest():
+
+    """
+    ExportManifest The progress of an export: its parameters and, for every slide, its path, signature, number of
+    regions and finished shards. It is only written by the process driving the export.
+    """
+
+    def __init__(self, path: str, parameters: Dict, slides: Optional[Dict] = None):
+        """
+        __init__ Initialize ExportManifest object
+
+        :param path: Where the manifest is persisted
+        :type path: str
+        :param parameters: The parameters every shard is exported with
+        :type parameters: Dict
+        :param slides: The progress of every slide by name, defaults to None (no progress)
+        :type slides: Optional[Dict], optional
+        """
+        self.path = path
+        self.parameters = parameters
+        self.slides = slides or {}
+
+    @classmethod
+    def load(cls, path: str, parameters: Dict) -> "ExportManifest":
+        """
+        load Read the manifest of an earlier run to resume it, or start a new one
+
+        :param path: Where the manifest is persisted
+        :type path: str
+        :param parameters: The parameters of this run
+        :type parameters: Dict
+        :raises ExportException: The earlier run had other parameters
+        :return: The manifest
+        :rtype: ExportManifest
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path, parameters)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ExportException(
+                f"unsupported manifest version {data.get('version')} in {path}")
+        if data["parameters"] != parameters:
+            raise ExportException(
+                f"{path} was written with {data['parameters']} rather than {parameters}, export into another directory")
+        return cls(path, parameters, data["slides"])
+
+    def slide(self, name: str, path: str, signature: List) -> Optional[Dict]:
+        """
+        slide Get the progress of a slide, forgetting it when the slide changed since
+
+        :param name: The slide's name
+        :type name: str
+        :param path: Filepath to the slide, or to a directory of image files
+        :type path: str
+        :param signature: The slide's current signature, see slide_signature
+        :type signature: List
+        :return: The progress ("path", "signature", "regions" and "done" shards) or None when there is none
+        :rtype: Optional[Dict]
+        """
+        entry = self.slides.get(name)
+        if entry is not None and (entry["path"] != os.path.abspath(path) or entry["signature"] != signature):
+            del self.slides[name]
+            entry = None
+        return entry
+
+    def save(self) -> None:
+        """
+        save Persist the manifest atomically
+        """
+        data = json.dumps({"version": MANIFEST_VERSION, "parameters": self.parameters, "slides": self.slides})
+        util.write_atomically(self.path, lambda f: f.write(data.encode()))
+
+
+def export(slides: Iterable[str], output_directory: str, region_dims=config.DEFAULT_REGION_DIMS, level: int = 0,
+           export_format: str = "png", shard_size: Optional[int] = None, workers: Optional[int] = None,
+           quality: int = 90, tar_codec: str = "png", progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    export Export every region of the slides into output_directory, one subdirectory per slide, resuming the run
+    recorded in its manifest
+
+    :param slides: Filepaths to the slides, or to directories of image files
+    :type slides: Iterable[str]
+    :param output_directory: Where to export to
+    :type output_directory: str
+    :param region_dims: A set of (width, height) coordinates representing the region dimensions (ignored for directories), defaults to DEFAULT_REGION_DIMS
+    :type region_dims: Iterable, optional
+    :param level: The pyramid level to read from, defaults to 0
+    :type level: int, optional
+    :param export_format: One of FORMATS, defaults to "png"
+    :type export_format: str, optional
+    :param shard_size: The number of regions per shard, defaults to None (EXPORT_SHARD_SIZE)
+    :type shard_size: Optional[int], optional
+    :param workers: The number of worker processes, defaults to None (os.cpu_count())
+    :type workers: Optional[int], optional
+    :param quality: The JPEG quality, defaults to 90
+    :type quality: int, optional
+    :param tar_codec: The codec of the regions in tar shards, one of TAR_CODECS, defaults to "png"
+    :type tar_codec: str, optional
+    :param progress: Called with a summary of every shard as it finishes, defaults to None
+    :type progress: Optional[Callable[[Dict], None]], optional
+    :raises ExportException: The format isn't supported or output_directory holds an export with other parameters
+    :return: The numbers of slides, shards and regions exported and skipped (finished earlier) and the failures
+    :rtype: Dict
+    """
+    if export_format not in FORMATS:
+        raise ExportException(f"{export_format=} should be one of {FORMATS}")
+    if tar_codec not in TAR_CODECS:
+        raise ExportException(f"{tar_codec=} should be one of {TAR_CODECS}")
+    region_dims = tuple(int(d) for d in region_dims)
+    shard_size = shard_size or config.EXPORT_SHARD_SIZE
+    workers = workers or os.cpu_count() or 1
+    slides = list(slides)
+    names = slide_names(slides)
+    os.makedirs(output_directory, exist_ok=True)
+    parameters = {"region_dims": list(region_dims), "level": level, "format": export_format,
+                  "shard_size": shard_size, "quality": quality, "tar_codec": tar_codec}
+    manifest = ExportManifest.load(os.path.join(output_directory, MANIFEST_NAME), parameters)
+    summary = {"slides": len(slides), "shards": 0, "regions": 0,
+               "skipped_shards": 0, "skipped_regions": 0, "failures": []}
+    # "fork" can deadlock on libvips' threads inherited from the parent
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # count the regions of the slides the manifest doesn't know yet
+        signatures = {name: slide_signature(path) for name, path in zip(names, slides)}
+        uncounted = [(name, path) for name, path in zip(names, slides)
+                     if manifest.slide(name, path, signatures[name]) is None]
+        counts = {name: executor.submit(_count, path, region_dims, level) for name, path in uncounted}
+        for name, path in uncounted:
+            try:
+                manifest.slides[name] = {"path": os.path.abspath(path), "signature": signatures[name],
+                                         "regions": counts[name].result(), "done": []}
+            except Exception as e:
+                summary["failures"].append({"slide": name, "shard": None, "error": repr(e)})
+        manifest.save()
+
+        def shards():
+            # slide by slide, so that workers mostly read slides they have open
+            for name, path in zip(names, slides):
+                entry = manifest.slides.get(name)
+                if entry is None:
+                    continue
+                done = set(entry["done"])
+                for shard_index, start in enumerate(range(0, entry["regions"], shard_size)):
+                    stop = min(start + shard_size, entry["regions"])
+                    if shard_index in done:
+                        summary["skipped_shards"] += 1
+                        summary["skipped_regions"] += stop - start
+                        continue
+                    yield name, path, shard_index, start, stop
+
+        pending = {}
+        saved = time.monotonic()
+        for shard in shards():
+            pending[executor.submit(export_shard, shard[1], os.path.join(output_directory, shard[0]), region_dims,
+                                    level, export_format, *shard[2:], quality, tar_codec)] = shard
+            # keep a few shards per worker queued rather than submitting every shard up front
+            while len(pending) >= 2 * workers:
+                finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    _record(future, pending.pop(future), manifest, summary, progress)
+                if time.monotonic() - saved >= config.EXPORT_MANIFEST_INTERVAL:
+                    manifest.save()
+                    saved = time.monotonic()
+        for future in concurrent.futures.as_completed(list(pending)):
+            _record(future, pending.pop(future), manifest, summary, progress)
+    manifest.save()
+    return summary
+
+
+def _record(future: concurrent.futures.Future, shard: Tuple, manifest: ExportManifest, summary: Dict,
+            progress: Optional[Callable[[Dict], None]]) -> None:
+    """
+    _record Record a finished shard in the manifest (unless it failed) and the summary
+
+    :param future: The shard's future
+    :type future: concurrent.futures.Future
+    :param shard: The (name, path, shard index, start, stop) of the shard
+    :type shard: Tuple
+    """
+    name, _, shard_index, start, stop = shard
+    result = {"slide": name, "shard": shard_index, "regions": stop - start}
+    try:
+        future.result()
+    except Exception as e:
+        result["error"] = repr(e)
+        summary["failures"].append({"slide": name, "shard": shard_index, "error": repr(e)})
+    else:
+        manifest.slides[name]["done"].append(shard_index)
+        summary["shards"] += 1
+        summary["regions"] += stop - start
+    if progress is not None:
+        progress(result)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="uir-export", description="Export every region of many slides as image files or shards, resumably")
+    parser.add_argument("slides", nargs="*", help="slides, or directories of image files")
+    parser.add_argument("--list", dest="slide_list",
+                        help="a file listing more slides, one per line")
+    parser.add_argument("--output", "-o", required=True, help="the output directory")
+    parser.add_argument("--region-dims", type=lambda value: tuple(int(d) for d in value.split(",")),
+                        default=config.DEFAULT_REGION_DIMS, help="width,height")
+    parser.add_argument("--level", type=int, default=0)
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--shard-size", type=int, default=config.EXPORT_SHARD_SIZE,
+                        help="regions per shard")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality")
+    parser.add_argument("--tar-codec", choices=TAR_CODECS, default="png")
+    parser.add_argument("--quiet", "-q", action="store_true")
+    args = parser.parse_args(argv)
+    slides = list(args.slides)
+    if args.slide_list:
+        with open(args.slide_list) as f:
+            slides += [line.strip() for line in f if line.strip()]
+    if not slides:
+        parser.error("no slides were given")
+
+    def progress(result):
+        status = result.get("error", "done")
+        print(f"{result['slide']} shard {result['shard']} ({result['regions']} regions): {status}", file=sys.stderr)
+
+    try:
+        summary = export(slides, args.output, args.region_dims, args.level, args.format, args.shard_size,
+                         args.workers, args.quality, args.tar_codec, None if args.quiet else progress)
+    except ExportException as e:
+        print(f"uir-export: {e}", file=sys.stderr)
+        return 2
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+    A foreground (tissue) index of the regions of an image, built from a cheap low resolution pass
+"""
+
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from . import config
+from . import util
+
+SIDECAR_SUFFIX = ".foreground.npz"
+
+
+def default_mask_function(thumbnail: np.ndarray) -> np.ndarray:
+    """
+    default_mask_function Marks pixels that are either saturated or dark as foreground, leaving bright unsaturated glass as background
+
+    :param thumbnail: A (height, width, bands) or (height, width) image
+    :type thumbnail: np.ndarray
+    :return: A (height, width) boolean foreground mask
+    :rtype: np.ndarray
+    """
+    if thumbnail.ndim == 2:
+        thumbnail = thumbnail[..., np.newaxis]
+    color = thumbnail[..., :3].astype(np.int16)
+    saturation = color.max(axis=-1) - color.min(axis=-1)
+    brightness = color.mean(axis=-1)
+    return (saturation > config.FOREGROUND_SATURATION_THRESHOLD) | \
+        (brightness < config.FOREGROUND_BRIGHTNESS_THRESHOLD)
+
+
+class ForegroundIndex():
+
+    """
+    ForegroundIndex A boolean (rows, columns) grid of an image's regions, aligned with ImageReader.region_index_to_coordinates,
+    marking the regions that contain enough foreground. The per-region foreground fraction is kept so that the threshold
+    can be changed without another pass over the image.
+    """
+
+    def __init__(self, fractions: np.ndarray, region_dims: Iterable, min_fraction: float = config.FOREGROUND_MIN_FRACTION):
+        """
+        __init__ Initialize ForegroundIndex object
+
+        :param fractions: A (rows, columns) array of the fraction of each region that is foreground
+        :type fractions: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param min_fraction: The foreground fraction from which a region counts as foreground, defaults to FOREGROUND_MIN_FRACTION
+        :type min_fraction: float, optional
+        """
+        self.fractions = fractions
+        self.region_dims = tuple(region_dims)
+        self.min_fraction = min_fraction
+
+    @property
+    def grid(self) -> np.ndarray:
+        """
+        grid Get the (rows, columns) boolean grid of foreground regions
+
+        :return: The foreground grid
+        :rtype: np.ndarray
+        """
+        return self.fractions >= self.min_fraction
+
+    def indices(self) -> np.ndarray:
+        """
+        indices Get the region indices of the foreground regions in ascending order
+
+        :return: The foreground region indices
+        :rtype: np.ndarray
+        """
+        return np.flatnonzero(self.grid)
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of foreground regions
+
+        :return: The number of foreground regions
+        :rtype: int
+        """
+        return int(np.count_nonzero(self.grid))
+
+    def __contains__(self, region_index: int) -> bool:
+        """
+        __contains__ Check whether a region is foreground
+
+        :param region_index: The nth region of the image (where n >= 0) based on region dimensions
+        :type region_index: int
+        :return: Whether the region is foreground
+        :rtype: bool
+        """
+        return 0 <= region_index < self.fractions.size and bool(self.grid.flat[region_index])
+
+    @classmethod
+    def build(cls, reader, region_dims: Iterable, mask_function: Callable[[np.ndarray], np.ndarray] = default_mask_function,
+              min_fraction: float = config.FOREGROUND_MIN_FRACTION,
+              pixels_per_region: int = config.FOREGROUND_PIXELS_PER_REGION) -> "ForegroundIndex":
+        """
+        build Compute a ForegroundIndex from a thumbnail of the image
+
+        :param reader: The ImageReader of the image
+        :type reader: ImageReader
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param mask_function: Maps a thumbnail to a boolean foreground mask, defaults to default_mask_function
+        :type mask_function: Callable[[np.ndarray], np.ndarray], optional
+        :param min_fraction: The foreground fraction from which a region counts as foreground, defaults to FOREGROUND_MIN_FRACTION
+        :type min_fraction: float, optional
+        :param pixels_per_region: Thumbnail pixels along each side of a region, defaults to FOREGROUND_PIXELS_PER_REGION
+        :type pixels_per_region: int, optional
+        :return: The ForegroundIndex
+        :rtype: ForegroundIndex
+        """
+        width, height = reader.dims
+        region_width, region_height = region_dims
+        # the reader's own grid, so that foreground regions are numbered as the reader numbers them
+        tile_grid = reader.grid(region_dims)
+        columns, rows = tile_grid.columns, tile_grid.rows
+        stride_x, stride_y = tile_grid.stride
+        thumbnail_dims = (min(width, max(1, -(-width * pixels_per_region // region_width))),
+                          min(height, max(1, -(-height * pixels_per_region // region_height))))
+        mask = np.asarray(mask_function(
+            reader.adapter.get_thumbnail(thumbnail_dims)), dtype=bool)
+        # box sums over every region's footprint in the thumbnail using a summed-area table
+        scale_x, scale_y = mask.shape[1] / width, mask.shape[0] / height
+
+        def footprints(starts, size, scale, limit):
+            # every region covers at least one thumbnail pixel
+            first = np.minimum(np.round(starts * scale).astype(np.int64), limit - 1)
+            last = np.minimum(np.maximum(np.round((starts + size) * scale).astype(np.int64), first + 1), limit)
+            return first, last
+
+        x0, x1 = footprints(np.arange(columns) * stride_x, region_width, scale_x, mask.shape[1])
+        y0, y1 = footprints(np.arange(rows) * stride_y, region_height, scale_y, mask.shape[0])
+        table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+        table[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+        sums = table[y1[:, None], x1[None, :]] - table[y0[:, None], x1[None, :]] - \
+            table[y1[:, None], x0[None, :]] + table[y0[:, None], x0[None, :]]
+        areas = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+        return cls(sums / areas, region_dims, min_fraction)
+
+    def save(self, path: str, signature: Optional[dict] = None) -> bool:
+        """
+        save Persist the index atomically (see util.write_sidecar)
+
+        :param path: Where to write the index
+        :type path: str
+        :param signature: Values identifying the image and parameters the index was built from, defaults to None
+        :type signature: Optional[dict], optional
+        :return: Whether the index was written
+        :rtype: bool
+        """
+        signature = signature or {}
+        return util.write_sidecar(path, lambda f: np.savez(
+            f, fractions=self.fractions, region_dims=np.array(self.region_dims),
+            **{f"signature_{k}": np.array(v) for k, v in signature.items()}))
+
+    @classmethod
+    def load(cls, path: str, min_fraction: float = config.FOREGROUND_MIN_FRACTION,
+             signature: Optional[dict] = None) -> Optional["ForegroundIndex"]:
+        """
+        load Read a persisted index if it exists and matches the signature
+
+        :param path: Where the index was written
+        :type path: str
+        :param min_fraction: The foreground fraction from which a region counts as foreground, defaults to FOREGROUND_MIN_FRACTION
+        :type min_fraction: float, optional
+        :param signature: Values that must match the ones the index was saved with, defaults to None
+        :type signature: Optional[dict], optional
+        :return: The ForegroundIndex or None when it is missing, unreadable or stale
+        :rtype: Optional[ForegroundIndex]
+        """
+        try:
+            with np.load(path) as data:
+                for k, v in (signature or {}).items():
+                    if f"signature_{k}" not in data or data[f"signature_{k}"].tolist() != np.array(v).tolist():
+                        return None
+                return cls(data["fractions"], tuple(data["region_dims"].tolist()), min_fraction)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def for_reader(cls, reader, region_dims: Iterable = config.DEFAULT_REGION_DIMS,
+                   mask_function: Callable[[np.ndarray], np.ndarray] = default_mask_function,
+                   min_fraction: float = config.FOREGROUND_MIN_FRACTION,
+                   pixels_per_region: int = config.FOREGROUND_PIXELS_PER_REGION,
+                   persist: bool = True, mask_key: Optional[str] = None) -> "ForegroundIndex":
+        """
+        for_reader Load the index persisted next to the image or build (and persist) it. The index of a mask function
+        other than default_mask_function is only persisted when it is given a mask_key.
+
+        :param reader: The ImageReader of the image
+        :type reader: ImageReader
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param mask_function: Maps a thumbnail to a boolean foreground mask, defaults to default_mask_function
+        :type mask_function: Callable[[np.ndarray], np.ndarray], optional
+        :param min_fraction: The foreground fraction from which a region counts as foreground, defaults to FOREGROUND_MIN_FRACTION
+        :type min_fraction: float, optional
+        :param pixels_per_region: Thumbnail pixels along each side of a region, defaults to FOREGROUND_PIXELS_PER_REGION
+        :type pixels_per_region: int, optional
+        :param persist: Whether to reuse and write the index next to the image, defaults to True
+        :type persist: bool, optional
+        :param mask_key: Identifies mask_function, which its name can't (lambdas share one and a function's body may
+            change), defaults to None
+        :type mask_key: Optional[str], optional
+        :return: The ForegroundIndex
+        :rtype: ForegroundIndex
+        """
+        if mask_key is None and mask_function is default_mask_function:
+            # the default marks foreground by thresholds from the config, which may change between runs
+            mask_key = f"default:{config.FOREGROUND_SATURATION_THRESHOLD}:{config.FOREGROUND_BRIGHTNESS_THRESHOLD}"
+        persist = persist and mask_key is not None
+        path = util.sidecar_path(reader.filepath, SIDECAR_SUFFIX)
+        signature = {
+            "file": util.file_signature(reader.filepath),
+            "region_dims": tuple(region_dims),
+            "mask_function": mask_key or "",
+            "pixels_per_region": pixels_per_region
+        }
+        if persist:
+            index = cls.load(path, min_fraction, signature)
+            if index is not None:
+                return index
+        index = cls.build(reader, region_dims, mask_function,
+                          min_fraction, pixels_per_region)
+        if persist:
+            index.save(path, signature)
+        return index
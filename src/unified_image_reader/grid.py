@@ -0,0 +1,138 @@
+"""
+    The grid of same-sized regions tiling an image, computed once per region dimensions
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class TileGrid():
+
+    """
+    TileGrid Row-major grid of regions of region_dims covering an image of image_dims from its top-left corner, one
+    region every stride pixels. Regions that would extend past the right or bottom edge aren't part of the grid.
+    """
+
+    def __init__(self, image_dims: Iterable, region_dims: Iterable, stride: Optional[Iterable] = None):
+        """
+        __init__ Initialize TileGrid object
+
+        :param image_dims: A set of (width, height) coordinates representing the image dimensions
+        :type image_dims: Iterable
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param stride: The (width, height) step between neighbouring regions, smaller than region_dims for overlapping
+            regions, defaults to None (region_dims, regions that tile the image)
+        :type stride: Optional[Iterable], optional
+        :raises ValueError: A region dimension or stride is not positive
+        """
+        self.image_width, self.image_height = (int(d) for d in image_dims)
+        self.region_width, self.region_height = (int(d) for d in region_dims)
+        self.stride_x, self.stride_y = (int(d) for d in (stride or region_dims))
+        if not (0 < self.region_width and 0 < self.region_height):
+            raise ValueError(f"{region_dims=} should be positive")
+        if not (0 < self.stride_x and 0 < self.stride_y):
+            raise ValueError(f"{stride=} should be positive")
+        self.columns = max(0, (self.image_width - self.region_width) // self.stride_x + 1)
+        self.rows = max(0, (self.image_height - self.region_height) // self.stride_y + 1)
+        self._coordinates = None
+
+    @property
+    def region_dims(self) -> Tuple[int, int]:
+        """
+        region_dims Get the dimensions of a region
+
+        :return: Width and height in pixels
+        :rtype: Tuple[int, int]
+        """
+        return self.region_width, self.region_height
+
+    @property
+    def stride(self) -> Tuple[int, int]:
+        """
+        stride Get the step between neighbouring regions
+
+        :return: Width and height in pixels
+        :rtype: Tuple[int, int]
+        """
+        return self.stride_x, self.stride_y
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of regions in the grid
+
+        :return: The number of regions
+        :rtype: int
+        """
+        return self.columns * self.rows
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        """
+        coordinates Get the top-left pixel of every region, computed on first use
+
+        :return: A read-only (N, 2) array of (width, height) coordinates indexed by region index
+        :rtype: np.ndarray
+        """
+        if self._coordinates is None:
+            tops, lefts = np.divmod(np.arange(len(self), dtype=np.int64), max(self.columns, 1))
+            coordinates = np.stack(
+                [lefts * self.stride_x, tops * self.stride_y], axis=-1)
+            coordinates.flags.writeable = False
+            self._coordinates = coordinates
+        return self._coordinates
+
+    def index_to_coordinates(self, region_index: int) -> Tuple[int, int]:
+        """
+        index_to_coordinates Converts the index of a region to the coordinates of its top-left pixel without bounds checks
+
+        :param region_index: The nth region of the image (where n >= 0)
+        :type region_index: int
+        :return: A set of (width, height) coordinates representing the top-left pixel of the region
+        :rtype: Tuple[int, int]
+        """
+        top, left = divmod(region_index, max(self.columns, 1))
+        return (left * self.stride_x, top * self.stride_y)
+
+    def indices_to_coordinates(self, region_indices: Iterable[int]) -> np.ndarray:
+        """
+        indices_to_coordinates Vectorized index_to_coordinates
+
+        :param region_indices: The nth regions of the image (where n >= 0)
+        :type region_indices: Iterable[int]
+        :return: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :rtype: np.ndarray
+        """
+        region_indices = np.asarray(region_indices, dtype=np.int64)
+        tops, lefts = np.divmod(region_indices, max(self.columns, 1))
+        return np.stack([lefts * self.stride_x, tops * self.stride_y], axis=-1)
+
+    def coordinates_to_indices(self, region_coordinates: np.ndarray) -> np.ndarray:
+        """
+        coordinates_to_indices Converts region coordinates to region indices, marking coordinates that aren't
+        the top-left pixel of a region of the grid with -1
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates
+        :type region_coordinates: np.ndarray
+        :return: The region indices
+        :rtype: np.ndarray
+        """
+        region_coordinates = np.asarray(region_coordinates, dtype=np.int64).reshape(-1, 2)
+        (columns, left_offsets), (rows, top_offsets) = \
+            np.divmod(region_coordinates[:, 0], self.stride_x), \
+            np.divmod(region_coordinates[:, 1], self.stride_y)
+        on_grid = (left_offsets == 0) & (top_offsets == 0) & \
+            (0 <= columns) & (columns < self.columns) & (0 <= rows) & (rows < self.rows)
+        return np.where(on_grid, rows * self.columns + columns, -1)
+
+    def contains(self, region_index: int) -> bool:
+        """
+        contains Check that a region index is part of the grid
+
+        :param region_index: The nth region of the image
+        :type region_index: int
+        :return: Whether 0 <= region_index < len(self)
+        :rtype: bool
+        """
+        return 0 <= region_index < len(self)
@@ -4,12 +4,17 @@
 """
 
 import contextlib
+import copy
+import functools
 from typing import Optional
 
 import numpy as np
 
 from . import config
+from . import foreground
 from . import image_reader
+from . import prefetch as prefetching
+from . import sampling
 
 
 class Image(contextlib.AbstractContextManager):
@@ -18,21 +23,40 @@ class Image(contextlib.AbstractContextManager):
     Image An image to be streamed into a specialized reader 
     """
 
-    def __init__(self, filepath, reader=None):
+    def __init__(self, filepath, reader=None, prefetch=0, workers=1, max_inflight_bytes=None, output_spec=None):
         """__init__ Initialize Image object
 
         :param filepath: Filepath to image file to be opened
         :type filepath: str
         :param reader: Interface to reading the image file, defaults to None
         :type reader: ImageReader or custom class supportive of the same functions, optional
+        :param prefetch: Number of regions to decode ahead of iteration in background threads, defaults to 0 (synchronous)
+        :type prefetch: int, optional
+        :param workers: Number of background decoding threads when prefetching, defaults to 1
+        :type workers: int, optional
+        :param max_inflight_bytes: Memory bound on regions decoded ahead of iteration, defaults to None (unbounded)
+        :type max_inflight_bytes: int, optional
+        :param output_spec: How the Image's copy of the reader converts regions before they are returned, defaults to None (the reader's own)
+        :type output_spec: OutputSpec, optional
         """
         self.filepath = filepath
-        self.reader = reader or image_reader.ImageReader(filepath)
+        if reader is None:
+            reader = image_reader.ImageReader(filepath, output_spec=output_spec)
+        elif output_spec is not None:
+            # a copy sharing the reader's adapter and cache, so that other users of the reader keep its output_spec
+            reader = copy.copy(reader)
+            reader.output_spec = output_spec
+        self.reader = reader
+        self.prefetch = prefetch
+        self.workers = workers
+        self.max_inflight_bytes = max_inflight_bytes
         self._iter = None
+        self._prefetcher = None
+        self._region_indices = None
         self.start = 0
         self.stop = self.number_of_regions()
 
-    def get_region(self, region_identifier, region_dims=config.DEFAULT_REGION_DIMS) -> np.ndarray:
+    def get_region(self, region_identifier, region_dims=config.DEFAULT_REGION_DIMS, level=0, out=None, validate=True) -> np.ndarray:
         """
         get_region Get a pixel region from the image
 
@@ -40,23 +64,214 @@ class Image(contextlib.AbstractContextManager):
         :type region_identifier: Union[int, Iterable]
         :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
         :type region_dims: Iterable, optional
-        :return: A numpy array representative of the pixel region from the image
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to refill with the region instead of allocating one, defaults to None
+        :type out: np.ndarray, optional
+        :param validate: Check that the region is in bounds, defaults to True (custom readers always validate as they do)
+        :type validate: bool, optional
+        :return: A numpy array representative of the pixel region from the image (out when given)
         :rtype: np.ndarray
         """
-        return self.reader.get_region(region_identifier, region_dims)
+        # only pass what was asked for so that custom readers need not support every option
+        options = {}
+        if level:
+            options["level"] = level
+        if out is not None:
+            options["out"] = out
+        if not validate and isinstance(self.reader, image_reader.ImageReader):
+            # skipping validation is an ImageReader option, which custom readers need not support
+            options["validate"] = False
+        return self.reader.get_region(region_identifier, region_dims, **options)
 
-    def number_of_regions(self, region_dims=config.DEFAULT_REGION_DIMS) -> int:
+    def get_regions(self, region_identifiers, region_dims=config.DEFAULT_REGION_DIMS, level=0) -> np.ndarray:
+        """
+        get_regions Get many pixel regions from the image in one batch
+
+        :param region_identifiers: Either a sequence of region indices or a sequence of (width, height) coordinates
+        :type region_identifiers: Iterable
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: An (N, height, width, bands) numpy array of the pixel regions
+        :rtype: np.ndarray
+        """
+        return self.reader.get_regions(region_identifiers, region_dims, level)
+
+    def number_of_regions(self, region_dims=config.DEFAULT_REGION_DIMS, level=0) -> int:
         """
         number_of_regions Get total number of regions from the image based on region dimensions
 
         :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
         :type region_dims: Iterable, optional
+        :param level: The pyramid level whose regions are counted, defaults to 0
+        :type level: int, optional
         :return: Number of regions in the image
         :rtype: int
         """
+        if level:
+            return self.reader.number_of_regions(region_dims, level)
         return self.reader.number_of_regions(region_dims)
 
+    def iter_prefetch(self, prefetch=None, workers=None, max_inflight_bytes=None) -> prefetching.RegionPrefetcher:
+        """
+        iter_prefetch Iterate over the regions between start and stop in order while the following regions are decoded in background threads
+
+        :param prefetch: Number of regions to decode ahead, defaults to the Image's prefetch (or 1 if that is 0)
+        :type prefetch: int, optional
+        :param workers: Number of background decoding threads, defaults to the Image's workers
+        :type workers: int, optional
+        :param max_inflight_bytes: Memory bound on regions decoded ahead, defaults to the Image's max_inflight_bytes
+        :type max_inflight_bytes: int, optional
+        :return: An iterator (and context manager) over the pixel regions
+        :rtype: RegionPrefetcher
+        """
+        self.close()
+        self._prefetcher = prefetching.RegionPrefetcher(
+            # the iteration indices were checked when the Image was sliced
+            functools.partial(self.get_region, validate=False),
+            self._iteration_region_indices(),
+            prefetch=prefetch or self.prefetch or 1,
+            workers=workers or self.workers,
+            max_inflight_bytes=max_inflight_bytes if max_inflight_bytes is not None else self.max_inflight_bytes
+        )
+        return self._prefetcher
+
+    def iter_bands(self, rows_per_band=1, region_dims=config.DEFAULT_REGION_DIMS):
+        """
+        iter_bands Iterate over the regions between start and stop in order, reading each band of rows_per_band rows of
+        regions at once and yielding its regions as views into it (see ImageReader.iter_bands)
+
+        :param rows_per_band: The number of rows of regions read at once, defaults to 1
+        :type rows_per_band: int, optional
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :return: An iterator over the pixel regions, each only valid until the next band is read
+        :rtype: Iterator[np.ndarray]
+        """
+        if self._region_indices is None:
+            for _, region in self.reader.iter_bands(region_dims, rows_per_band=rows_per_band, start=self.start, stop=self.stop):
+                yield region
+            return
+        region_indices = self._iteration_region_indices()
+        if len(region_indices) == 0:
+            return
+        # foreground regions are yielded from the bands that contain them
+        wanted = iter(region_indices)
+        next_index = next(wanted)
+        for region_index, region in self.reader.iter_bands(region_dims, rows_per_band=rows_per_band,
+                                                           start=int(region_indices[0]), stop=int(region_indices[-1]) + 1):
+            if region_index == next_index:
+                yield region
+                next_index = next(wanted, None)
+
+    def parallel_iter(self, num_workers=None, ordered=True, region_dims=config.DEFAULT_REGION_DIMS, **kwargs) -> "parallel.ParallelImageReader":
+        """
+        parallel_iter Read the regions between start and stop with several worker processes, each with its own adapter
+
+        :param num_workers: The number of worker processes, defaults to None (os.cpu_count())
+        :type num_workers: int, optional
+        :param ordered: Yield regions in index order rather than in completion order, defaults to True
+        :type ordered: bool, optional
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :raises TypeError: The Image's reader can't be reopened by the workers (a custom reader or an ImageReaderDirectory)
+        :return: An iterable of (region_index, region) pairs
+        :rtype: ParallelImageReader
+        """
+        from . import parallel  # multiprocessing is only imported by processes that fan out
+        if not isinstance(self.reader, image_reader.ImageReader) or \
+                isinstance(self.reader, image_reader.ImageReaderDirectory):
+            raise TypeError(
+                f"the workers can't open a {type(self.reader).__name__} like the Image's, only ImageReaders of one file")
+        # the workers read with the reader's adapter, grid alignment, output spec and cache budget
+        kwargs.setdefault("reader_options", self.reader.reopen_options())
+        return parallel.ParallelImageReader(
+            self.filepath, region_dims, num_workers=num_workers, ordered=ordered,
+            region_indices=self._iteration_region_indices(), **kwargs)
+
+    def only_foreground(self, foreground_index=None, **kwargs) -> foreground.ForegroundIndex:
+        """
+        only_foreground Restrict iteration, counting and slicing to foreground regions, building (or loading the persisted)
+        foreground index of the image when one isn't given. Slice positions then count foreground regions only.
+
+        :param foreground_index: A precomputed index, defaults to None
+        :type foreground_index: ForegroundIndex, optional
+        :param kwargs: Passed to ForegroundIndex.for_reader, e.g. mask_function, min_fraction or persist
+        :return: The foreground index in use
+        :rtype: ForegroundIndex
+        """
+        if foreground_index is None:
+            foreground_index = foreground.ForegroundIndex.for_reader(
+                self.reader, config.DEFAULT_REGION_DIMS, **kwargs)
+        self._region_indices = foreground_index.indices()
+        self.start, self._iter, self.stop = 0, None, len(self._region_indices)
+        return foreground_index
+
+    def sampler(self, region_dims=config.DEFAULT_REGION_DIMS, level=0, **kwargs) -> sampling.LocalitySampler:
+        """
+        sampler Get a seedable, shuffled stream of the regions between start and stop (only foreground ones after
+        only_foreground) that reads neighbouring regions together instead of one random region at a time
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param kwargs: Passed to LocalitySampler, e.g. locality, block_regions, buffer_regions, jitter or seed
+        :return: An iterable of Samples, one epoch per iteration
+        :rtype: LocalitySampler
+        """
+        if level or tuple(region_dims) != tuple(config.DEFAULT_REGION_DIMS):
+            # start, stop and the foreground index count regions of the default grid only
+            kwargs.setdefault("region_indices", None)
+        else:
+            kwargs.setdefault("region_indices", np.asarray(self._iteration_region_indices()))
+        return sampling.LocalitySampler(self.reader, region_dims, level, **kwargs)
+
+    def all_regions(self) -> None:
+        """
+        all_regions Undo only_foreground so that every region is iterated again
+        """
+        self._region_indices = None
+        self.start, self._iter, self.stop = 0, None, self.number_of_regions()
+
+    def _iteration_region_indices(self):
+        """
+        _iteration_region_indices Get the region indices between start and stop
+
+        :return: The region indices that iteration visits
+        :rtype: Sequence[int]
+        """
+        if self._region_indices is None:
+            return range(self.start, self.stop)
+        return self._region_indices[self.start:self.stop]
+
+    def _region_index(self, position):
+        """
+        _region_index Map an iteration position to a region index
+
+        :param position: A position between start and stop
+        :type position: int
+        :return: The region index
+        :rtype: int
+        """
+        if self._region_indices is None:
+            return position
+        return int(self._region_indices[position])
+
+    def close(self) -> None:
+        """
+        close Stop any background prefetching
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
     def slice(self, start, stop):
+        positions = self.number_of_regions() if self._region_indices is None else len(self._region_indices)
+        if not (0 <= start <= stop <= positions):
+            raise IndexError(f"{start=}, {stop=}, {positions=}")
         self.start = start
         self._iter = start
         self.stop = stop
@@ -81,6 +296,16 @@ class Image(contextlib.AbstractContextManager):
         """
         return self.reader.height
 
+    @property
+    def levels(self):
+        """
+        levels Get the (width, height) dimensions of every pyramid level of the image using its reader
+
+        :return: The dimensions of every level, from full resolution down
+        :rtype: List[Tuple[int]]
+        """
+        return self.reader.levels
+
     @property
     def dims(self):
         """
@@ -100,6 +325,8 @@ class Image(contextlib.AbstractContextManager):
         :rtype: Image
         """
         self._iter = self.start
+        if self.prefetch:
+            self.iter_prefetch()
         return self
 
     def __next__(self):
@@ -113,7 +340,11 @@ class Image(contextlib.AbstractContextManager):
         if self._iter >= self.stop:
             raise StopIteration
         else:
-            region = self.get_region(self._iter)
+            if self._prefetcher is not None:
+                region = next(self._prefetcher)
+            else:
+                region = self.get_region(
+                    self._region_index(self._iter), validate=False)
             self._iter += 1
             return region
 
@@ -126,5 +357,6 @@ class Image(contextlib.AbstractContextManager):
         """
         return self.stop
 
-    def __exit__(self, **kwargs) -> Optional[bool]:
-        return super().__exit__(**kwargs)
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        self.close()
+        return super().__exit__(exc_type, exc_value, traceback)
@@ -2,18 +2,32 @@
     An ImageReader controls the behavior of the image interface. It can either utilize an adapter on a library or custom behavior.
 """
 
+import concurrent.futures
+import contextlib
+import functools
 import os
-from typing import Any, Iterable, Optional, Tuple, Union
+import threading
+import time
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-import cv2 as cv
 import numpy as np
 
-from unified_image_reader.adapters import Adapter, SlideIO, VIPS
+from unified_image_reader import adapter_selection, directory_index, util
+from unified_image_reader.adapters import Adapter, TileInfo, registry
+from unified_image_reader.adapters import config as adapter_config
+from unified_image_reader.cache import RegionCache
+from unified_image_reader.encoded import EncodedTile
+from unified_image_reader.grid import TileGrid
+from unified_image_reader.instrumentation import Instrumentation
+from unified_image_reader.sampling import LocalitySampler
+from unified_image_reader.transform import OutputSpec
 
+# adapters by file extension, as registered names (see adapters/registry.py) or classes
 FORMAT_ADAPTER_MAP = {
-    "tif": VIPS,
-    "tiff": VIPS,
-    "svs": SlideIO
+    "tif": "VIPS",
+    "tiff": "VIPS",
+    "svs": "SlideIO",
+    "tiles": "TileStore"
 }
 
 
@@ -29,6 +43,10 @@ class InvalidDimensionsException(Exception):
     pass
 
 
+class InvalidLevelException(Exception):
+    pass
+
+
 class ImageReader():
     """
     ImageReader Interface between images and adapters which specify reading behavior
@@ -38,16 +56,29 @@ class ImageReader():
     :raises IndexError: The top-left pixel or pixel region dimensions are out of bounds of the image dimensions
     :raises InvalidCoordinatesException: The top-left pixel rwas not provided in (width, height) format
     :raises InvalidDimensionsException: Dimensions of the pixel region were not provided in (width, height) format
+    :raises InvalidLevelException: The pyramid level is not available from the adapter
     """
 
-    def __init__(self, filepath: str, adapter: Union[Adapter, None] = None):
+    def __init__(self, filepath: str, adapter: Union[Adapter, str, None] = None, cache: Union[RegionCache, int, None] = None,
+                 instrumentation: Optional[Instrumentation] = None, calibrate: bool = False, aligned: bool = False,
+                 output_spec: Optional[OutputSpec] = None):
         """
         __init__ Initialize ImageReader object
 
         :param filepath: Filepath to image file to be opened
         :type filepath: str
-        :param adapter: Object which specifies reading behavior, defaults to None
-        :type adapter: Union[Adapter, None], optional
+        :param adapter: Object (or registered name of one) which specifies reading behavior, defaults to None (chosen from the file's content, falling back on its extension)
+        :type adapter: Union[Adapter, str, None], optional
+        :param cache: A (possibly shared) RegionCache or a memory budget in bytes for a private one, defaults to None (no caching)
+        :type cache: Union[RegionCache, int, None], optional
+        :param instrumentation: Where to report the timings of reads, defaults to None (reads aren't measured)
+        :type instrumentation: Optional[Instrumentation], optional
+        :param calibrate: Whether to time the adapters able to read a kind of file not calibrated yet and remember the fastest, defaults to False
+        :type calibrate: bool, optional
+        :param aligned: Whether region grids must be made of whole native tiles (see aligned_stride) unless given a stride, defaults to False
+        :type aligned: bool, optional
+        :param output_spec: How regions are converted before they are returned, defaults to None (as the adapter returns them)
+        :type output_spec: Optional[OutputSpec], optional
         :raises UnsupportedFormatException: The adapter does not support the image format
         """
         # process filepath
@@ -57,14 +88,63 @@ class ImageReader():
         self.filepath = filepath
         # initialize the adapter
         self.adapter = None
+        if adapter is None:  # choose based on file content
+            adapter = adapter_selection.select_adapter(
+                self.filepath, calibrate)
         if adapter is None:  # choose based on file format
             image_format = self.filepath.split('.')[-1]
             adapter = FORMAT_ADAPTER_MAP.get(image_format)
             if adapter is None:
                 raise UnsupportedFormatException(image_format)
-        self.adapter = adapter(filepath)
+        self.adapter = registry.get(adapter)(filepath)
+        # image geometry is computed once, tile grids once per region dimensions and level
+        self._dims = (self.adapter.get_width(), self.adapter.get_height())
+        self._levels = None
+        self._grids = {}
+        self._tile_infos = {}
+        # statistics and thumbnails by their parameters
+        self._stats = {}
+        self._thumbnails = {}
+        self.aligned = aligned
+        self.output_spec = output_spec
+        # initialize the region cache
+        if isinstance(cache, int):
+            cache = RegionCache(cache)
+        self.cache = cache
+        # the Recorder reads report to, shared with the adapter
+        self.instrumentation = None
+        if instrumentation is not None:
+            self.instrument(instrumentation)
+
+    def reopen_options(self) -> Dict[str, Any]:
+        """
+        reopen_options Get the keyword arguments that open another ImageReader of the file (e.g. in a worker process)
+        reading the same regions as this one: its adapter, grid alignment, output spec and cache budget
+
+        :return: The keyword arguments of ImageReader besides the filepath
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "adapter": type(self.adapter),
+            "aligned": self.aligned,
+            "output_spec": self.output_spec,
+            # a cache can't be shared between processes, only its budget
+            "cache": None if self.cache is None else self.cache.max_bytes
+        }
+
+    def instrument(self, instrumentation: Optional[Instrumentation]) -> None:
+        """
+        instrument Start (or, given None, stop) reporting the timings of reads by this reader and its adapter
+
+        :param instrumentation: Where to report the timings of reads
+        :type instrumentation: Optional[Instrumentation]
+        """
+        self.instrumentation = None if instrumentation is None else \
+            instrumentation.recorder(self.filepath, type(self.adapter).__name__)
+        self.adapter.instrumentation = self.instrumentation
 
-    def get_region(self, region_identifier: Union[int, Iterable], region_dims: Iterable):
+    def get_region(self, region_identifier: Union[int, Iterable], region_dims: Iterable, level: int = 0, out: Optional[np.ndarray] = None,
+                   validate: bool = True):
         """
         get_region Get a pixel region from an image using an adapter's implementation after validation and extracting region data
 
@@ -73,14 +153,26 @@ class ImageReader():
         :type region_identifier: Union[int, Iterable]
         :param region_dims: A set of (weight, height) coordinates representing the region dimensions
         :type region_dims: Iterable
-        :return: A numpy array representative of the pixel region from the image
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: An array of the output's shape (see output_spec) to refill with the region instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :param validate: Check that the region is in bounds; trusted callers such as Image's iterator skip it, defaults to True
+        :type validate: bool, optional
+        :return: A numpy array representative of the pixel region from the image (out when given)
         :rtype: np.ndarray
         """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
         # Make sure that region_coordinates is a tuple of length 2
         region_coordinates = None
-        if isinstance(region_identifier, int):
+        if not validate and isinstance(region_identifier, (int, np.integer)):
+            region_coordinates = self.grid(
+                region_dims, level).index_to_coordinates(region_identifier)
+        elif isinstance(region_identifier, (int, np.integer)):
             region_coordinates = self.region_index_to_coordinates(
-                region_identifier, region_dims)
+                region_identifier, region_dims, level)
         elif isinstance(region_identifier, Iterable):
             assert (len(region_identifier) == 2)
             region_coordinates = region_identifier
@@ -88,11 +180,83 @@ class ImageReader():
             raise TypeError(
                 f"region_identifier should be either int or Iterable but is {type(region_identifier)=}, {region_identifier=}")
         # make sure that the region is in bounds
-        self.validate_region(region_coordinates, region_dims)
+        if validate:
+            self.validate_region(region_coordinates, region_dims, level)
+        if instrumentation is not None:
+            instrumentation.record("validate", time.perf_counter() - start)
         # call the implementation
-        return self._get_region(region_coordinates, region_dims)
+        if self.output_spec is None:
+            region = self._get_region(region_coordinates, region_dims, level, out)
+        else:
+            # the adapter's region (often a view of the library's buffer) is converted straight into the output
+            region = self._transform(self._get_region(region_coordinates, region_dims, level), out)
+        if instrumentation is not None:
+            instrumentation.record(
+                "get_region", time.perf_counter() - start, region.nbytes)
+        return region
 
-    def _get_region(self, region_coordinates, region_dims) -> np.ndarray:
+    async def aget_region(self, region_identifier: Union[int, Iterable], region_dims: Iterable, level: int = 0,
+                          executor: Optional[concurrent.futures.Executor] = None) -> np.ndarray:
+        """
+        aget_region Get a pixel region without blocking the event loop by running get_region on an executor
+
+        :param region_identifier: A set of (width, height) coordinates or an indexed region based on region dimensions
+        :type region_identifier: Union[int, Iterable]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param executor: The executor to decode on, defaults to None (the event loop's default executor)
+        :type executor: Optional[concurrent.futures.Executor], optional
+        :return: A numpy array representative of the pixel region from the image
+        :rtype: np.ndarray
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.get_region, region_identifier, region_dims, level))
+
+    def get_regions(self, region_identifiers: Union[Iterable[int], Iterable[Iterable]], region_dims: Iterable, level: int = 0,
+                    out: Optional[np.ndarray] = None, validate: bool = True) -> np.ndarray:
+        """
+        get_regions Get many same-sized pixel regions from an image in one batch. The batch is converted and validated
+        with numpy and the regions are written into a single preallocated array by the adapter.
+
+        :param region_identifiers: Either N region indices or N sets of (width, height) coordinates
+        :type region_identifiers: Union[Iterable[int], Iterable[Iterable]]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: An array of the output's shape (see output_spec) to refill with the regions instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :param validate: Check that the regions are in bounds, defaults to True
+        :type validate: bool, optional
+        :raises TypeError: region_identifiers is neither a sequence of indices nor of coordinates
+        :return: An (N, height, width, bands) numpy array of the pixel regions (out when given)
+        :rtype: np.ndarray
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        region_coordinates = self.region_identifiers_to_coordinates(
+            region_identifiers, region_dims, level)
+        # make sure that every region is in bounds
+        if validate:
+            self.validate_regions(region_coordinates, region_dims, level)
+        if instrumentation is not None:
+            instrumentation.record("validate", time.perf_counter() - start)
+        # call the implementation
+        if self.output_spec is None:
+            regions = self._get_regions(region_coordinates, region_dims, level, out)
+        else:
+            regions = self._transform(self._get_regions(region_coordinates, region_dims, level), out)
+        if instrumentation is not None:
+            instrumentation.record(
+                "get_regions", time.perf_counter() - start, regions.nbytes)
+        return regions
+
+    def _get_region(self, region_coordinates, region_dims, level: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         _get_region Call an adapter's implementation to get a pixel region from an image
 
@@ -100,26 +264,464 @@ class ImageReader():
         :type region_coordinates: Iterable
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
-        :return: Implementation resulting in a numpy array representative of the pixel region from the image
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to write the region into, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :return: Implementation resulting in a numpy array representative of the pixel region from the image (out when given, read-only when cached)
+        :rtype: np.ndarray
+        """
+        if self.cache is None:
+            return self._adapter_get_region(region_coordinates, region_dims, level, out)
+        key = RegionCache.key(
+            self.filepath, region_coordinates, region_dims, level)
+        region = self.cache.get(key)
+        if region is None:
+            # read into a fresh array since cached regions are made read-only
+            region = self.cache.put(
+                key, self._adapter_get_region(region_coordinates, region_dims, level))
+        if out is None:
+            return region
+        np.copyto(out, region)
+        return out
+
+    def _transform(self, region: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        _transform Convert a region (or a batch of them) by output_spec, timing it when instrumented
+
+        :param region: The region as the adapter returned it
+        :type region: np.ndarray
+        :param out: An array of the output's shape to write into, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :return: The converted region (out when given)
+        :rtype: np.ndarray
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        region = self.output_spec.apply(region, self.channel_order, out)
+        if instrumentation is not None:
+            instrumentation.record(
+                "transform", time.perf_counter() - start, region.nbytes)
+        return region
+
+    def _lend_adapter(self) -> ContextManager[Adapter]:
+        """
+        _lend_adapter Get the adapter handle a read should use, for as long as the read lasts
+
+        :return: A context manager giving the adapter
+        :rtype: ContextManager[Adapter]
+        """
+        return contextlib.nullcontext(self.adapter)
+
+    def _adapter_get_region(self, region_coordinates, region_dims, level: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        _adapter_get_region Call the adapter's get_region, timing it when instrumented
+
+        :return: The adapter's pixel region (out when given)
         :rtype: np.ndarray
         """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        with self._lend_adapter() as adapter:
+            if out is None:
+                region = adapter.get_region(region_coordinates, region_dims, level)
+            else:
+                region = adapter.get_region(region_coordinates, region_dims, level, out=out)
+        if instrumentation is not None:
+            instrumentation.record(
+                "adapter", time.perf_counter() - start, region.nbytes)
+        return region
 
-        return self.adapter.get_region(region_coordinates, region_dims)
+    def _adapter_get_regions(self, region_coordinates: np.ndarray, region_dims: Iterable, out: np.ndarray, level: int = 0) -> np.ndarray:
+        """
+        _adapter_get_regions Call the adapter's get_regions, timing it when instrumented
+
+        :return: out
+        :rtype: np.ndarray
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        with self._lend_adapter() as adapter:
+            regions = adapter.get_regions(region_coordinates, region_dims, out, level)
+        if instrumentation is not None:
+            instrumentation.record(
+                "adapter", time.perf_counter() - start, regions.nbytes)
+        return regions
 
-    def number_of_regions(self, region_dims: Iterable):
+    def _get_regions(self, region_coordinates: np.ndarray, region_dims: Iterable, level: int = 0,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        _get_regions Call an adapter's bulk implementation to fill one preallocated array with pixel regions
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: An (N, height, width, bands) array to write the regions into, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :raises ValueError: out doesn't have the shape of the regions
+        :return: An (N, height, width, bands) numpy array of the pixel regions
+        :rtype: np.ndarray
+        """
+        region_width, region_height = region_dims
+        shape = (len(region_coordinates), region_height,
+                 region_width, self.adapter.get_bands())
+        if out is None:
+            out = np.empty(shape, dtype=self.adapter.get_dtype())
+        elif out.shape != shape:
+            raise ValueError(
+                f"out should have the shape of the regions {shape} but has {out.shape}")
+        if self.cache is None:
+            return self._adapter_get_regions(region_coordinates, region_dims, out, level)
+        # serve hits from the cache and read only the misses in bulk
+        keys = [RegionCache.key(self.filepath, coordinates, region_dims, level)
+                for coordinates in region_coordinates]
+        misses = []
+        for i, key in enumerate(keys):
+            region = self.cache.get(key)
+            if region is None:
+                misses.append(i)
+            else:
+                out[i] = region
+        if misses:
+            out[misses] = self._adapter_get_regions(
+                region_coordinates[misses], region_dims, out[misses], level)
+            for i in misses:
+                self.cache.put(keys[i], out[i].copy())
+        return out
+
+    def number_of_regions(self, region_dims: Iterable, level: int = 0):
         """
         number_of_regions Calculates the number of regions in the image based on the dimensions of each region
 
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
+        :param level: The pyramid level whose regions are counted, defaults to 0
+        :type level: int, optional
         :return: The number of regions
         :rtype: int
         """
 
-        width, height = region_dims
-        return (self.width // width) * (self.height // height)
+        return len(self.grid(region_dims, level))
+
+    def grid(self, region_dims: Iterable, level: int = 0, stride: Optional[Iterable] = None) -> TileGrid:
+        """
+        grid Get the grid of regions of region_dims tiling a level, built on first use
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level the grid tiles, defaults to 0
+        :type level: int, optional
+        :param stride: The (width, height) step between neighbouring regions, defaults to None (region_dims, or aligned_stride for an aligned reader)
+        :type stride: Optional[Iterable], optional
+        :return: The tile grid
+        :rtype: TileGrid
+        """
+        if stride is None and self.aligned:
+            stride = self.aligned_stride(region_dims, level)
+        key = (tuple(region_dims), level, tuple(stride) if stride is not None else None)
+        tile_grid = self._grids.get(key)
+        if tile_grid is None:
+            tile_grid = self._grids[key] = TileGrid(
+                self.level_dims(level), region_dims, stride)
+        return tile_grid
+
+    def tile_info(self, level: int = 0) -> Optional[TileInfo]:
+        """
+        tile_info Get the native tile layout of a pyramid level from the adapter, read once per level
+
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The tile layout or None when the level isn't tiled (or the adapter can't tell)
+        :rtype: Optional[TileInfo]
+        """
+        if level not in self._tile_infos:
+            self.level_dims(level)  # raises for a missing level
+            self._tile_infos[level] = self.adapter.get_tile_info(level)
+        return self._tile_infos[level]
+
+    def aligned_stride(self, region_dims: Iterable, level: int = 0) -> Tuple[int, int]:
+        """
+        aligned_stride Get the step between neighbouring regions that starts every region on a native tile boundary
+        without leaving pixels out: region_dims itself, which must be whole tiles. Each region then decodes exactly
+        the tiles it covers; a region of exactly one tile decodes exactly one.
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level the regions are read from, defaults to 0
+        :type level: int, optional
+        :raises ValueError: The level is tiled and region_dims isn't a multiple of its tile dimensions
+        :return: The (width, height) stride, region_dims
+        :rtype: Tuple[int, int]
+        """
+        region_width, region_height = region_dims
+        tile_info = self.tile_info(level)
+        if tile_info is not None and (region_width % tile_info.width or region_height % tile_info.height):
+            # a longer stride would skip the pixels between regions, a shorter one would split tiles between regions
+            raise ValueError(
+                f"aligned regions should be whole {tile_info.width}x{tile_info.height} tiles, e.g. "
+                f"{-(-region_width // tile_info.width) * tile_info.width}x"
+                f"{-(-region_height // tile_info.height) * tile_info.height} rather than {region_width}x{region_height}")
+        return (region_width, region_height)
+
+    def number_of_tiles(self, level: int = 0) -> int:
+        """
+        number_of_tiles Get the number of native tiles of a pyramid level, counting the partial tiles along its right and bottom edges
+
+        :param level: The pyramid level (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :raises UnsupportedFormatException: The level isn't tiled
+        :return: The number of tiles
+        :rtype: int
+        """
+        columns, rows = self._tile_layout(level)[1]
+        return columns * rows
+
+    def _tile_layout(self, level: int) -> Tuple[TileInfo, Tuple[int, int]]:
+        """
+        _tile_layout Get the tile layout of a level and its number of tile columns and rows
+
+        :param level: The pyramid level (0 is full resolution)
+        :type level: int
+        :raises UnsupportedFormatException: The level isn't tiled
+        :return: The tile layout and (columns, rows)
+        :rtype: Tuple[TileInfo, Tuple[int, int]]
+        """
+        tile_info = self.tile_info(level)
+        if tile_info is None:
+            raise UnsupportedFormatException(
+                f"level {level} of {self.filepath} is not tiled")
+        width, height = self.level_dims(level)
+        return tile_info, (-(-width // tile_info.width), -(-height // tile_info.height))
 
-    def validate_region(self, region_coordinates: Iterable, region_dims: Iterable) -> None:
+    def get_tile(self, tile_index: int, level: int = 0, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        get_tile Get native tile tile_index (in row-major order) of a pyramid level, which costs exactly one tile decode.
+        Tiles along the right and bottom edges are cropped to the image.
+
+        :param tile_index: The tile index
+        :type tile_index: int
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param out: A (height, width, bands) array to refill with the tile instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :raises UnsupportedFormatException: The level isn't tiled
+        :raises IndexError: tile_index is out of range
+        :return: A numpy array of the tile's pixels (out when given)
+        :rtype: np.ndarray
+        """
+        tile_info, (columns, rows) = self._tile_layout(level)
+        if not 0 <= tile_index < columns * rows:
+            raise IndexError(f"{tile_index=} should be in [0, {columns * rows})")
+        width, height = self.level_dims(level)
+        left = (tile_index % columns) * tile_info.width
+        top = (tile_index // columns) * tile_info.height
+        tile_dims = (min(tile_info.width, width - left), min(tile_info.height, height - top))
+        return self.get_region((left, top), tile_dims, level, out, validate=False)
+
+    def get_encoded_tile(self, tile_index: int, level: int = 0) -> EncodedTile:
+        """
+        get_encoded_tile Get native tile tile_index (in row-major order) of a pyramid level as stored, without decoding
+        it, to be shipped as is and decoded by the receiver with encoded.decode_tile
+
+        :param tile_index: The tile index
+        :type tile_index: int
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :raises UnsupportedFormatException: The level isn't tiled, its codec isn't one encoded.decode_tile decodes (see
+            encoded.DECODABLE_CODECS) or the adapter can't pass its tiles through
+        :raises IndexError: tile_index is out of range
+        :return: The stored bytes of the tile and what decoding them needs
+        :rtype: EncodedTile
+        """
+        _, (columns, rows) = self._tile_layout(level)
+        if not 0 <= tile_index < columns * rows:
+            raise IndexError(f"{tile_index=} should be in [0, {columns * rows})")
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+        with self._lend_adapter() as adapter:
+            tile = adapter.get_encoded_tile(int(tile_index), level)
+        if tile is None:
+            raise UnsupportedFormatException(
+                f"{type(self.adapter).__name__} can't pass the tiles of {self.filepath} through")
+        if instrumentation is not None:
+            instrumentation.record(
+                "get_encoded_tile", time.perf_counter() - start, len(tile.data))
+        return tile
+
+    def get_encoded_region(self, region_identifier: Union[int, Iterable], region_dims: Iterable,
+                           level: int = 0) -> Optional[EncodedTile]:
+        """
+        get_encoded_region Get a region as a stored native tile when it is exactly one (as the regions of an aligned
+        reader with tile-sized region_dims are), so that it can be shipped without being decoded
+
+        :param region_identifier: A set of (width, height) coordinates or an indexed region based on region dimensions
+        :type region_identifier: Union[int, Iterable]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :return: The encoded tile, or None when the region isn't a native tile (read it with get_region instead) or the
+            adapter can't pass tiles through
+        :rtype: Optional[EncodedTile]
+        """
+        tile_info = self.tile_info(level)
+        if tile_info is None:
+            return None
+        if isinstance(region_identifier, (int, np.integer)):
+            left, top = self.region_index_to_coordinates(region_identifier, region_dims, level)
+        else:
+            left, top = region_identifier
+        width, height = self.level_dims(level)
+        if left % tile_info.width or top % tile_info.height or not (0 <= left < width and 0 <= top < height) or \
+                tuple(region_dims) != (min(tile_info.width, width - left), min(tile_info.height, height - top)):
+            return None
+        columns = -(-width // tile_info.width)
+        try:
+            return self.get_encoded_tile((top // tile_info.height) * columns + left // tile_info.width, level)
+        except UnsupportedFormatException:
+            return None
+
+    def iter_bands(self, region_dims: Iterable, level: int = 0, stride: Optional[Iterable] = None, rows_per_band: int = 1,
+                   start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        iter_bands Stream the regions of a grid in row-major order, reading each band of rows_per_band grid rows with one
+        adapter call and yielding its regions as views into the band, so that neighbouring and overlapping regions share
+        one decode. Bands wider than BULK_READ_MAX_PIXELS allow are read in as few column chunks as fit.
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param stride: The (width, height) step between neighbouring regions, defaults to None (region_dims)
+        :type stride: Optional[Iterable], optional
+        :param rows_per_band: The number of grid rows read per adapter call, defaults to 1
+        :type rows_per_band: int, optional
+        :param start: The first region index, defaults to 0
+        :type start: int, optional
+        :param stop: The region index to stop before, defaults to None (the number of regions of the grid)
+        :type stop: Optional[int], optional
+        :raises ValueError: rows_per_band is not positive
+        :return: An iterator of (region index, region) pairs; a region is only valid until the next band is read (unless converted by output_spec)
+        :rtype: Iterator[Tuple[int, np.ndarray]]
+        """
+        if rows_per_band < 1:
+            raise ValueError(f"{rows_per_band=} should be positive")
+        tile_grid = self.grid(region_dims, level, stride)
+        stop = len(tile_grid) if stop is None else min(stop, len(tile_grid))
+        if start >= stop:
+            return
+        region_width, region_height = tile_grid.region_dims
+        stride_x, stride_y = tile_grid.stride
+        band_height = (rows_per_band - 1) * stride_y + region_height
+        # the number of grid columns read per adapter call
+        columns_per_chunk = max(1, min(tile_grid.columns,
+                                       (adapter_config.BULK_READ_MAX_PIXELS // band_height - region_width) // stride_x + 1))
+        for first_row in range(start // tile_grid.columns, (stop - 1) // tile_grid.columns + 1, rows_per_band):
+            rows = min(rows_per_band, tile_grid.rows - first_row)
+            top = first_row * stride_y
+            for first_column in range(0, tile_grid.columns, columns_per_chunk):
+                columns = min(columns_per_chunk, tile_grid.columns - first_column)
+                row_indices = first_row * tile_grid.columns + first_column + np.arange(columns)
+                if row_indices[-1] + (rows - 1) * tile_grid.columns < start or row_indices[0] >= stop:
+                    continue
+                left = first_column * stride_x
+                band = self._adapter_get_region(
+                    (left, top), ((columns - 1) * stride_x + region_width, (rows - 1) * stride_y + region_height), level)
+                for row in range(rows):
+                    for column in range(columns):
+                        region_index = int(row_indices[column]) + row * tile_grid.columns
+                        if start <= region_index < stop:
+                            y, x = row * stride_y, column * stride_x
+                            region = band[y:y + region_height, x:x + region_width]
+                            if self.output_spec is not None:
+                                region = self._transform(region)
+                            yield region_index, region
+
+    def stats(self, level: Optional[int] = None, mask: "stats.Mask" = None, bins: Optional[int] = None,
+              persist: bool = True, mask_key: Optional[str] = None) -> "stats.RunningStats":
+        """
+        stats Get the per-channel mean, standard deviation, extremes and histogram of the image, computed in one streaming
+        pass over the lowest resolution level that is still adequate (see stats.adequate_level) and cached in memory and
+        next to the image
+
+        :param level: The pyramid level to compute them on, defaults to None (the cheapest adequate level)
+        :type level: Optional[int], optional
+        :param mask: Restricts them to part of the image: a boolean array covering the image at any resolution, a
+            ForegroundIndex or a function mapping pixels to a boolean array, defaults to None (every pixel)
+        :type mask: Union[np.ndarray, ForegroundIndex, Callable[[np.ndarray], np.ndarray], None], optional
+        :param bins: The number of histogram bins per channel, defaults to None (STATS_HISTOGRAM_BINS)
+        :type bins: Optional[int], optional
+        :param persist: Whether to reuse and write them next to the image, defaults to True
+        :type persist: bool, optional
+        :param mask_key: Identifies a mask function, whose statistics are otherwise computed afresh on every call
+            rather than cached, defaults to None
+        :type mask_key: Optional[str], optional
+        :return: The statistics
+        :rtype: RunningStats
+        """
+        from unified_image_reader import stats as slide_stats  # only readers asked for statistics need them
+        if level is None:
+            level = slide_stats.adequate_level(self)
+        else:
+            self.level_dims(level)  # raises for a missing level
+        bins = bins or slide_stats.config.STATS_HISTOGRAM_BINS
+        signature = slide_stats.mask_signature(mask, mask_key)
+        if signature is None:
+            return slide_stats.for_reader(self, level, mask, bins, persist=False)
+        key = (level, bins, signature)
+        if key not in self._stats:
+            self._stats[key] = slide_stats.for_reader(self, level, mask, bins, persist=persist, mask_key=mask_key)
+        return self._stats[key]
+
+    def thumbnail(self, max_dims: Optional[Iterable] = None, persist: bool = True) -> np.ndarray:
+        """
+        thumbnail Get the whole image downscaled to fit within max_dims from the adapter's cheapest low resolution read,
+        cached in memory and next to the image
+
+        :param max_dims: A set of (width, height) coordinates bounding the thumbnail dimensions, defaults to None (STATS_THUMBNAIL_DIMS)
+        :type max_dims: Optional[Iterable], optional
+        :param persist: Whether to reuse and write the thumbnail next to the image, defaults to True
+        :type persist: bool, optional
+        :return: A read-only numpy array of the downscaled image
+        :rtype: np.ndarray
+        """
+        from unified_image_reader import stats as slide_stats
+        max_dims = tuple(max_dims or slide_stats.config.STATS_THUMBNAIL_DIMS)
+        if max_dims not in self._thumbnails:
+            thumbnail = slide_stats.thumbnail_for_reader(self, max_dims, persist)
+            thumbnail.flags.writeable = False  # shared by every caller
+            self._thumbnails[max_dims] = thumbnail
+        return self._thumbnails[max_dims]
+
+    def sampler(self, region_dims: Iterable, level: int = 0, **kwargs) -> LocalitySampler:
+        """
+        sampler Get a seedable, shuffled stream of the regions of a grid that reads neighbouring regions together (see LocalitySampler)
+
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param kwargs: Passed to LocalitySampler, e.g. region_indices, locality, block_regions, buffer_regions, jitter or seed
+        :return: The sampler
+        :rtype: LocalitySampler
+        """
+        return LocalitySampler(self, region_dims, level, **kwargs)
+
+    def close(self) -> None:
+        """
+        close Release the adapter's open files and decoding state (e.g. the per-thread VIPS regions); a closed reader
+        reopens them if read again
+        """
+        self.adapter.close()
+
+    def validate_region(self, region_coordinates: Iterable, region_dims: Iterable, level: int = 0) -> None:
         """
         validate_region Checks that a region is within the bounds of the image
 
@@ -127,10 +729,14 @@ class ImageReader():
         :type region_coordinates: Iterable
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
+        :param level: The pyramid level whose bounds apply, defaults to 0
+        :type level: int, optional
         :raises IndexError: The top-left pixel or pixel region dimensions are out of the bounds of the image dimensions
         :raises InvalidCoordinatesException: The top-left pixel was not presented in (width, height) format
         :raises InvalidDimensionsException: Dimensions of the pixel region were not presented in (width, height) format
+        :raises InvalidLevelException: The pyramid level is not available
         """
+        width, height = self.level_dims(level)
 
         def not_valid():
             """
@@ -139,25 +745,98 @@ class ImageReader():
             :raises IndexError: The top-left pixel or pixel region dimensions are out of the bounds of the image dimensions
             """
 
-            raise IndexError(region_coordinates, region_dims, self.dims)
+            raise IndexError(region_coordinates, region_dims, (width, height))
         # first ensure coordinates are in bounds
         if not (len(region_coordinates) == 2):
             raise InvalidCoordinatesException(region_coordinates)
         left, top = region_coordinates
-        if not (0 <= left < self.width):
+        if not (0 <= left < width):
             not_valid()
-        if not (0 <= top < self.height):
+        if not (0 <= top < height):
             not_valid()
         # then check dimensions with coordinates
         if not (len(region_dims) == 2):
             raise InvalidDimensionsException(region_dims)
         region_width, region_height = region_dims
-        if not (0 < region_width and left+region_width <= self.width):
+        if not (0 < region_width and left+region_width <= width):
             not_valid()
-        if not (0 < region_height and top+region_height <= self.height):
+        if not (0 < region_height and top+region_height <= height):
             not_valid()
 
-    def region_index_to_coordinates(self, region_index: int, region_dims: Iterable):
+    def validate_regions(self, region_coordinates: np.ndarray, region_dims: Iterable, level: int = 0) -> None:
+        """
+        validate_regions Checks that a batch of same-sized regions is within the bounds of the image
+
+        :param region_coordinates: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :type region_coordinates: np.ndarray
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level whose bounds apply, defaults to 0
+        :type level: int, optional
+        :raises IndexError: A top-left pixel or the pixel region dimensions are out of the bounds of the image dimensions
+        :raises InvalidCoordinatesException: The top-left pixels were not presented as an (N, 2) array
+        :raises InvalidDimensionsException: Dimensions of the pixel regions were not presented in (width, height) format
+        :raises InvalidLevelException: The pyramid level is not available
+        """
+        width, height = self.level_dims(level)
+        if not (region_coordinates.ndim == 2 and region_coordinates.shape[1] == 2):
+            raise InvalidCoordinatesException(region_coordinates.shape)
+        if not (len(region_dims) == 2):
+            raise InvalidDimensionsException(region_dims)
+        region_width, region_height = region_dims
+        if not (0 < region_width and 0 < region_height):
+            raise IndexError(region_dims, (width, height))
+        lefts, tops = region_coordinates[:, 0], region_coordinates[:, 1]
+        out_of_bounds = (lefts < 0) | (tops < 0) | \
+            (lefts + region_width > width) | (tops + region_height > height)
+        if out_of_bounds.any():
+            first = int(np.argmax(out_of_bounds))
+            raise IndexError(tuple(int(c) for c in region_coordinates[first]),
+                             region_dims, (width, height))
+
+    def region_identifiers_to_coordinates(self, region_identifiers: Union[Iterable[int], Iterable[Iterable]], region_dims: Iterable, level: int = 0) -> np.ndarray:
+        """
+        region_identifiers_to_coordinates Converts a batch of region indices or coordinates to an (N, 2) array of coordinates
+
+        :param region_identifiers: Either N region indices or N sets of (width, height) coordinates
+        :type region_identifiers: Union[Iterable[int], Iterable[Iterable]]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level whose region grid indices refer to, defaults to 0
+        :type level: int, optional
+        :raises TypeError: region_identifiers is neither a sequence of indices nor of coordinates
+        :return: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :rtype: np.ndarray
+        """
+        region_identifiers = np.asarray(region_identifiers)
+        if region_identifiers.size == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        if not np.issubdtype(region_identifiers.dtype, np.integer):
+            raise TypeError(
+                f"region_identifiers should contain ints but {region_identifiers.dtype=}")
+        if region_identifiers.ndim == 1:
+            return self.region_indices_to_coordinates(region_identifiers, region_dims, level)
+        if region_identifiers.ndim == 2 and region_identifiers.shape[1] == 2:
+            return region_identifiers.astype(np.int64, copy=False)
+        raise TypeError(
+            f"region_identifiers should be N indices or (N, 2) coordinates but {region_identifiers.shape=}")
+
+    def region_indices_to_coordinates(self, region_indices: Iterable[int], region_dims: Iterable, level: int = 0) -> np.ndarray:
+        """
+        region_indices_to_coordinates Vectorized region_index_to_coordinates
+
+        :param region_indices: The nth regions of the image (where n >= 0) based on region dimensions
+        :type region_indices: Iterable[int]
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions
+        :type region_dims: Iterable
+        :param level: The pyramid level whose region grid indices refer to, defaults to 0
+        :type level: int, optional
+        :return: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :rtype: np.ndarray
+        """
+        return self.grid(region_dims, level).indices_to_coordinates(region_indices)
+
+    def region_index_to_coordinates(self, region_index: int, region_dims: Iterable, level: int = 0):
         """
         region_index_to_coordinates Converts the index of a region to coordinates of the top-left pixel of the region
 
@@ -165,35 +844,97 @@ class ImageReader():
         :type region_index: int
         :param region_dims: A set of (width, height) coordinates representing the region dimensions
         :type region_dims: Iterable
+        :param level: The pyramid level whose region grid the index refers to, defaults to 0
+        :type level: int, optional
         :return: A set of (width, height) coordinates representing the top-left pixel of the region
         :rtype: Iterable
         """
 
-        region_width, region_height = region_dims
-        width_regions = self.width // region_width
-        left = (region_index % width_regions) * region_width
-        top = (region_index // width_regions) * region_height
-        return (left, top)
+        return self.grid(region_dims, level).index_to_coordinates(region_index)
+
+    @property
+    def levels(self) -> List[Tuple[int, int]]:
+        """
+        levels Get the (width, height) dimensions of every pyramid level the adapter can read, from full resolution down
+
+        :return: The dimensions of every level
+        :rtype: List[Tuple[int, int]]
+        """
+        if self._levels is None:
+            self._levels = self.adapter.get_levels()
+        return self._levels
+
+    @property
+    def level_downsamples(self) -> List[float]:
+        """
+        level_downsamples Get the downsample factor of every pyramid level relative to full resolution
+
+        :return: The downsample factor of every level
+        :rtype: List[float]
+        """
+        levels = self.levels
+        width, height = levels[0]
+        return [(width / level_width + height / level_height) / 2 for level_width, level_height in levels]
+
+    def level_dims(self, level: int) -> Tuple[int, int]:
+        """
+        level_dims Get the width and height of a pyramid level
+
+        :param level: The pyramid level (0 is full resolution)
+        :type level: int
+        :raises InvalidLevelException: The pyramid level is not available
+        :return: Width and height in pixels
+        :rtype: Tuple[int, int]
+        """
+        if level == 0:
+            return self.dims
+        levels = self.levels
+        if not (isinstance(level, (int, np.integer)) and 0 <= level < len(levels)):
+            raise InvalidLevelException(level, len(levels))
+        return levels[level]
+
+    def best_level_for_downsample(self, downsample: float) -> int:
+        """
+        best_level_for_downsample Get the lowest resolution level that is downsampled by at most downsample,
+        so that reading it and resizing never upsamples
+
+        :param downsample: The desired downsample factor relative to full resolution
+        :type downsample: float
+        :return: The pyramid level
+        :rtype: int
+        """
+        return max((level for level, level_downsample in enumerate(self.level_downsamples)
+                    if level_downsample <= downsample * (1 + 1e-3)), default=0)
+
+    @property
+    def channel_order(self) -> str:
+        """
+        channel_order Get the order of the color bands of the regions the adapter returns
+
+        :return: "RGB" or "BGR"
+        :rtype: str
+        """
+        return self.adapter.channel_order
 
     @property
     def width(self):
         """
-        width Get the width property of the image using the adapter's implementation
+        width Get the width property of the image using the adapter's implementation, read once when the image is opened
 
         :return: Width in pixels
         :rtype: int
         """
-        return self.adapter.get_width()
+        return self._dims[0]
 
     @property
     def height(self):
         """
-        height Get the height property of the image using the adapter's implementation
+        height Get the height property of the image using the adapter's implementation, read once when the image is opened
 
         :return: Height in pixels
         :rtype: int
         """
-        return self.adapter.get_height()
+        return self._dims[1]
 
     @property
     def dims(self):
@@ -203,22 +944,38 @@ class ImageReader():
         :return: Width and height in pixels
         :rtype: Iterable
         """
-        return self.width, self.height
+        return self._dims
 
 
 class ImageReaderDirectory(ImageReader):
 
     """
      Treats a collection of images as a single image whereby regions don't have locations, only alphabetically-organized indices.
-     This works with both a directory and a list of image files.
+     This works with both a directory and a list of image files. The files' headers are indexed up front (and, for a
+     directory, persisted next to it) so that their dimensions, bands and dtypes are known without decoding them, and
+     batches of files are decoded on a thread pool since OpenCV releases the GIL while decoding.
     """
 
-    def __init__(self, data: Union[str, list, tuple]):
+    # OpenCV decodes color images as BGR
+    channel_order = "BGR"
+
+    def __init__(self, data: Union[str, list, tuple], recursive: bool = False, workers: Optional[int] = None,
+                 index_path: Optional[str] = None, persist: bool = True, output_spec: Optional[OutputSpec] = None):
         """
         __init__
 
         :param data: the location(s) of constituent images
         :type data: str
+        :param recursive: whether to include the images in subdirectories of a directory, defaults to False
+        :type recursive: bool, optional
+        :param workers: the number of threads that read headers and decode batches, defaults to None (the executor's default)
+        :type workers: Optional[int], optional
+        :param index_path: where to persist the header index, defaults to None (next to the directory, or nowhere for a list of files)
+        :type index_path: Optional[str], optional
+        :param persist: whether to reuse and write the header index, defaults to True
+        :type persist: bool, optional
+        :param output_spec: how regions are converted before they are returned, defaults to None (BGR as decoded)
+        :type output_spec: Optional[OutputSpec], optional
         :raises Exception: when data is a string but isn't a directory
         :raises TypeError: when data is neither a string nor list/tuple
         :raises Exception: when a file in data (when data is a list) doesn't exist as a file 
@@ -227,39 +984,223 @@ class ImageReaderDirectory(ImageReader):
             self._dir = data
             if not os.path.isdir(self._dir):
                 raise Exception(f"{data=} should be a path to a directory")
-            self._region_files = [os.path.join(
-                self._dir, p) for p in os.listdir(self._dir)]
-        elif isinstance(data, [list, tuple]):
-            self._region_files = data
+            if recursive:
+                self._region_files = util.listdir_recursive(self._dir)
+            else:
+                self._region_files = [os.path.join(self._dir, p) for p in os.listdir(self._dir)
+                                      if os.path.isfile(os.path.join(self._dir, p))]
+            if index_path is None:
+                # next to the directory rather than in it (an absolute path, so that "." is indexed as its parent's entry)
+                index_path = util.sidecar_path(
+                    os.path.abspath(self._dir), directory_index.SIDECAR_SUFFIX)
+        elif isinstance(data, (list, tuple)):
+            self._region_files = list(data)
             for region_filepath in self._region_files:
                 if not os.path.isfile(region_filepath):
                     raise Exception(
                         f"self._region_files should be composed of filepaths to existing image files but includes {region_filepath}")
         else:
             raise TypeError(f"Didn't expect {type(data)=}, {data=}")
-        self._region_files.sort()
+        self.filepath = data if isinstance(data, str) else None
+        self._workers = workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.index = directory_index.DirectoryIndex.for_files(
+            self._region_files, index_path if persist else None, self._get_executor())
+        self._region_files = self.index.paths
+        self._uniform_dims = self.index.uniform_dims()
+        # the state ImageReader's methods share, for a reader without an adapter, levels or grids
+        self.adapter = None
+        self.cache = None
+        self.instrumentation = None
+        self.aligned = False
+        self.output_spec = output_spec
+        self._grids = {}
+        self._tile_infos = {}
+        self._stats = {}
+        self._thumbnails = {}
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        _get_executor Get the thread pool, starting it again when the reader was closed
+
+        :return: The thread pool the files are decoded on
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="unified_image_reader_directory")
+            return self._executor
 
-    def get_region(self, region_identifier: int, region_dims: Optional[Any] = None) -> np.ndarray:
+    def instrument(self, instrumentation: Optional[Instrumentation]) -> None:
         """
-        get_region reads in the image at self._region_files[region_identifier]
+        instrument Start (or, given None, stop) reporting the timings of the files' decodes
+
+        :param instrumentation: Where to report the timings of reads
+        :type instrumentation: Optional[Instrumentation]
+        """
+        self.instrumentation = None if instrumentation is None else \
+            instrumentation.recorder(self.filepath, type(self).__name__)
+
+    def _unsupported(self, name: str):
+        """
+        _unsupported Refuse a method of ImageReader that ImageReaderDirectory doesn't support
+
+        :raises NotImplementedError: always
+        """
+        raise NotImplementedError(
+            f"{name} needs an image with locations and levels, which an ImageReaderDirectory's files don't have")
+
+    def reopen_options(self) -> Dict[str, Any]:
+        """
+        reopen_options Refuse to describe the directory as the options of an ImageReader of one file
+
+        :raises NotImplementedError: always
+        """
+        raise NotImplementedError("an ImageReaderDirectory isn't reopened as an ImageReader of one file")
+
+    def grid(self, *args, **kwargs):
+        self._unsupported("grid")
+
+    def iter_bands(self, *args, **kwargs):
+        self._unsupported("iter_bands")
+
+    def stats(self, *args, **kwargs):
+        self._unsupported("stats")
+
+    def thumbnail(self, *args, **kwargs):
+        self._unsupported("thumbnail")
+
+    def sampler(self, *args, **kwargs):
+        self._unsupported("sampler")
+
+    def get_region(self, region_identifier: int, region_dims: Optional[Any] = None, level: int = 0,
+                   out: Optional[np.ndarray] = None, validate: bool = True) -> np.ndarray:
+        """
+        get_region reads in the image at self._region_files[region_identifier], with the bands and bit depth of the file
 
         :param region_identifier: the index of the file read (files are indexed alphabetically)
         :type region_identifier: int
         :param region_dims: IGNORED - the regions will be whatever the regions of the image file are, defaults to None
         :type region_dims: Any, optional
+        :param level: IGNORED - the image files have no pyramid levels, defaults to 0
+        :type level: int, optional
+        :param out: an array of the output's shape (see output_spec) to copy the region into, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :param validate: Check that region_identifier is in range, defaults to True
+        :type validate: bool, optional
         :raises NotImplementedError: if the region identifier isn't an index
         :raises IndexError: if region_identifier isn't in range
-        :return: region (the image in the file in question)
+        :return: region (the image in the file in question, out when given)
         :rtype: np.ndarray
         """
-        if not isinstance(region_identifier, int):
+        if not isinstance(region_identifier, (int, np.integer)):
             raise NotImplementedError(
                 "This ImageReader only operates on aggregated region files which are indexed alphabetically. Region coordinates are not supported.")
-        if not (0 <= region_identifier < self.number_of_regions()):
+        if validate and not (0 <= region_identifier < self.number_of_regions()):
             raise IndexError(
                 f"{region_identifier=}, {self.number_of_regions()=}")
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
         region_filepath = self._region_files[region_identifier]
-        return cv.imread(region_filepath)
+        region = directory_index.decode(region_filepath, self.get_region_bands(region_identifier))
+        if region is None:
+            raise ValueError(f"{region_filepath} is not a readable image file")
+        if instrumentation is not None:
+            instrumentation.record("decode", time.perf_counter() - start, region.nbytes)
+        if self.output_spec is not None:
+            return self.output_spec.apply(region, self.channel_order, out)
+        return region if out is None else Adapter._into(region, out)
+
+    def get_regions(self, region_identifiers: Iterable[int], region_dims: Optional[Any] = None, level: int = 0,
+                    out: Optional[np.ndarray] = None, validate: bool = True) -> Union[np.ndarray, List[np.ndarray]]:
+        """
+        get_regions decodes a batch of image files on the thread pool
+
+        :param region_identifiers: the indices of the files read
+        :type region_identifiers: Iterable[int]
+        :param region_dims: IGNORED - the regions will be whatever the regions of the image files are, defaults to None
+        :type region_dims: Any, optional
+        :param level: IGNORED - the image files have no pyramid levels, defaults to 0
+        :type level: int, optional
+        :param out: an array of the output's shape (see output_spec) to decode into when the files share their dimensions, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :param validate: Check that the region identifiers are in range, defaults to True
+        :type validate: bool, optional
+        :return: the regions stacked into an (N, height, width, bands) array, or a list of them when their shapes differ
+        :rtype: Union[np.ndarray, List[np.ndarray]]
+        """
+        region_identifiers = [int(i) for i in region_identifiers]
+        if out is None and region_identifiers:
+            out = self._batch_output(region_identifiers)
+        if out is not None:
+            # each file is copied into its slot by the thread that decoded it
+            list(self._get_executor().map(
+                lambda i: self.get_region(region_identifiers[i], out=out[i], validate=validate),
+                range(len(region_identifiers))))
+            return out
+        regions = list(self._get_executor().map(
+            functools.partial(self.get_region, validate=validate), region_identifiers))
+        if regions and all(region.shape == regions[0].shape for region in regions):
+            return np.stack(regions)
+        return regions
+
+    def get_region_dims(self, region_identifier: int) -> Tuple[int, int]:
+        """
+        get_region_dims the dimensions of the image in a file, from the header index
+
+        :param region_identifier: the index of the file (files are indexed alphabetically)
+        :type region_identifier: int
+        :return: (width, height) of the image in the file
+        :rtype: Tuple[int, int]
+        """
+        width, height = self.index.dims[region_identifier]
+        return int(width), int(height)
+
+    def get_region_bands(self, region_identifier: int) -> int:
+        """
+        get_region_bands the number of bands of the image in a file, from the header index
+
+        :param region_identifier: the index of the file (files are indexed alphabetically)
+        :type region_identifier: int
+        :return: the number of bands of the image in the file
+        :rtype: int
+        """
+        return int(self.index.bands[region_identifier])
+
+    def get_region_dtype(self, region_identifier: int) -> np.dtype:
+        """
+        get_region_dtype the dtype of the image in a file, from the header index
+
+        :param region_identifier: the index of the file (files are indexed alphabetically)
+        :type region_identifier: int
+        :return: the dtype of the image in the file
+        :rtype: np.dtype
+        """
+        return np.dtype(self.index.dtypes[region_identifier])
+
+    def _batch_output(self, region_identifiers: List[int]) -> Optional[np.ndarray]:
+        """
+        _batch_output Allocate the array a batch of files is decoded into, when the header index says they share a shape
+
+        :param region_identifiers: the indices of the files read
+        :type region_identifiers: List[int]
+        :return: the (N, height, width, bands) array (or the output_spec's shape) or None when the files' shapes differ
+        :rtype: Optional[np.ndarray]
+        """
+        indices = np.array(region_identifiers)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self.number_of_regions()):
+            return None  # left to get_region to refuse
+        dims, bands, dtypes = self.index.dims[indices], self.index.bands[indices], self.index.dtypes[indices]
+        if (dims != dims[0]).any() or (bands != bands[0]).any() or (dtypes != dtypes[0]).any():
+            return None
+        (width, height), dtype = dims[0], np.dtype(dtypes[0])
+        shape = (len(indices), int(height), int(width), int(bands[0]))
+        if self.output_spec is not None:
+            shape, dtype = self.output_spec.output_shape(shape, self.channel_order), self.output_spec.dtype or dtype
+        return np.empty(shape, dtype=dtype)
 
     def number_of_regions(self, region_dims: Optional[Any] = None) -> int:
         """
@@ -272,14 +1213,47 @@ class ImageReaderDirectory(ImageReader):
         """
         return len(self._region_files)
 
+    def close(self) -> None:
+        """
+        close Stop the thread pool; a later batch starts a new one
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     @property
     def width(self):
-        raise NotImplementedError()
+        """
+        width the width shared by every image file
+
+        :raises NotImplementedError: the image files differ in size
+        :return: Width in pixels
+        :rtype: int
+        """
+        return self.dims[0]
 
     @property
     def height(self):
-        raise NotImplementedError()
+        """
+        height the height shared by every image file
+
+        :raises NotImplementedError: the image files differ in size
+        :return: Height in pixels
+        :rtype: int
+        """
+        return self.dims[1]
 
     @property
     def dims(self):
-        raise NotImplementedError()
+        """
+        dims the (width, height) shared by every image file
+
+        :raises NotImplementedError: the image files differ in size
+        :return: Width and height in pixels
+        :rtype: Tuple[int, int]
+        """
+        if self._uniform_dims is None:
+            raise NotImplementedError(
+                "The image files differ in size, see get_region_dims")
+        return self._uniform_dims
@@ -0,0 +1,221 @@
+"""
+    Opt-in timers, byte counters and latency histograms of the stages of region reads, reported to pluggable sinks
+
+    An ImageReader given an Instrumentation reports the stages of its reads, and its adapter reports the stages inside
+    its own get_region (e.g. decoding and the copy into numpy). Readers without one only pay an `is not None` check.
+"""
+
+import collections
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+# latencies are bucketed by powers of two of microseconds, bucket b holding [2 ** (b - 1), 2 ** b) us
+HISTOGRAM_BUCKETS = 32
+
+Measurement = collections.namedtuple(
+    "Measurement", ["slide", "adapter", "stage", "seconds", "nbytes"])
+
+
+def histogram_bucket(seconds: float) -> int:
+    """
+    histogram_bucket Get the latency histogram bucket of a duration
+
+    :param seconds: The duration
+    :type seconds: float
+    :return: The bucket index
+    :rtype: int
+    """
+    return min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+
+
+class InMemorySink():
+
+    """
+    InMemorySink Aggregates measurements into per slide and per adapter statistics that can be snapshotted at any time
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (slide, adapter, stage) -> [count, seconds, bytes, histogram]
+        self._stages = {}
+
+    def emit(self, measurement: Measurement) -> None:
+        with self._lock:
+            stage = self._stages.get(measurement[:3])
+            if stage is None:
+                stage = self._stages[measurement[:3]] = [0, 0.0, 0, np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)]
+            stage[0] += 1
+            stage[1] += measurement.seconds
+            stage[2] += measurement.nbytes
+            stage[3][histogram_bucket(measurement.seconds)] += 1
+
+    def reset(self) -> None:
+        """
+        reset Forget every measurement
+        """
+        with self._lock:
+            self._stages.clear()
+
+    @staticmethod
+    def _summarize(count: int, seconds: float, nbytes: int, histogram: np.ndarray) -> Dict:
+        """
+        _summarize Summarize the measurements of a stage, estimating percentiles from the upper bounds of the histogram buckets
+
+        :return: JSON-serializable statistics of the stage
+        :rtype: Dict
+        """
+        cumulative = np.cumsum(histogram)
+
+        def percentile_ms(q):
+            return float(2 ** int(np.searchsorted(cumulative, q * count))) / 1000
+
+        return {
+            "count": count,
+            "seconds": seconds,
+            "mean_ms": seconds / count * 1000,
+            "bytes": nbytes,
+            "mb_per_second": nbytes / seconds / (1024 * 1024) if seconds else 0.0,
+            "p50_ms": percentile_ms(0.5),
+            "p99_ms": percentile_ms(0.99),
+            "histogram_us": {2 ** b: int(n) for b, n in enumerate(histogram) if n}
+        }
+
+    def snapshot(self) -> Dict:
+        """
+        snapshot Get the statistics of every stage, per slide and per adapter
+
+        :return: {"slides": {slide: {adapter: {stage: statistics}}}, "adapters": {adapter: {stage: statistics}}}
+        :rtype: Dict
+        """
+        with self._lock:
+            stages = {key: (count, seconds, nbytes, histogram.copy())
+                      for key, (count, seconds, nbytes, histogram) in self._stages.items()}
+        slides, adapters = {}, {}
+        for (slide, adapter, stage), (count, seconds, nbytes, histogram) in stages.items():
+            slides.setdefault(slide, {}).setdefault(adapter, {})[stage] = \
+                self._summarize(count, seconds, nbytes, histogram)
+            totals = adapters.setdefault(adapter, {}).setdefault(
+                stage, [0, 0.0, 0, np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)])
+            totals[0] += count
+            totals[1] += seconds
+            totals[2] += nbytes
+            totals[3] += histogram
+        return {
+            "slides": slides,
+            "adapters": {adapter: {stage: self._summarize(*totals) for stage, totals in stages.items()}
+                         for adapter, stages in adapters.items()}
+        }
+
+
+class LoggingSink():
+
+    """
+    LoggingSink Logs every measurement
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        """
+        __init__ Initialize LoggingSink object
+
+        :param logger: The logger, defaults to None (the unified_image_reader logger)
+        :type logger: Optional[logging.Logger], optional
+        :param level: The level measurements are logged at, defaults to logging.DEBUG
+        :type level: int, optional
+        """
+        self.logger = logger or logging.getLogger("unified_image_reader")
+        self.level = level
+
+    def emit(self, measurement: Measurement) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s %s %s %.3f ms %d bytes", measurement.slide, measurement.adapter,
+                            measurement.stage, measurement.seconds * 1000, measurement.nbytes)
+
+
+class CallbackSink():
+
+    """
+    CallbackSink Passes every measurement to a function, e.g. to feed a metrics client
+    """
+
+    def __init__(self, callback: Callable[[Measurement], None]):
+        self.callback = callback
+
+    def emit(self, measurement: Measurement) -> None:
+        self.callback(measurement)
+
+
+class Recorder():
+
+    """
+    Recorder Reports the measurements of one slide read with one adapter to an Instrumentation
+    """
+
+    __slots__ = ("instrumentation", "slide", "adapter")
+
+    def __init__(self, instrumentation: "Instrumentation", slide: str, adapter: str):
+        self.instrumentation = instrumentation
+        self.slide = slide
+        self.adapter = adapter
+
+    def record(self, stage: str, seconds: float, nbytes: int = 0) -> None:
+        """
+        record Report the duration (and bytes produced) of a stage
+
+        :param stage: The name of the stage, e.g. "validate", "adapter", "decode" or "copy"
+        :type stage: str
+        :param seconds: The duration of the stage
+        :type seconds: float
+        :param nbytes: The bytes the stage produced, defaults to 0
+        :type nbytes: int, optional
+        """
+        self.instrumentation.emit(Measurement(
+            self.slide, self.adapter, stage, seconds, nbytes))
+
+
+class Instrumentation():
+
+    """
+    Instrumentation Collects measurements from any number of readers (possibly on several threads) and dispatches them to its sinks
+    """
+
+    def __init__(self, sinks: Optional[Iterable] = None):
+        """
+        __init__ Initialize Instrumentation object
+
+        :param sinks: Objects with an emit(measurement) method, defaults to None (a single InMemorySink)
+        :type sinks: Optional[Iterable], optional
+        """
+        self.sinks = list(sinks) if sinks is not None else [InMemorySink()]
+
+    def emit(self, measurement: Measurement) -> None:
+        for sink in self.sinks:
+            sink.emit(measurement)
+
+    def recorder(self, slide: str, adapter: str) -> Recorder:
+        """
+        recorder Get a Recorder reporting the measurements of a slide and adapter
+
+        :param slide: Identifies the slide, e.g. its filepath
+        :type slide: str
+        :param adapter: Identifies the adapter, e.g. its class name
+        :type adapter: str
+        :return: The Recorder
+        :rtype: Recorder
+        """
+        return Recorder(self, slide, adapter)
+
+    def snapshot(self) -> Dict:
+        """
+        snapshot Get the statistics of the first InMemorySink
+
+        :raises ValueError: There is no InMemorySink
+        :return: See InMemorySink.snapshot
+        :rtype: Dict
+        """
+        for sink in self.sinks:
+            if isinstance(sink, InMemorySink):
+                return sink.snapshot()
+        raise ValueError("snapshot needs an InMemorySink")
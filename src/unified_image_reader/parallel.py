@@ -0,0 +1,256 @@
+"""
+    Multi-process reading of one image, where decoded regions are handed back through shared memory
+"""
+
+import multiprocessing
+import queue
+import traceback
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import config
+from . import image_reader
+from .transform import OutputSpec
+
+
+def _shard(region_indices: Sequence[int], num_workers: int, chunk_size: int) -> List[List[Tuple[int, List[int]]]]:
+    """
+    _shard Split region_indices into contiguous chunks dealt round-robin to the workers. Each worker's output is then
+    monotonic in position, so an ordered consumer never waits on a worker whose shared memory slots are full.
+
+    :param region_indices: The region indices to read, in output order
+    :type region_indices: Sequence[int]
+    :param num_workers: The number of worker processes
+    :type num_workers: int
+    :param chunk_size: The number of consecutive regions in a chunk
+    :type chunk_size: int
+    :return: The (position of the first region, region indices) chunks of every worker
+    :rtype: List[List[Tuple[int, List[int]]]]
+    """
+    shards = [[] for _ in range(num_workers)]
+    for i, chunk_start in enumerate(range(0, len(region_indices), chunk_size)):
+        shards[i % num_workers].append(
+            (chunk_start, [int(region_index) for region_index in region_indices[chunk_start:chunk_start + chunk_size]]))
+    return shards
+
+
+def _worker(worker_id: int, filepath: str, region_dims: Tuple[int, int], chunks: List[Tuple[int, List[int]]],
+            shm_name: str, slot_shape: Tuple[int, ...], dtype: str,
+            free_slots: multiprocessing.Queue, results: multiprocessing.Queue, reader_options: Dict[str, Any]) -> None:
+    """
+    _worker Read the regions of some chunks with a private ImageReader and publish them through shared memory slots
+
+    :param worker_id: The index of this worker
+    :type worker_id: int
+    :param filepath: Filepath to image file to be opened
+    :type filepath: str
+    :param region_dims: A set of (width, height) coordinates representing the region dimensions
+    :type region_dims: Tuple[int, int]
+    :param chunks: The (position of the first region, region indices) chunks to read
+    :type chunks: List[Tuple[int, List[int]]]
+    :param shm_name: The name of this worker's shared memory ring buffer
+    :type shm_name: str
+    :param slot_shape: The shape of one region
+    :type slot_shape: Tuple[int, ...]
+    :param dtype: The dtype of one region
+    :type dtype: str
+    :param free_slots: Slots this worker may write into (None asks the worker to stop)
+    :type free_slots: multiprocessing.Queue
+    :param results: (worker_id, slot, position) messages to the parent; slot None marks completion or an error
+    :type results: multiprocessing.Queue
+    :param reader_options: The keyword arguments of the worker's ImageReader (see ImageReader.reopen_options)
+    :type reader_options: Dict[str, Any]
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        slots = np.ndarray((shm.size // int(np.prod(slot_shape) * np.dtype(dtype).itemsize), *slot_shape),
+                           dtype=dtype, buffer=shm.buf)
+        reader = image_reader.ImageReader(filepath, **reader_options)
+        for chunk_start, region_indices in chunks:
+            for position, region_index in enumerate(region_indices, chunk_start):
+                slot = free_slots.get()
+                if slot is None:
+                    return
+                reader.get_region(region_index, region_dims, out=slots[slot])
+                results.put((worker_id, slot, position))
+        results.put((worker_id, None, None))
+    except BaseException:
+        results.put((worker_id, None, traceback.format_exc()))
+    finally:
+        slots = None
+        shm.close()
+
+
+class ParallelImageReader():
+
+    """
+    ParallelImageReader Reads a range of regions of one image with several worker processes. Each worker opens its own
+    adapter and writes decoded regions into a shared memory ring buffer, so no pixel data is pickled.
+    """
+
+    def __init__(self, filepath: str, region_dims: Iterable = config.DEFAULT_REGION_DIMS, num_workers: Optional[int] = None,
+                 ordered: bool = True, start: int = 0, stop: Optional[int] = None,
+                 region_indices: Optional[Sequence[int]] = None, chunk_size: int = 16,
+                 slots_per_worker: int = 4, mp_context: str = "spawn", output_spec: Optional[OutputSpec] = None,
+                 reader_options: Optional[Dict[str, Any]] = None):
+        """
+        __init__ Initialize ParallelImageReader object
+
+        :param filepath: Filepath to image file to be opened
+        :type filepath: str
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param num_workers: The number of worker processes, defaults to None (os.cpu_count())
+        :type num_workers: Optional[int], optional
+        :param ordered: Yield regions in index order rather than in completion order, defaults to True
+        :type ordered: bool, optional
+        :param start: The first region index to read, defaults to 0
+        :type start: int, optional
+        :param stop: One past the last region index to read, defaults to None (number of regions)
+        :type stop: Optional[int], optional
+        :param region_indices: Explicit region indices to read in order (such as foreground regions), overriding start and stop, defaults to None
+        :type region_indices: Optional[Sequence[int]], optional
+        :param chunk_size: The number of consecutive regions handed to a worker at a time, defaults to 16
+        :type chunk_size: int, optional
+        :param slots_per_worker: The number of regions in each worker's ring buffer, defaults to 4
+        :type slots_per_worker: int, optional
+        :param mp_context: The multiprocessing start method, defaults to "spawn" ("fork" can deadlock on libvips' threads inherited from the parent)
+        :type mp_context: str, optional
+        :param output_spec: How workers convert regions before publishing them, defaults to None (as the adapter returns them)
+        :type output_spec: Optional[OutputSpec], optional
+        :param reader_options: Keyword arguments of the ImageReaders opened by the parent and the workers, e.g. the
+            reopen_options of a reader to read the same regions as it does, defaults to None
+        :type reader_options: Optional[Dict[str, Any]], optional
+        """
+        self.filepath = filepath
+        self.region_dims = tuple(region_dims)
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.ordered = ordered
+        self.chunk_size = chunk_size
+        self.slots_per_worker = slots_per_worker
+        self._context = multiprocessing.get_context(mp_context)
+        self.reader_options = dict(reader_options or {})
+        if output_spec is not None:
+            self.reader_options["output_spec"] = output_spec
+        output_spec = self.reader_options.get("output_spec")
+        # the parent only opens the image to learn the region count and shape, with the workers' adapter and grid
+        reader = image_reader.ImageReader(filepath, **{**self.reader_options, "output_spec": None, "cache": None})
+        if region_indices is None:
+            stop = reader.number_of_regions(
+                self.region_dims) if stop is None else stop
+            region_indices = range(start, stop)
+        self.region_indices = region_indices
+        region_width, region_height = self.region_dims
+        self.region_shape = (region_height, region_width,
+                             reader.adapter.get_bands())
+        self.dtype = np.dtype(reader.adapter.get_dtype())
+        self.output_spec = output_spec
+        if output_spec is not None:
+            self.region_shape = output_spec.output_shape(self.region_shape, reader.channel_order)
+            self.dtype = output_spec.dtype or self.dtype
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of regions that will be read
+
+        :return: The number of regions
+        :rtype: int
+        """
+        return len(self.region_indices)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        __iter__ Start the workers and yield (region_index, region) pairs. Workers are stopped and shared memory is
+        released when iteration finishes or the iterator is closed.
+
+        :raises RuntimeError: A worker failed to read a region
+        :return: An iterator of (region_index, region) pairs
+        :rtype: Iterator[Tuple[int, np.ndarray]]
+        """
+        shards = [shard for shard in _shard(self.region_indices, self.num_workers, self.chunk_size)
+                  if shard]
+        slot_nbytes = int(np.prod(self.region_shape)) * self.dtype.itemsize
+        results = self._context.Queue()
+        memories, slots, free_slots, processes = [], [], [], []
+        try:
+            for worker_id, chunks in enumerate(shards):
+                shm = shared_memory.SharedMemory(
+                    create=True, size=max(1, slot_nbytes * self.slots_per_worker))
+                memories.append(shm)
+                slots.append(np.ndarray((self.slots_per_worker, *self.region_shape),
+                                        dtype=self.dtype, buffer=shm.buf))
+                free = self._context.Queue()
+                for slot in range(self.slots_per_worker):
+                    free.put(slot)
+                free_slots.append(free)
+                process = self._context.Process(
+                    target=_worker,
+                    args=(worker_id, self.filepath, self.region_dims, chunks, shm.name,
+                          self.region_shape, self.dtype.str, free, results, self.reader_options),
+                    daemon=True)
+                process.start()
+                processes.append(process)
+            yield from self._collect(results, slots, free_slots, processes)
+        finally:
+            for free in free_slots:
+                free.put(None)
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            slots.clear()
+            for shm in memories:
+                shm.close()
+                shm.unlink()
+
+    def _collect(self, results: multiprocessing.Queue, slots: List[np.ndarray], free_slots: List[multiprocessing.Queue],
+                 processes: List[multiprocessing.Process]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        _collect Copy regions out of the workers' slots, release the slots and yield the regions
+
+        :param results: The queue of (worker_id, slot, position) messages
+        :type results: multiprocessing.Queue
+        :param slots: The ring buffer of every worker
+        :type slots: List[np.ndarray]
+        :param free_slots: The free slot queue of every worker
+        :type free_slots: List[multiprocessing.Queue]
+        :param processes: The worker processes
+        :type processes: List[multiprocessing.Process]
+        :raises RuntimeError: A worker failed to read a region or died
+        :return: An iterator of (region_index, region) pairs
+        :rtype: Iterator[Tuple[int, np.ndarray]]
+        """
+        pending = {}
+        next_position = 0
+        running = len(processes)
+
+        def release(worker_id, slot, position):
+            region = slots[worker_id][slot].copy()
+            free_slots[worker_id].put(slot)
+            return int(self.region_indices[position]), region
+
+        while running:
+            try:
+                worker_id, slot, position = results.get(timeout=1)
+            except queue.Empty:
+                dead = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(
+                        f"a worker reading {self.filepath} exited with code {dead[0]}")
+                continue
+            if slot is None:
+                if position is not None:
+                    raise RuntimeError(
+                        f"worker {worker_id} failed reading {self.filepath}:\n{position}")
+                running -= 1
+                continue
+            if not self.ordered:
+                yield release(worker_id, slot, position)
+                continue
+            pending[position] = (worker_id, slot)
+            while next_position in pending:
+                yield release(*pending.pop(next_position), next_position)
+                next_position += 1
@@ -0,0 +1,193 @@
+"""
+    A pool of adapter handles of one file, so that many threads can read the same slide at once without re-opening it
+"""
+
+import contextlib
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from . import config
+from .adapters import Adapter
+from .image_reader import ImageReader
+
+
+class PoolClosedException(Exception):
+    pass
+
+
+class AdapterPool():
+
+    """
+    AdapterPool Lends adapter handles to one caller at a time, opening up to max_handles of them as concurrent callers need them.
+    The most recently returned handle is lent first so that a few handles stay warm when concurrency is low.
+    """
+
+    def __init__(self, factory: Callable[[], Adapter], max_handles: Optional[int] = None, handles: Iterable[Adapter] = ()):
+        """
+        __init__ Initialize AdapterPool object
+
+        :param factory: Opens a new handle
+        :type factory: Callable[[], Adapter]
+        :param max_handles: The maximum number of handles, defaults to None (ADAPTER_POOL_MAX_HANDLES)
+        :type max_handles: Optional[int], optional
+        :param handles: Handles that are already open, defaults to ()
+        :type handles: Iterable[Adapter], optional
+        :raises ValueError: max_handles is not positive
+        """
+        self.max_handles = max_handles or config.ADAPTER_POOL_MAX_HANDLES
+        if self.max_handles < 1:
+            raise ValueError(f"{max_handles=} should be positive")
+        self._factory = factory
+        self._condition = threading.Condition()
+        self.handles = list(handles)
+        self._idle = list(self.handles)
+        self._opening = 0
+        # set by close, after which returned handles are closed instead of kept
+        self.closed = False
+        # the number of times a caller had to wait for a handle to be returned
+        self.waits = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> Adapter:
+        """
+        acquire Take an idle handle, opening one if none is idle and fewer than max_handles are open, otherwise waiting for one
+
+        :param timeout: Seconds to wait for a handle, defaults to None (no limit)
+        :type timeout: Optional[float], optional
+        :raises TimeoutError: No handle was returned within timeout
+        :raises PoolClosedException: The pool was closed (before or while waiting)
+        :return: The handle, which must be given back with release
+        :rtype: Adapter
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            waited = False
+            while True:
+                if self.closed:
+                    raise PoolClosedException("the pool was closed, open the file again")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self.handles) + self._opening < self.max_handles:
+                    self._opening += 1
+                    break
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(
+                        f"no adapter handle was returned within {timeout=} seconds")
+                self._condition.wait(remaining)
+        # open the handle without holding the lock so that other callers can return handles meanwhile
+        handle = None
+        try:
+            handle = self._factory()
+            return handle
+        finally:
+            with self._condition:
+                self._opening -= 1
+                if handle is not None:
+                    self.handles.append(handle)
+                else:  # the slot of a handle that failed to open is free again
+                    self._condition.notify()
+
+    def release(self, handle: Adapter) -> None:
+        """
+        release Give back a handle taken with acquire
+
+        :param handle: The handle
+        :type handle: Adapter
+        """
+        with self._condition:
+            if not self.closed:
+                self._idle.append(handle)
+                self._condition.notify()
+                return
+            self.handles = [h for h in self.handles if h is not handle]
+            self._condition.notify()
+        handle.close()
+
+    @contextlib.contextmanager
+    def lend(self, timeout: Optional[float] = None) -> Iterator[Adapter]:
+        """
+        lend Lend a handle for the duration of a with block
+
+        :param timeout: Seconds to wait for a handle, defaults to None (no limit)
+        :type timeout: Optional[float], optional
+        :return: A context manager giving the handle
+        :rtype: Iterator[Adapter]
+        """
+        handle = self.acquire(timeout)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    def close(self) -> None:
+        """
+        close Close and forget every idle handle; handles still lent out are closed and dropped when they are returned.
+        A closed pool lends no more handles: acquire raises PoolClosedException, also to callers already waiting.
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+            idle = self._idle
+            self._idle = []
+            idle_ids = set(map(id, idle))
+            self.handles = [h for h in self.handles if id(h) not in idle_ids]
+        for handle in idle:
+            handle.close()
+
+
+class PooledImageReader(ImageReader):
+
+    """
+    PooledImageReader An ImageReader safe to share between threads: every read borrows its own adapter handle from an
+    AdapterPool of the file, so concurrent reads run in parallel without re-opening the file per request.
+    The handle opened for the image's geometry (self.adapter) is the pool's first handle.
+    """
+
+    def __init__(self, filepath: str, adapter=None, max_handles: Optional[int] = None, timeout: Optional[float] = None, **kwargs):
+        """
+        __init__ Initialize PooledImageReader object
+
+        :param filepath: Filepath to image file to be opened
+        :type filepath: str
+        :param adapter: Object (or registered name of one) which specifies reading behavior, defaults to None (chosen as by ImageReader)
+        :type adapter: Union[Adapter, str, None], optional
+        :param max_handles: The maximum number of handles open at once, defaults to None (ADAPTER_POOL_MAX_HANDLES)
+        :type max_handles: Optional[int], optional
+        :param timeout: Seconds a read waits for a handle, defaults to None (no limit)
+        :type timeout: Optional[float], optional
+        :param kwargs: Passed to ImageReader, e.g. cache or instrumentation
+        """
+        self.pool = None
+        super().__init__(filepath, adapter, **kwargs)
+        self.timeout = timeout
+        self.pool = AdapterPool(self._open_handle, max_handles, [self.adapter])
+
+    def _open_handle(self) -> Adapter:
+        """
+        _open_handle Open another handle of the file with the same adapter
+
+        :return: The handle
+        :rtype: Adapter
+        """
+        handle = type(self.adapter)(self.filepath)
+        handle.instrumentation = self.instrumentation
+        return handle
+
+    def instrument(self, instrumentation) -> None:
+        super().instrument(instrumentation)
+        if self.pool is not None:
+            for handle in list(self.pool.handles):
+                handle.instrumentation = self.instrumentation
+
+    def _lend_adapter(self):
+        return self.pool.lend(self.timeout)
+
+    def close(self) -> None:
+        """
+        close Close the pool's idle handles, after which reads raise PoolClosedException
+        """
+        self.pool.close()
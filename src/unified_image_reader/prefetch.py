@@ -0,0 +1,111 @@
+"""
+    Read-ahead prefetching of pixel regions on a background thread pool
+"""
+
+import collections
+import concurrent.futures
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+
+class RegionPrefetcher():
+
+    """
+    RegionPrefetcher Iterates over regions in order while up to `prefetch` of the following regions are decoded
+    in the background. In-flight memory is bounded by max_inflight_bytes, estimated from the size of the regions
+    already produced.
+    """
+
+    def __init__(self, get_region: Callable[[int], np.ndarray], region_identifiers: Iterable,
+                 prefetch: int, workers: int = 1, max_inflight_bytes: Optional[int] = None):
+        """
+        __init__ Initialize RegionPrefetcher object
+
+        :param get_region: Function reading one region given its identifier
+        :type get_region: Callable[[int], np.ndarray]
+        :param region_identifiers: Region identifiers in the order the regions should be yielded
+        :type region_identifiers: Iterable
+        :param prefetch: The maximum number of regions being decoded ahead of the consumer
+        :type prefetch: int
+        :param workers: The number of decoding threads, defaults to 1
+        :type workers: int, optional
+        :param max_inflight_bytes: Upper bound on the bytes of regions decoded ahead of the consumer, defaults to None (unbounded)
+        :type max_inflight_bytes: Optional[int], optional
+        :raises ValueError: prefetch or workers is not positive
+        """
+        if prefetch < 1:
+            raise ValueError(f"{prefetch=} should be positive")
+        if workers < 1:
+            raise ValueError(f"{workers=} should be positive")
+        self._get_region = get_region
+        self._region_identifiers = iter(region_identifiers)
+        self.prefetch = prefetch
+        self.max_inflight_bytes = max_inflight_bytes
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="unified_image_reader_prefetch")
+        self._inflight = collections.deque()
+        self._region_nbytes = None
+        self._exhausted = False
+
+    def _fill(self) -> None:
+        """
+        _fill Submit regions until the prefetch depth or the in-flight memory budget is reached
+        """
+        while not self._exhausted and len(self._inflight) < self.prefetch:
+            if self._inflight and self.max_inflight_bytes is not None:
+                # until a region has been produced there is no size estimate, so only one is in flight
+                if self._region_nbytes is None:
+                    return
+                if (len(self._inflight) + 1) * self._region_nbytes > self.max_inflight_bytes:
+                    return
+            try:
+                region_identifier = next(self._region_identifiers)
+            except StopIteration:
+                self._exhausted = True
+                return
+            self._inflight.append(self._executor.submit(
+                self._get_region, region_identifier))
+
+    def __iter__(self):
+        """
+        __iter__ RegionPrefetcher objects are their own iterators
+
+        :return: This RegionPrefetcher
+        :rtype: RegionPrefetcher
+        """
+        return self
+
+    def __next__(self) -> np.ndarray:
+        """
+        __next__ Get the next region in order, topping up the read-ahead queue
+
+        :raises StopIteration: Every region has been yielded
+        :return: The next pixel region
+        :rtype: np.ndarray
+        """
+        self._fill()
+        if not self._inflight:
+            self.close()
+            raise StopIteration
+        region = self._inflight.popleft().result()
+        self._region_nbytes = region.nbytes
+        self._fill()
+        return region
+
+    def close(self) -> None:
+        """
+        close Cancel regions that haven't started decoding and wait for the worker threads to stop
+        """
+        self._exhausted = True
+        for future in self._inflight:
+            future.cancel()
+        self._inflight.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        self.close()
+        return None
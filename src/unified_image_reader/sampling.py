@@ -0,0 +1,223 @@
+"""
+    Randomized region sampling for training that reads spatially local blocks of regions together
+
+    Drawing regions uniformly at random scatters the reads across the file, so every region decodes its own tiles
+    from a cold page cache. A LocalitySampler instead groups an epoch's draws into blocks of neighbouring regions, reads
+    each block with one get_regions call (one decode of its bounding box) and restores the randomness of the stream
+    with a bounded shuffle buffer.
+"""
+
+import collections
+import math
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from . import config
+
+# a sampled region: the grid region it was drawn from, the (width, height) coordinates of its top-left pixel (off the
+# grid when jittered) and its pixels (None when only the order is asked for)
+Sample = collections.namedtuple("Sample", ["region_index", "coordinates", "region"])
+
+
+class LocalitySampler():
+
+    """
+    LocalitySampler A reproducible, shuffled stream visiting every candidate region of a grid once per epoch. A
+    locality fraction of the regions is drawn in blocks of up to block_regions neighbouring regions (a cell of the
+    grid), the rest in blocks of regions scattered over the image; the blocks are read in random order and their
+    regions pass through a buffer of buffer_regions from which they are yielded at random. locality 0 is a uniform
+    shuffle; higher locality, bigger blocks and smaller buffers read faster but correlate neighbouring samples more.
+    """
+
+    def __init__(self, reader, region_dims: Iterable = config.DEFAULT_REGION_DIMS, level: int = 0,
+                 region_indices: Optional[Iterable[int]] = None, block_regions: Optional[int] = None,
+                 locality: Optional[float] = None, buffer_regions: Optional[int] = None, jitter: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        __init__ Initialize LocalitySampler object
+
+        :param reader: The reader of the image, an ImageReader or a reader with the same grid and get_regions
+        :type reader: ImageReader
+        :param region_dims: A set of (width, height) coordinates representing the region dimensions, defaults to DEFAULT_REGION_DIMS
+        :type region_dims: Iterable, optional
+        :param level: The pyramid level to read from (0 is full resolution), defaults to 0
+        :type level: int, optional
+        :param region_indices: The candidate regions, e.g. the indices of a ForegroundIndex, defaults to None (every region of the grid)
+        :type region_indices: Optional[Iterable[int]], optional
+        :param block_regions: The number of regions read together, defaults to None (SAMPLING_BLOCK_REGIONS)
+        :type block_regions: Optional[int], optional
+        :param locality: The fraction of regions drawn in blocks of neighbours, from 0 to 1, defaults to None (SAMPLING_LOCALITY)
+        :type locality: Optional[float], optional
+        :param buffer_regions: The number of regions the shuffle buffer holds, defaults to None (SAMPLING_BUFFER_REGIONS)
+        :type buffer_regions: Optional[int], optional
+        :param jitter: The largest random displacement of a region from its grid position along each axis, as a
+            fraction of the grid stride (clamped to the level), defaults to 0.0 (grid positions)
+        :type jitter: float, optional
+        :param seed: Seed of the sampling, defaults to None (a fresh seed, kept in the seed attribute)
+        :type seed: Optional[int], optional
+        :raises ValueError: block_regions or buffer_regions is not positive, or locality or jitter is out of range
+        :raises IndexError: A candidate region index is out of range
+        """
+        self.reader = reader
+        self.region_dims = tuple(int(d) for d in region_dims)
+        self.level = level
+        self.block_regions = block_regions or config.SAMPLING_BLOCK_REGIONS
+        self.locality = config.SAMPLING_LOCALITY if locality is None else float(locality)
+        self.buffer_regions = buffer_regions or config.SAMPLING_BUFFER_REGIONS
+        self.jitter = float(jitter)
+        if self.block_regions < 1:
+            raise ValueError(f"{block_regions=} should be positive")
+        if self.buffer_regions < 1:
+            raise ValueError(f"{buffer_regions=} should be positive")
+        if not 0 <= self.locality <= 1:
+            raise ValueError(f"{locality=} should be between 0 and 1")
+        if self.jitter < 0:
+            raise ValueError(f"{jitter=} should not be negative")
+        # a seed is always kept so that any sampler's stream can be reproduced
+        self.seed = np.random.SeedSequence().entropy if seed is None else seed
+        self.epoch = 0
+        self.grid = reader.grid(self.region_dims, level)
+        if region_indices is None:
+            self.region_indices = np.arange(len(self.grid), dtype=np.int64)
+        else:
+            self.region_indices = np.asarray(region_indices, dtype=np.int64).reshape(-1)
+            if self.region_indices.size and \
+                    (self.region_indices.min() < 0 or self.region_indices.max() >= len(self.grid)):
+                raise IndexError(f"region indices should be in [0, {len(self.grid)})")
+        # cells of about block_regions neighbouring regions, as square as possible
+        self.cell_columns = math.ceil(math.sqrt(self.block_regions))
+        self.cell_rows = math.ceil(self.block_regions / self.cell_columns)
+
+    def _rng(self, epoch: int) -> np.random.Generator:
+        """
+        _rng Get the random generator of an epoch, independent of the epochs drawn before it
+
+        :return: The generator
+        :rtype: np.random.Generator
+        """
+        return np.random.default_rng([self.seed, epoch])
+
+    def _blocks(self, rng: np.random.Generator) -> List[np.ndarray]:
+        """
+        _blocks Split the candidate regions into the blocks of an epoch, in the order they are read
+
+        :param rng: The epoch's random generator
+        :type rng: np.random.Generator
+        :return: The region indices of every block, ascending within a block
+        :rtype: List[np.ndarray]
+        """
+        region_indices = self.region_indices
+        if region_indices.size == 0:
+            return []
+        local = rng.random(region_indices.size) < self.locality
+        rows, columns = np.divmod(region_indices, max(self.grid.columns, 1))
+        cell_columns = -(-max(self.grid.columns, 1) // self.cell_columns)
+        cells = (rows // self.cell_rows) * cell_columns + columns // self.cell_columns
+        # neighbours are grouped by cell, everything else is dealt into groups of block_regions at random
+        scattered = np.flatnonzero(~local)
+        groups = np.where(local, cells, 0)
+        groups[scattered] = cells.max() + 1 + rng.permutation(scattered.size) // self.block_regions
+        order = np.lexsort((rng.random(region_indices.size), groups))
+        boundaries = np.flatnonzero(np.diff(groups[order])) + 1
+        blocks = []
+        for group in np.split(order, boundaries):
+            # a cell holds up to cell_columns * cell_rows regions, which may be a few more than block_regions
+            for block in np.array_split(group, -(-group.size // self.block_regions)):
+                blocks.append(np.sort(region_indices[block]))
+        return [blocks[i] for i in rng.permutation(len(blocks))]
+
+    def _coordinates(self, region_indices: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        _coordinates Get the coordinates of a block's regions, jittered off the grid and clamped to the level
+
+        :return: An (N, 2) array of (width, height) coordinates representing the top-left pixels of the regions
+        :rtype: np.ndarray
+        """
+        coordinates = self.grid.indices_to_coordinates(region_indices)
+        if self.jitter:
+            reach = (np.array(self.grid.stride) * self.jitter).astype(np.int64)
+            coordinates = coordinates + rng.integers(-reach, reach + 1, size=coordinates.shape)
+            limits = np.array([self.grid.image_width, self.grid.image_height]) - self.region_dims
+            coordinates = np.clip(coordinates, 0, limits)
+        return coordinates
+
+    def _read(self, region_coordinates: np.ndarray) -> List[np.ndarray]:
+        """
+        _read Read a block's regions with one get_regions call
+
+        :return: The regions, each its own array so that the buffer doesn't keep whole blocks alive
+        :rtype: List[np.ndarray]
+        """
+        regions = self.reader.get_regions(region_coordinates, self.region_dims, self.level, validate=False)
+        if len(regions) == 1:
+            return list(regions)
+        return [region.copy() for region in regions]
+
+    def _stream(self, epoch: int, read: bool) -> Iterator[Sample]:
+        """
+        _stream Draw the samples of an epoch through the shuffle buffer
+
+        :param epoch: The epoch
+        :type epoch: int
+        :param read: Whether to read the regions' pixels
+        :type read: bool
+        :return: An iterator over the samples
+        :rtype: Iterator[Sample]
+        """
+        rng = self._rng(epoch)
+        buffer = []
+        for block in self._blocks(rng):
+            coordinates = self._coordinates(block, rng)
+            regions = self._read(coordinates) if read else [None] * len(block)
+            buffer.extend(Sample(int(i), (int(x), int(y)), region)
+                          for i, (x, y), region in zip(block, coordinates, regions))
+            while len(buffer) >= self.buffer_regions:
+                # swap a random sample to the end and yield it
+                i = rng.integers(len(buffer))
+                buffer[i], buffer[-1] = buffer[-1], buffer[i]
+                yield buffer.pop()
+        for i in rng.permutation(len(buffer)):
+            yield buffer[i]
+
+    def order(self, epoch: Optional[int] = None) -> Iterator[Sample]:
+        """
+        order Get the samples of an epoch without reading them, in the order samples would yield them
+
+        :param epoch: The epoch, defaults to None (the sampler's current epoch)
+        :type epoch: Optional[int], optional
+        :return: An iterator over the samples, whose regions are None
+        :rtype: Iterator[Sample]
+        """
+        return self._stream(self.epoch if epoch is None else epoch, read=False)
+
+    def samples(self, epoch: Optional[int] = None) -> Iterator[Sample]:
+        """
+        samples Read the samples of an epoch in shuffled order, the same for the same seed and epoch
+
+        :param epoch: The epoch, defaults to None (the sampler's current epoch)
+        :type epoch: Optional[int], optional
+        :return: An iterator over the samples
+        :rtype: Iterator[Sample]
+        """
+        return self._stream(self.epoch if epoch is None else epoch, read=True)
+
+    def __iter__(self) -> Iterator[Sample]:
+        """
+        __iter__ Read the samples of the current epoch and move on to the next epoch
+
+        :return: An iterator over the samples
+        :rtype: Iterator[Sample]
+        """
+        epoch = self.epoch
+        self.epoch += 1
+        return self.samples(epoch)
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of samples per epoch
+
+        :return: The number of candidate regions
+        :rtype: int
+        """
+        return int(self.region_indices.size)
@@ -0,0 +1,699 @@
+"""
+    A local HTTP server of slide metadata, regions and DeepZoom tiles, backed by ImageReaders and shared caches
+
+    GET /slides                                      the served slides
+    GET /slides/<name>                               a slide's dimensions, levels, bands, dtype and native tiles
+    GET /slides/<name>.dzi                           the DeepZoom descriptor of a slide
+    GET /slides/<name>_files/<level>/<col>_<row>.<format>   a DeepZoom tile
+    GET /slides/<name>/region?x=&y=&width=&height=[&level=][&format=png|jpeg|npy]   a region
+    GET /metrics                                     per endpoint latency and throughput, reads and caches
+
+    Requests are served on a thread each. Slides are kept open in a bounded pool of PooledImageReaders that share one
+    cache of decoded regions, and encoded DeepZoom tiles are cached too. Responses carry an ETag derived from the
+    slide's file signature and the request, so revalidating a tile answers 304 without reading it.
+"""
+
+import argparse
+import collections
+import contextlib
+import email.utils
+import hashlib
+import http.server
+import io
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from . import config
+from .cache import RegionCache
+from .export import slide_names
+from .image_reader import InvalidCoordinatesException, InvalidDimensionsException, InvalidLevelException
+from .instrumentation import Instrumentation, Measurement
+from .pool import PoolClosedException, PooledImageReader
+
+FORMATS = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "npy": "application/x-npy"
+}
+# DeepZoom tiles are images, regions may also be raw arrays
+TILE_FORMATS = ("jpeg", "png")
+
+ROUTES = [
+    ("slides", re.compile(r"^/slides/?$")),
+    ("dzi", re.compile(r"^/slides/(?P<name>[^/]+)\.dzi$")),
+    ("tile", re.compile(r"^/slides/(?P<name>[^/]+)_files/(?P<level>\d+)/(?P<column>\d+)_(?P<row>\d+)\.(?P<format>\w+)$")),
+    ("region", re.compile(r"^/slides/(?P<name>[^/]+)/region$")),
+    ("info", re.compile(r"^/slides/(?P<name>[^/]+)$")),
+    ("metrics", re.compile(r"^/metrics$"))
+]
+
+logger = logging.getLogger("unified_image_reader")
+
+
+class RequestException(Exception):
+
+    """
+    RequestException A request the server can't answer, with the HTTP status to answer it with
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# an answer to a request: the HTTP status, its headers and its body
+Response = collections.namedtuple("Response", ["status", "headers", "body"])
+
+
+def encode(region: np.ndarray, image_format: str, quality: int = 90, dims: Optional[Tuple[int, int]] = None) -> bytes:
+    """
+    encode Compress a region into an image file's (or an npy file's) bytes, resizing it first when asked to
+
+    :param region: A (height, width, bands) array
+    :type region: np.ndarray
+    :param image_format: One of FORMATS
+    :type image_format: str
+    :param quality: The JPEG quality, defaults to 90
+    :type quality: int, optional
+    :param dims: The (width, height) to resize the region to, defaults to None (as it is)
+    :type dims: Optional[Tuple[int, int]], optional
+    :return: The bytes of the file
+    :rtype: bytes
+    """
+    if image_format == "npy" and dims is None:
+        buffer = io.BytesIO()
+        np.save(buffer, region, allow_pickle=False)
+        return buffer.getvalue()
+    import pyvips  # only servers encode
+    if image_format == "jpeg" and region.shape[-1] in (2, 4):
+        region = region[..., :-1]  # JPEG has no alpha
+    image = pyvips.Image.new_from_array(np.ascontiguousarray(region))
+    if dims is not None and (image.width, image.height) != tuple(dims):
+        image = image.thumbnail_image(dims[0], height=dims[1], size="force")
+    return image.write_to_buffer(".png" if image_format == "png" else f".jpg[Q={quality}]")
+
+
+class DeepZoom():
+
+    """
+    DeepZoom The DeepZoom pyramid of a slide: level L of level_count halves the full resolution level_count - 1 - L
+    times and is cut into tiles of tile_size pixels, each extended by overlap pixels on every side facing another tile.
+    Tiles are read from the slide level that needs the least downsampling without upsampling.
+    """
+
+    def __init__(self, reader, tile_size: int = config.SERVER_TILE_SIZE, overlap: int = config.SERVER_TILE_OVERLAP):
+        """
+        __init__ Initialize DeepZoom object
+
+        :param reader: The reader of the slide
+        :type reader: ImageReader
+        :param tile_size: The width and height of tiles without their overlap, defaults to SERVER_TILE_SIZE
+        :type tile_size: int, optional
+        :param overlap: The pixels a tile extends into its neighbours, defaults to SERVER_TILE_OVERLAP
+        :type overlap: int, optional
+        :raises ValueError: tile_size is not positive or overlap is negative
+        """
+        if tile_size < 1 or overlap < 0:
+            raise ValueError(f"{tile_size=} should be positive and {overlap=} not negative")
+        self.reader = reader
+        self.tile_size = tile_size
+        self.overlap = overlap
+        dims = [tuple(reader.dims)]
+        while dims[-1] != (1, 1):
+            dims.append(tuple(max(1, math.ceil(d / 2)) for d in dims[-1]))
+        # from 1x1 up to full resolution
+        self.level_dims = dims[::-1]
+        self.level_count = len(self.level_dims)
+
+    def tiles(self, level: int) -> Tuple[int, int]:
+        """
+        tiles Get the number of columns and rows of tiles of a level
+
+        :param level: The DeepZoom level
+        :type level: int
+        :return: The columns and rows
+        :rtype: Tuple[int, int]
+        """
+        return tuple(math.ceil(d / self.tile_size) for d in self.level_dims[level])
+
+    def tile_region(self, level: int, column: int, row: int) -> Tuple[int, Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
+        """
+        tile_region Locate the slide region a tile is made from
+
+        :param level: The DeepZoom level
+        :type level: int
+        :param column: The tile's column
+        :type column: int
+        :param row: The tile's row
+        :type row: int
+        :raises IndexError: There is no such tile
+        :return: The slide level, the (width, height) coordinates and dimensions of the region on it and the (width, height) of the tile
+        :rtype: Tuple[int, Tuple[int, int], Tuple[int, int], Tuple[int, int]]
+        """
+        if not 0 <= level < self.level_count:
+            raise IndexError(f"{level=} should be in [0, {self.level_count})")
+        columns, rows = self.tiles(level)
+        if not (0 <= column < columns and 0 <= row < rows):
+            raise IndexError(f"tile ({column}, {row}) of level {level} should be within ({columns}, {rows})")
+        level_width, level_height = self.level_dims[level]
+        left = column * self.tile_size - (self.overlap if column else 0)
+        top = row * self.tile_size - (self.overlap if row else 0)
+        tile_dims = (min(level_width, (column + 1) * self.tile_size + self.overlap) - left,
+                     min(level_height, (row + 1) * self.tile_size + self.overlap) - top)
+        downsample = 2 ** (self.level_count - 1 - level)
+        slide_level = self.reader.best_level_for_downsample(downsample)
+        slide_width, slide_height = self.reader.level_dims(slide_level)
+        # the DeepZoom level's pixels in the slide level's pixels, per axis
+        scale_x = slide_width / level_width
+        scale_y = slide_height / level_height
+        x, y = min(int(left * scale_x), slide_width - 1), min(int(top * scale_y), slide_height - 1)
+        region_dims = (max(1, min(math.ceil(tile_dims[0] * scale_x), slide_width - x)),
+                       max(1, min(math.ceil(tile_dims[1] * scale_y), slide_height - y)))
+        return slide_level, (x, y), region_dims, tile_dims
+
+    def dzi(self, image_format: str = config.SERVER_TILE_FORMAT) -> str:
+        """
+        dzi Get the DeepZoom descriptor of the slide
+
+        :param image_format: The format of the tiles, defaults to SERVER_TILE_FORMAT
+        :type image_format: str, optional
+        :return: The XML of the descriptor
+        :rtype: str
+        """
+        width, height = self.level_dims[-1]
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                f'Format="{"jpg" if image_format == "jpeg" else image_format}" '
+                f'Overlap="{self.overlap}" TileSize="{self.tile_size}">'
+                f'<Size Width="{width}" Height="{height}"/></Image>\n')
+
+
+class SlidePool():
+
+    """
+    SlidePool The served slides by name, at most max_open of them open at once (the least recently used one being
+    closed to open another), all reading through one cache of decoded regions
+    """
+
+    def __init__(self, slides: Mapping[str, str], max_open: int = config.SERVER_MAX_OPEN_SLIDES,
+                 cache: Optional[RegionCache] = None, instrumentation: Optional[Instrumentation] = None,
+                 tile_size: int = config.SERVER_TILE_SIZE, overlap: int = config.SERVER_TILE_OVERLAP):
+        """
+        __init__ Initialize SlidePool object
+
+        :param slides: The filepath of every slide by name
+        :type slides: Mapping[str, str]
+        :param max_open: The maximum number of slides open at once, defaults to SERVER_MAX_OPEN_SLIDES
+        :type max_open: int, optional
+        :param cache: The cache of decoded regions shared by the slides, defaults to None (no caching)
+        :type cache: Optional[RegionCache], optional
+        :param instrumentation: Where the slides report the timings of reads, defaults to None
+        :type instrumentation: Optional[Instrumentation], optional
+        :param tile_size: The DeepZoom tile size, defaults to SERVER_TILE_SIZE
+        :type tile_size: int, optional
+        :param overlap: The DeepZoom tile overlap, defaults to SERVER_TILE_OVERLAP
+        :type overlap: int, optional
+        :raises ValueError: max_open is not positive
+        """
+        if max_open < 1:
+            raise ValueError(f"{max_open=} should be positive")
+        self.slides = dict(slides)
+        self.max_open = max_open
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self._open = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def filepath(self, name: str) -> str:
+        """
+        filepath Get the filepath of a slide
+
+        :raises RequestException: There is no such slide (404)
+        :return: The filepath
+        :rtype: str
+        """
+        filepath = self.slides.get(name)
+        if filepath is None:
+            raise RequestException(404, f"there is no slide {name!r}")
+        return filepath
+
+    def get(self, name: str) -> Tuple[PooledImageReader, DeepZoom]:
+        """
+        get Get the reader and DeepZoom pyramid of a slide, opening it when it isn't open
+
+        :param name: The slide's name
+        :type name: str
+        :raises RequestException: There is no such slide (404)
+        :return: The reader and the pyramid
+        :rtype: Tuple[PooledImageReader, DeepZoom]
+        """
+        filepath = self.filepath(name)
+        with self._lock:
+            slide = self._open.get(name)
+            if slide is not None:
+                self._open.move_to_end(name)
+                return slide
+        # open outside the lock so that other slides are served meanwhile; a slide opened twice at once is opened once more
+        reader = PooledImageReader(filepath, cache=self.cache, instrumentation=self.instrumentation)
+        slide = (reader, DeepZoom(reader, self.tile_size, self.overlap))
+        with self._lock:
+            slide = self._open.setdefault(name, slide)
+            self._open.move_to_end(name)
+            while len(self._open) > self.max_open:
+                _, (evicted, _) = self._open.popitem(last=False)
+                # reads in flight keep their handles, only the idle ones are forgotten
+                evicted.close()
+        return slide
+
+    def read(self, name: str, read: Callable[[PooledImageReader, DeepZoom], Any]) -> Any:
+        """
+        read Read from a slide, opening it again when it was closed (evicted by other slides) before the read got a handle
+
+        :param name: The slide's name
+        :type name: str
+        :param read: Reads from the slide's reader and pyramid
+        :type read: Callable[[PooledImageReader, DeepZoom], Any]
+        :raises RequestException: There is no such slide (404)
+        :return: What read returns
+        :rtype: Any
+        """
+        while True:
+            try:
+                return read(*self.get(name))
+            except PoolClosedException:
+                pass
+
+    def close(self) -> None:
+        """
+        close Close every open slide
+        """
+        with self._lock:
+            slides = list(self._open.values())
+            self._open.clear()
+        for reader, _ in slides:
+            reader.close()
+
+    def __len__(self) -> int:
+        """
+        __len__ Get the number of open slides
+
+        :return: The number of open slides
+        :rtype: int
+        """
+        return len(self._open)
+
+
+class TileServer(contextlib.AbstractContextManager):
+
+    """
+    TileServer Serves slides over HTTP from a ThreadingHTTPServer, on a background thread after start() or on the
+    calling thread with serve_forever(). Port 0 picks a free port (see url).
+    """
+
+    def __init__(self, slides: Union[Mapping[str, str], Iterable[str]], host: str = config.SERVER_HOST,
+                 port: int = config.SERVER_PORT, tile_size: int = config.SERVER_TILE_SIZE,
+                 overlap: int = config.SERVER_TILE_OVERLAP, tile_format: str = config.SERVER_TILE_FORMAT,
+                 quality: int = 90, max_open: int = config.SERVER_MAX_OPEN_SLIDES,
+                 region_cache_bytes: int = config.SERVER_REGION_CACHE_BYTES,
+                 tile_cache_bytes: int = config.SERVER_TILE_CACHE_BYTES):
+        """
+        __init__ Initialize TileServer object, binding its socket
+
+        :param slides: The filepath of every slide by name, or filepaths named after their files (see export.slide_names)
+        :type slides: Union[Mapping[str, str], Iterable[str]]
+        :param host: The interface to listen on, defaults to SERVER_HOST
+        :type host: str, optional
+        :param port: The port to listen on, 0 for any free port, defaults to SERVER_PORT
+        :type port: int, optional
+        :param tile_size: The DeepZoom tile size, defaults to SERVER_TILE_SIZE
+        :type tile_size: int, optional
+        :param overlap: The DeepZoom tile overlap, defaults to SERVER_TILE_OVERLAP
+        :type overlap: int, optional
+        :param tile_format: The format DeepZoom descriptors advertise, one of TILE_FORMATS, defaults to SERVER_TILE_FORMAT
+        :type tile_format: str, optional
+        :param quality: The JPEG quality, defaults to 90
+        :type quality: int, optional
+        :param max_open: The maximum number of slides open at once, defaults to SERVER_MAX_OPEN_SLIDES
+        :type max_open: int, optional
+        :param region_cache_bytes: The memory budget of decoded regions shared by the slides, defaults to SERVER_REGION_CACHE_BYTES
+        :type region_cache_bytes: int, optional
+        :param tile_cache_bytes: The memory budget of encoded DeepZoom tiles, defaults to SERVER_TILE_CACHE_BYTES
+        :type tile_cache_bytes: int, optional
+        :raises ValueError: tile_format isn't one of TILE_FORMATS
+        """
+        if tile_format not in TILE_FORMATS:
+            raise ValueError(f"{tile_format=} should be one of {TILE_FORMATS}")
+        if not isinstance(slides, Mapping):
+            slides = list(slides)
+            slides = dict(zip(slide_names(slides), slides))
+        self.tile_format = tile_format
+        self.quality = quality
+        self.instrumentation = Instrumentation()
+        self.region_cache = RegionCache(region_cache_bytes)
+        self.tile_cache = RegionCache(tile_cache_bytes)
+        self.pool = SlidePool(slides, max_open, self.region_cache, self.instrumentation, tile_size, overlap)
+        self.started = time.time()
+        self._thread = None
+        self._serving = False
+        self.httpd = http.server.ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.tile_server = self
+
+    @property
+    def url(self) -> str:
+        """
+        url Get the base URL of the server
+
+        :return: http://host:port
+        :rtype: str
+        """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "TileServer":
+        """
+        start Serve on a background thread
+
+        :return: The server
+        :rtype: TileServer
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.httpd.serve_forever, name="TileServer", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        serve_forever Serve on the calling thread until stop() is called from another thread
+        """
+        self._serving = True
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self._serving = False
+
+    def stop(self) -> None:
+        """
+        stop Stop serving, release the socket and close the slides
+        """
+        if self._thread is not None or self._serving:
+            self.httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+        self.pool.close()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        self.stop()
+        return super().__exit__(exc_type, exc_value, traceback)
+
+    def handle(self, path: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+        """
+        handle Answer a GET request, timing it per endpoint
+
+        :param path: The request's path and query string
+        :type path: str
+        :param headers: The request's headers, defaults to None
+        :type headers: Optional[Mapping[str, str]], optional
+        :return: The response
+        :rtype: Response
+        """
+        start = time.perf_counter()
+        headers = headers or {}
+        url = urllib.parse.urlsplit(path)
+        endpoint, slide = "unknown", "-"
+        try:
+            for endpoint, pattern in ROUTES:
+                match = pattern.match(urllib.parse.unquote(url.path))
+                if match is not None:
+                    break
+            else:
+                endpoint = "unknown"
+                raise RequestException(404, f"there is nothing at {url.path}")
+            arguments = match.groupdict()
+            if "name" in arguments:
+                slide = self.pool.filepath(arguments["name"])
+            query = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+            response = getattr(self, f"_{endpoint}")(arguments, query, headers)
+        except RequestException as e:
+            response = _error(e.status, str(e))
+        except Exception as e:  # a failed read answers 500 rather than dropping the connection
+            logger.exception("failed to serve %s", path)
+            response = _error(500, f"{type(e).__name__}: {e}")
+        # requests are measured as the stages (named after their endpoints) of a pseudo adapter named "server"
+        self.instrumentation.emit(Measurement(slide, "server", endpoint, time.perf_counter() - start, len(response.body)))
+        return response
+
+    def _validators(self, name: str, variant: str) -> Dict[str, str]:
+        """
+        _validators Get the caching headers of a response about a slide: an ETag of the slide's file signature and
+        the variant of the response, and the slide's modification time
+
+        :return: The headers
+        :rtype: Dict[str, str]
+        """
+        stat = os.stat(self.pool.filepath(name))
+        signature = f"{stat.st_mtime_ns}:{stat.st_size}:{name}:{variant}"
+        return {
+            "ETag": f'"{hashlib.sha1(signature.encode()).hexdigest()[:20]}"',
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": f"public, max-age={config.SERVER_MAX_AGE}"
+        }
+
+    @staticmethod
+    def _not_modified(validators: Dict[str, str], headers: Mapping[str, str]) -> bool:
+        """
+        _not_modified Whether a conditional request's copy is still current (If-None-Match wins over If-Modified-Since)
+
+        :return: Whether to answer 304
+        :rtype: bool
+        """
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # weak comparison: W/"x" matches "x"
+            tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+            return "*" in tags or validators["ETag"] in tags
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            with contextlib.suppress(TypeError, ValueError):
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+                modified = email.utils.parsedate_to_datetime(validators["Last-Modified"]).timestamp()
+                return modified <= since
+        return False
+
+    def _conditional(self, name: str, variant: str, headers: Mapping[str, str], content_type: str,
+                     body) -> Response:
+        """
+        _conditional Answer with a body made on demand, or 304 when the client's copy is current
+
+        :param body: Makes the body (bytes) when it is needed
+        :type body: Callable[[], bytes]
+        :return: The response
+        :rtype: Response
+        """
+        validators = self._validators(name, variant)
+        if self._not_modified(validators, headers):
+            return Response(304, validators, b"")
+        return Response(200, {"Content-Type": content_type, **validators}, body())
+
+    def _slides(self, arguments, query, headers) -> Response:
+        return _json({name: {"info": f"/slides/{urllib.parse.quote(name)}",
+                             "dzi": f"/slides/{urllib.parse.quote(name)}.dzi"}
+                      for name in self.pool.slides})
+
+    def _info(self, arguments, query, headers) -> Response:
+        name = arguments["name"]
+
+        def info():
+            reader, deep_zoom = self.pool.get(name)
+            tile_info = reader.tile_info()
+            return json.dumps({
+                "name": name,
+                "dims": list(reader.dims),
+                "levels": [list(dims) for dims in reader.levels],
+                "level_downsamples": reader.level_downsamples,
+                "bands": reader.adapter.get_bands(),
+                "dtype": np.dtype(reader.adapter.get_dtype()).name,
+                "channel_order": reader.channel_order,
+                "tile": None if tile_info is None else tile_info._asdict(),
+                "deep_zoom": {"levels": deep_zoom.level_count, "tile_size": deep_zoom.tile_size,
+                              "overlap": deep_zoom.overlap, "format": self.tile_format}
+            }).encode()
+
+        return self._conditional(name, "info", headers, "application/json", info)
+
+    def _dzi(self, arguments, query, headers) -> Response:
+        name = arguments["name"]
+        return self._conditional(name, f"dzi:{self.tile_format}", headers, "application/xml",
+                                 lambda: self.pool.get(name)[1].dzi(self.tile_format).encode())
+
+    def _tile(self, arguments, query, headers) -> Response:
+        name, image_format = arguments["name"], arguments["format"]
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format not in TILE_FORMATS:
+            raise RequestException(404, f"tiles are served as {TILE_FORMATS}, not {image_format}")
+        level, column, row = (int(arguments[key]) for key in ("level", "column", "row"))
+        variant = f"tile:{level}:{column}:{row}:{image_format}:{self.quality}"
+
+        def tile():
+            filepath = self.pool.filepath(name)
+            key = (filepath, variant, os.stat(filepath).st_mtime_ns)
+            encoded = self.tile_cache.get(key)
+            if encoded is None:
+                def read(reader, deep_zoom):
+                    try:
+                        slide_level, coordinates, region_dims, tile_dims = deep_zoom.tile_region(level, column, row)
+                    except IndexError as e:
+                        raise RequestException(404, str(e))
+                    return reader.get_region(coordinates, region_dims, slide_level, validate=False), tile_dims
+
+                region, tile_dims = self.pool.read(name, read)
+                encoded = self.tile_cache.put(key, np.frombuffer(
+                    encode(region, image_format, self.quality, tile_dims), dtype=np.uint8))
+            return memoryview(encoded)
+
+        return self._conditional(name, variant, headers, FORMATS[image_format], tile)
+
+    def _region(self, arguments, query, headers) -> Response:
+        name = arguments["name"]
+        try:
+            x, y, width, height = (int(query[key]) for key in ("x", "y", "width", "height"))
+            level = int(query.get("level", 0))
+        except (KeyError, ValueError):
+            raise RequestException(400, "x, y, width and height should be given as integers (and level if at all)")
+        image_format = query.get("format", "png")
+        if image_format not in FORMATS:
+            raise RequestException(400, f"regions are served as {tuple(FORMATS)}, not {image_format}")
+        if width * height > config.SERVER_MAX_REGION_PIXELS:
+            raise RequestException(400, f"regions are at most {config.SERVER_MAX_REGION_PIXELS} pixels")
+
+        def read(reader, deep_zoom):
+            try:
+                return reader.get_region((x, y), (width, height), level)
+            except (IndexError, ValueError, InvalidCoordinatesException, InvalidDimensionsException,
+                    InvalidLevelException) as e:
+                raise RequestException(400, f"{type(e).__name__}: {e}")
+
+        def region():
+            return encode(self.pool.read(name, read), image_format, self.quality)
+
+        variant = f"region:{x}:{y}:{width}:{height}:{level}:{image_format}:{self.quality}"
+        return self._conditional(name, variant, headers, FORMATS[image_format], region)
+
+    def _metrics(self, arguments, query, headers) -> Response:
+        return _json(self.metrics(), cache=False)
+
+    def metrics(self) -> Dict:
+        """
+        metrics Get the latency and throughput of every endpoint, the timings of the slides' reads and the caches' counters
+
+        :return: {"endpoints": {endpoint: statistics}, "slides": {filepath: {adapter: {stage: statistics}}},
+            "caches": {cache: counters}, "open_slides": int, "uptime_seconds": float}
+        :rtype: Dict
+        """
+        snapshot = self.instrumentation.snapshot()
+        uptime = time.time() - self.started
+        endpoints = snapshot["adapters"].get("server", {})
+        for statistics in endpoints.values():
+            statistics["requests_per_second"] = statistics["count"] / uptime if uptime else 0.0
+        return {
+            "endpoints": endpoints,
+            "slides": snapshot["slides"],
+            "caches": {"regions": self.region_cache.stats(), "tiles": self.tile_cache.stats()},
+            "open_slides": len(self.pool),
+            "uptime_seconds": uptime
+        }
+
+
+def _json(content, cache: bool = True) -> Response:
+    """
+    _json Answer with JSON
+
+    :return: The response
+    :rtype: Response
+    """
+    headers = {"Content-Type": "application/json"}
+    if not cache:
+        headers["Cache-Control"] = "no-store"
+    return Response(200, headers, json.dumps(content).encode())
+
+
+def _error(status: int, message: str) -> Response:
+    """
+    _error Answer with an error and its message as JSON
+
+    :return: The response
+    :rtype: Response
+    """
+    return Response(status, {"Content-Type": "application/json", "Cache-Control": "no-store"},
+                    json.dumps({"error": message}).encode())
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+
+    """
+    _Handler Passes every request to the TileServer and writes its response
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._respond(head=False)
+
+    def do_HEAD(self) -> None:
+        self._respond(head=True)
+
+    def _respond(self, head: bool) -> None:
+        response = self.server.tile_server.handle(self.path, self.headers)
+        self.send_response(response.status)
+        for header, value in response.headers.items():
+            self.send_header(header, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if not head and response.body:
+            self.wfile.write(response.body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s " + format, self.address_string(), *args)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="uir-serve", description="Serve slides' metadata, regions and DeepZoom tiles over HTTP")
+    parser.add_argument("slides", nargs="+", help="slides, named after their files")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT, help="0 for any free port")
+    parser.add_argument("--tile-size", type=int, default=config.SERVER_TILE_SIZE)
+    parser.add_argument("--overlap", type=int, default=config.SERVER_TILE_OVERLAP)
+    parser.add_argument("--format", choices=TILE_FORMATS, default=config.SERVER_TILE_FORMAT,
+                        help="the format of DeepZoom tiles")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality")
+    parser.add_argument("--max-open", type=int, default=config.SERVER_MAX_OPEN_SLIDES, help="slides kept open")
+    args = parser.parse_args(argv)
+    with TileServer(args.slides, args.host, args.port, args.tile_size, args.overlap, args.format, args.quality,
+                    args.max_open) as server:
+        print(f"serving {len(server.pool.slides)} slides at {server.url}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
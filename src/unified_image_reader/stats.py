@@ -0,0 +1,367 @@
+"""
+    Whole-slide channel statistics and thumbnails, computed in one streaming pass over a low resolution level and
+    persisted next to the image
+"""
+
+import hashlib
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from . import config
+from . import util
+from .foreground import ForegroundIndex
+
+SIDECAR_SUFFIX = ".stats.npz"
+THUMBNAIL_SIDECAR_SUFFIX = ".thumbnail.npz"
+
+# a mask restricting statistics to part of an image: a boolean array covering the image at any resolution,
+# a ForegroundIndex, or a function mapping pixels to a boolean array
+Mask = Union[np.ndarray, ForegroundIndex, Callable[[np.ndarray], np.ndarray], None]
+
+
+def value_range(dtype: np.dtype) -> Tuple[float, float]:
+    """
+    value_range Get the range fixed histogram bins span for a dtype: every value of an integer dtype, [0, 1) for floats
+
+    :param dtype: The dtype of the pixels
+    :type dtype: np.dtype
+    :return: The (low, high) range
+    :rtype: Tuple[float, float]
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return float(info.min), float(info.max) + 1
+    return 0.0, 1.0
+
+
+class RunningStats():
+
+    """
+    RunningStats Per-channel count, mean, variance, minimum, maximum and fixed-bin histogram of a stream of pixels.
+    Each batch of pixels is summarized with vectorized sums and merged with Chan et al.'s parallel form of Welford's
+    update, so batches can be any size and RunningStats of disjoint pixels can be merged.
+    """
+
+    def __init__(self, bands: int, bins: int = config.STATS_HISTOGRAM_BINS, value_range: Tuple[float, float] = (0.0, 256.0)):
+        """
+        __init__ Initialize RunningStats object
+
+        :param bands: The number of channels
+        :type bands: int
+        :param bins: The number of histogram bins per channel, defaults to STATS_HISTOGRAM_BINS
+        :type bins: int, optional
+        :param value_range: The (low, high) range the bins span evenly; values outside it fall in the first or last bin, defaults to (0, 256)
+        :type value_range: Tuple[float, float], optional
+        """
+        self.bands = bands
+        self.bins = bins
+        self.value_range = tuple(float(v) for v in value_range)
+        self.count = 0
+        self.mean = np.zeros(bands)
+        self.m2 = np.zeros(bands)
+        self.minimum = np.full(bands, np.inf)
+        self.maximum = np.full(bands, -np.inf)
+        self.histogram = np.zeros((bands, bins), dtype=np.int64)
+
+    def update(self, pixels: np.ndarray) -> None:
+        """
+        update Add a batch of pixels
+
+        :param pixels: An (N, bands) array (or any array whose last axis is the bands)
+        :type pixels: np.ndarray
+        """
+        pixels = pixels.reshape(-1, self.bands)
+        count = len(pixels)
+        if count == 0:
+            return
+        values = pixels.astype(np.float64)
+        mean = values.mean(axis=0)
+        m2 = np.einsum("ij,ij->j", values, values) - count * mean * mean
+        self._merge(count, mean, np.maximum(m2, 0), values.min(axis=0), values.max(axis=0))
+        low, high = self.value_range
+        bins = ((values - low) * (self.bins / (high - low))).astype(np.int64)
+        np.clip(bins, 0, self.bins - 1, out=bins)
+        # one bincount for every channel at once, each channel's bins offset past the previous channel's
+        bins += np.arange(self.bands) * self.bins
+        self.histogram += np.bincount(bins.ravel(), minlength=self.bands * self.bins).reshape(self.bands, self.bins)
+
+    def _merge(self, count: int, mean: np.ndarray, m2: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> None:
+        """
+        _merge Merge the summary of other pixels into this one
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta * delta * (self.count * count / total)
+        self.count = total
+        self.minimum = np.minimum(self.minimum, minimum)
+        self.maximum = np.maximum(self.maximum, maximum)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        merge Add the pixels summarized by another RunningStats with the same bins
+
+        :param other: The other RunningStats
+        :type other: RunningStats
+        :raises ValueError: The bins differ
+        :return: self
+        :rtype: RunningStats
+        """
+        if (other.bands, other.bins, other.value_range) != (self.bands, self.bins, self.value_range):
+            raise ValueError("only RunningStats with the same bands and bins can be merged")
+        if other.count:
+            self._merge(other.count, other.mean, other.m2, other.minimum, other.maximum)
+            self.histogram += other.histogram
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        variance Get the population variance of every channel
+
+        :return: The variances
+        :rtype: np.ndarray
+        """
+        return self.m2 / max(self.count, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """
+        std Get the population standard deviation of every channel
+
+        :return: The standard deviations
+        :rtype: np.ndarray
+        """
+        return np.sqrt(self.variance)
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        """
+        bin_edges Get the bins + 1 edges of the histogram bins
+
+        :return: The edges
+        :rtype: np.ndarray
+        """
+        return np.linspace(*self.value_range, self.bins + 1)
+
+    def save(self, path: str, signature: Optional[dict] = None) -> bool:
+        """
+        save Persist the statistics atomically (see util.write_sidecar)
+
+        :param path: Where to write the statistics
+        :type path: str
+        :param signature: Values identifying the image and parameters the statistics were computed from, defaults to None
+        :type signature: Optional[dict], optional
+        """
+        return util.write_sidecar(path, lambda f: np.savez(
+            f, count=self.count, mean=self.mean, m2=self.m2, minimum=self.minimum, maximum=self.maximum,
+            histogram=self.histogram, value_range=np.array(self.value_range),
+            **{f"signature_{k}": np.array(v) for k, v in (signature or {}).items()}))
+
+    @classmethod
+    def load(cls, path: str, signature: Optional[dict] = None) -> Optional["RunningStats"]:
+        """
+        load Read persisted statistics if they exist and match the signature
+
+        :param path: Where the statistics were written
+        :type path: str
+        :param signature: Values that must match the ones the statistics were saved with, defaults to None
+        :type signature: Optional[dict], optional
+        :return: The RunningStats or None when they are missing, unreadable or stale
+        :rtype: Optional[RunningStats]
+        """
+        try:
+            with np.load(path) as data:
+                for k, v in (signature or {}).items():
+                    if f"signature_{k}" not in data or data[f"signature_{k}"].tolist() != np.array(v).tolist():
+                        return None
+                histogram = data["histogram"]
+                stats = cls(histogram.shape[0], histogram.shape[1], tuple(data["value_range"].tolist()))
+                stats.count = int(data["count"])
+                stats.mean, stats.m2 = data["mean"], data["m2"]
+                stats.minimum, stats.maximum = data["minimum"], data["maximum"]
+                stats.histogram = histogram
+                return stats
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def adequate_level(reader, min_pixels: int = config.STATS_MIN_PIXELS) -> int:
+    """
+    adequate_level Get the lowest resolution level the adapter offers with at least min_pixels pixels
+    (full resolution when even that has fewer)
+
+    :param reader: The ImageReader of the image
+    :type reader: ImageReader
+    :param min_pixels: The fewest pixels statistics are computed from, defaults to STATS_MIN_PIXELS
+    :type min_pixels: int, optional
+    :return: The pyramid level
+    :rtype: int
+    """
+    return max((level for level, (width, height) in enumerate(reader.levels) if width * height >= min_pixels),
+               default=0)
+
+
+def _mask_lookup(mask: Union[np.ndarray, ForegroundIndex], image_dims: Tuple[int, int],
+                 level_dims: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    _mask_lookup Map the columns and rows of a level to the cells of a mask covering the image
+
+    :return: The boolean mask, padded with a False row and column, and the mask column of every level column and the
+        mask row of every level row (pointing at the padding outside the area the mask covers)
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    if isinstance(mask, ForegroundIndex):
+        # the grid covers whole regions only, leaving out the partial regions along the right and bottom edges
+        cells = mask.grid
+        extent = (cells.shape[1] * mask.region_dims[0], cells.shape[0] * mask.region_dims[1])
+    else:
+        cells = np.asarray(mask, dtype=bool)
+        extent = image_dims
+    padded = np.zeros((cells.shape[0] + 1, cells.shape[1] + 1), dtype=bool)
+    padded[:-1, :-1] = cells
+    lookups = []
+    for axis, cell_count in ((0, cells.shape[1]), (1, cells.shape[0])):
+        # the full resolution position of every level pixel's center
+        positions = (np.arange(level_dims[axis]) + 0.5) * (image_dims[axis] / level_dims[axis])
+        lookup = (positions * (cell_count / extent[axis])).astype(np.int64)
+        lookup[positions >= extent[axis]] = cell_count
+        lookups.append(lookup)
+    return padded, lookups[0], lookups[1]
+
+
+def compute(reader, level: Optional[int] = None, mask: Mask = None, bins: int = config.STATS_HISTOGRAM_BINS,
+            min_pixels: int = config.STATS_MIN_PIXELS) -> RunningStats:
+    """
+    compute Stream a pyramid level through RunningStats in full-width strips
+
+    :param reader: The ImageReader of the image
+    :type reader: ImageReader
+    :param level: The pyramid level, defaults to None (adequate_level)
+    :type level: Optional[int], optional
+    :param mask: Restricts the statistics to part of the image, defaults to None (every pixel)
+    :type mask: Union[np.ndarray, ForegroundIndex, Callable[[np.ndarray], np.ndarray], None], optional
+    :param bins: The number of histogram bins per channel, defaults to STATS_HISTOGRAM_BINS
+    :type bins: int, optional
+    :param min_pixels: The fewest pixels of the level chosen when level is None, defaults to STATS_MIN_PIXELS
+    :type min_pixels: int, optional
+    :return: The statistics
+    :rtype: RunningStats
+    """
+    if level is None:
+        level = adequate_level(reader, min_pixels)
+    width, height = reader.level_dims(level)
+    lookup = None
+    if mask is not None and not callable(mask):
+        lookup = _mask_lookup(mask, reader.dims, (width, height))
+    stats = None
+    strip_height = max(1, config.STATS_STRIP_PIXELS // width)
+    for top in range(0, height, strip_height):
+        rows = min(strip_height, height - top)
+        # strips bypass the region cache, which they would only churn
+        strip = reader._adapter_get_region((0, top), (width, rows), level)
+        if stats is None:
+            stats = RunningStats(strip.shape[-1], bins, value_range(strip.dtype))
+        if mask is None:
+            stats.update(strip)
+        elif lookup is not None:
+            cells, columns, mask_rows = lookup
+            stats.update(strip[cells[mask_rows[top:top + rows, None], columns[None, :]]])
+        else:
+            stats.update(strip[np.asarray(mask(strip), dtype=bool)])
+    return stats
+
+
+def mask_signature(mask: Mask, mask_key: Optional[str] = None) -> Optional[str]:
+    """
+    mask_signature Identify a mask so that cached and persisted statistics are only reused for the same mask
+
+    :param mask: The mask
+    :type mask: Union[np.ndarray, ForegroundIndex, Callable[[np.ndarray], np.ndarray], None]
+    :param mask_key: Identifies a mask function, which its name can't (lambdas share one and a function's body may
+        change), defaults to None
+    :type mask_key: Optional[str], optional
+    :return: "" without a mask, the key of a mask function, a digest of a mask's cells, or None for a mask function
+        without a key (whose statistics mustn't be reused)
+    :rtype: Optional[str]
+    """
+    if mask is None:
+        return ""
+    if isinstance(mask, ForegroundIndex):
+        return "foreground:" + hashlib.sha1(np.packbits(mask.grid).tobytes() + str(mask.grid.shape).encode() +
+                                            str(mask.region_dims).encode()).hexdigest()
+    if callable(mask):
+        return None if mask_key is None else f"function:{mask_key}"
+    cells = np.asarray(mask, dtype=bool)
+    return "mask:" + hashlib.sha1(np.packbits(cells).tobytes() + str(cells.shape).encode()).hexdigest()
+
+
+def for_reader(reader, level: Optional[int] = None, mask: Mask = None, bins: int = config.STATS_HISTOGRAM_BINS,
+               min_pixels: int = config.STATS_MIN_PIXELS, persist: bool = True, mask_key: Optional[str] = None) -> RunningStats:
+    """
+    for_reader Load the statistics persisted next to the image or compute (and persist) them. The statistics of a mask
+    function are only persisted when it is given a mask_key.
+
+    :param reader: The ImageReader of the image
+    :type reader: ImageReader
+    :param level: The pyramid level, defaults to None (adequate_level)
+    :type level: Optional[int], optional
+    :param mask: Restricts the statistics to part of the image, defaults to None (every pixel)
+    :type mask: Union[np.ndarray, ForegroundIndex, Callable[[np.ndarray], np.ndarray], None], optional
+    :param bins: The number of histogram bins per channel, defaults to STATS_HISTOGRAM_BINS
+    :type bins: int, optional
+    :param min_pixels: The fewest pixels of the level chosen when level is None, defaults to STATS_MIN_PIXELS
+    :type min_pixels: int, optional
+    :param persist: Whether to reuse and write the statistics next to the image, defaults to True
+    :type persist: bool, optional
+    :param mask_key: Identifies a mask function (see mask_signature), defaults to None
+    :type mask_key: Optional[str], optional
+    :return: The statistics
+    :rtype: RunningStats
+    """
+    if level is None:
+        level = adequate_level(reader, min_pixels)
+    mask_key = mask_signature(mask, mask_key)
+    persist = persist and mask_key is not None
+    path = util.sidecar_path(reader.filepath, SIDECAR_SUFFIX)
+    signature = {"file": util.file_signature(reader.filepath), "level": level, "bins": bins, "mask": mask_key}
+    if persist:
+        stats = RunningStats.load(path, signature)
+        if stats is not None:
+            return stats
+    stats = compute(reader, level, mask, bins)
+    if persist:
+        stats.save(path, signature)
+    return stats
+
+
+def thumbnail_for_reader(reader, max_dims: Iterable = config.STATS_THUMBNAIL_DIMS, persist: bool = True) -> np.ndarray:
+    """
+    thumbnail_for_reader Load the thumbnail persisted next to the image or get it from the adapter's cheapest low
+    resolution read (and persist it)
+
+    :param reader: The ImageReader of the image
+    :type reader: ImageReader
+    :param max_dims: A set of (width, height) coordinates bounding the thumbnail dimensions, defaults to STATS_THUMBNAIL_DIMS
+    :type max_dims: Iterable, optional
+    :param persist: Whether to reuse and write the thumbnail next to the image, defaults to True
+    :type persist: bool, optional
+    :return: A numpy array of the downscaled image
+    :rtype: np.ndarray
+    """
+    max_dims = tuple(int(d) for d in max_dims)
+    path = util.sidecar_path(reader.filepath, THUMBNAIL_SIDECAR_SUFFIX)
+    signature = np.array([*util.file_signature(reader.filepath), *max_dims])
+    if persist:
+        try:
+            with np.load(path) as data:
+                if np.array_equal(data["signature"], signature):
+                    return data["thumbnail"]
+        except (OSError, ValueError, KeyError):
+            pass
+    thumbnail = np.ascontiguousarray(reader.adapter.get_thumbnail(max_dims))
+    if persist:
+        util.write_sidecar(path, lambda f: np.savez(f, thumbnail=thumbnail, signature=signature))
+    return thumbnail
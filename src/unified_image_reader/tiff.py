@@ -0,0 +1,324 @@
+"""
+    Magic-byte detection of image formats and a minimal reader of TIFF (and BigTIFF) image file directories
+
+    Only the directory entries are parsed, no pixel data is read.
+"""
+
+import functools
+import os
+import struct
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from . import config, util
+
+# tags
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC = 262
+IMAGE_DESCRIPTION = 270
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+ROWS_PER_STRIP = 278
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+PREDICTOR = 317
+TILE_WIDTH = 322
+TILE_LENGTH = 323
+TILE_OFFSETS = 324
+TILE_BYTE_COUNTS = 325
+SUB_IFDS = 330
+JPEG_TABLES = 347
+SAMPLE_FORMAT = 339
+
+# the tags describing a directory's pixels, which read_header decodes without the (possibly huge) tile and strip offsets
+HEADER_TAGS = frozenset((IMAGE_WIDTH, IMAGE_LENGTH, BITS_PER_SAMPLE, COMPRESSION, PHOTOMETRIC, IMAGE_DESCRIPTION,
+                         SAMPLES_PER_PIXEL, PLANAR_CONFIGURATION, PREDICTOR, TILE_WIDTH, TILE_LENGTH, SAMPLE_FORMAT))
+
+PHOTOMETRIC_RGB = 2
+# SampleFormat -> numpy dtype kind
+SAMPLE_FORMATS = {1: "u", 2: "i", 3: "f"}
+
+COMPRESSION_NAMES = {
+    1: "none",
+    5: "lzw",
+    6: "ojpeg",
+    7: "jpeg",
+    8: "deflate",
+    32773: "packbits",
+    32946: "deflate",
+    33003: "jpeg2000",
+    33005: "jpeg2000",
+    34712: "jpeg2000",
+    50000: "zstd",
+    50001: "webp"
+}
+
+# field type -> (numpy dtype, size in bytes); rationals are pairs of 32 bit integers
+FIELD_TYPES = {
+    1: ("u1", 1),   # BYTE
+    2: ("S1", 1),   # ASCII
+    3: ("u2", 2),   # SHORT
+    4: ("u4", 4),   # LONG
+    5: ("u4", 8),   # RATIONAL
+    6: ("i1", 1),   # SBYTE
+    7: ("u1", 1),   # UNDEFINED
+    8: ("i2", 2),   # SSHORT
+    9: ("i4", 4),   # SLONG
+    10: ("i4", 8),  # SRATIONAL
+    11: ("f4", 4),  # FLOAT
+    12: ("f8", 8),  # DOUBLE
+    13: ("u4", 4),  # IFD
+    16: ("u8", 8),  # LONG8
+    17: ("i8", 8),  # SLONG8
+    18: ("u8", 8)   # IFD8
+}
+
+# the leading bytes of the formats detect_format recognizes
+MAGIC_BYTES = (
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"II+\x00", "bigtiff"),
+    (b"MM\x00+", "bigtiff"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"RIFF", "webp")
+)
+
+
+class TiffFormatException(Exception):
+    pass
+
+
+def detect_format(path: str) -> Optional[str]:
+    """
+    detect_format Identify an image format by its leading bytes, telling Aperio SVS files apart from other TIFFs by their description
+
+    :param path: Filepath to the image
+    :type path: str
+    :return: "svs", "tiff", "bigtiff", "jpeg", "png", "webp" or None when the format isn't recognized
+    :rtype: Optional[str]
+    """
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for magic, image_format in MAGIC_BYTES:
+        if head.startswith(magic):
+            break
+    else:
+        return None
+    if image_format == "webp" and head[8:12] != b"WEBP":
+        return None
+    if image_format in ("tiff", "bigtiff"):
+        try:
+            description = read_header(path)[0].get(IMAGE_DESCRIPTION, "")
+        except (TiffFormatException, OSError):
+            return image_format
+        if description.startswith("Aperio"):
+            return "svs"
+    return image_format
+
+
+def _read_value(f: BinaryIO, byte_order: str, field_type: int, count: int, inline: bytes, offset_format: str):
+    """
+    _read_value Decode the value of a directory entry, which is stored inline when it fits and at an offset otherwise
+
+    :return: A str for ASCII, bytes for UNDEFINED, a scalar for single values and a numpy array for several
+    :rtype: Union[str, bytes, int, float, np.ndarray]
+    """
+    if field_type not in FIELD_TYPES:
+        return None
+    dtype, size = FIELD_TYPES[field_type]
+    nbytes = size * count
+    if nbytes <= len(inline):
+        data = inline[:nbytes]
+    else:
+        f.seek(struct.unpack(byte_order + offset_format, inline)[0])
+        data = f.read(nbytes)
+    if field_type == 2:
+        return data.split(b"\x00", 1)[0].decode("latin-1")
+    if field_type == 7:
+        return data
+    values = np.frombuffer(data, dtype=np.dtype(dtype).newbyteorder(byte_order))
+    if field_type in (5, 10):
+        values = values[0::2] / np.maximum(values[1::2], 1)
+    return values[0].item() if count == 1 else values
+
+
+def read_ifds(path: str, max_ifds: Optional[int] = None, tags: Optional[Iterable[int]] = None) -> List[Dict]:
+    """
+    read_ifds Read the image file directories of a TIFF or BigTIFF file in file order, following SubIFDs after the
+    directory that points to them
+
+    :param path: Filepath to the TIFF
+    :type path: str
+    :param max_ifds: Stop after this many directories, defaults to None (all of them)
+    :type max_ifds: Optional[int], optional
+    :param tags: Only decode the values of these tags, defaults to None (every tag)
+    :type tags: Optional[Iterable[int]], optional
+    :raises TiffFormatException: The file isn't a TIFF or its directories are truncated or corrupt
+    :return: A {tag: value} dict per directory
+    :rtype: List[Dict]
+    """
+    tags = None if tags is None else frozenset(tags)
+    with open(path, "rb") as f:
+        header = f.read(16)
+        byte_order = {b"II": "<", b"MM": ">"}.get(header[:2])
+        if byte_order is None:
+            raise TiffFormatException(f"{path} is not a TIFF")
+        try:
+            ifds = _read_ifds(f, header, byte_order, max_ifds, tags)
+        except (struct.error, ValueError) as e:
+            raise TiffFormatException(f"{path} has a corrupt directory: {e}") from e
+    if not ifds:
+        raise TiffFormatException(f"{path} has no image file directory")
+    return ifds
+
+
+def _read_ifds(f: BinaryIO, header: bytes, byte_order: str, max_ifds: Optional[int], tags: Optional[frozenset]) -> List[Dict]:
+    """
+    _read_ifds Walk the directories of an open TIFF for read_ifds
+
+    :raises TiffFormatException: The TIFF version is unknown
+    :return: A {tag: value} dict per directory
+    :rtype: List[Dict]
+    """
+    version = struct.unpack(byte_order + "H", header[2:4])[0]
+    if version == 42:
+        first, count_format, entry_size, offset_format = struct.unpack(byte_order + "I", header[4:8])[0], "H", 12, "I"
+    elif version == 43:
+        first, count_format, entry_size, offset_format = struct.unpack(byte_order + "Q", header[8:16])[0], "Q", 20, "Q"
+    else:
+        raise TiffFormatException(f"{f.name} is not a TIFF ({version=})")
+    count_size, offset_size = struct.calcsize(count_format), struct.calcsize(offset_format)
+    ifds, pending, seen = [], [first], set()
+    while pending and (max_ifds is None or len(ifds) < max_ifds):
+        offset = pending.pop(0)
+        if offset == 0 or offset in seen:
+            continue
+        seen.add(offset)
+        f.seek(offset)
+        entries = struct.unpack(byte_order + count_format, f.read(count_size))[0]
+        table = f.read(entries * entry_size + offset_size)
+        ifd = {}
+        for i in range(entries):
+            entry = table[i * entry_size:(i + 1) * entry_size]
+            tag, field_type = struct.unpack(byte_order + "HH", entry[:4])
+            if tags is not None and tag not in tags and tag != SUB_IFDS:
+                continue
+            count = struct.unpack(byte_order + offset_format, entry[4:4 + offset_size])[0]
+            ifd[tag] = (field_type, count, entry[4 + offset_size:])
+        # values stored at offsets are read after the table so that the reads don't interleave
+        ifd = {tag: _read_value(f, byte_order, field_type, count, inline, offset_format)
+               for tag, (field_type, count, inline) in ifd.items()}
+        following = [struct.unpack(byte_order + offset_format, table[-offset_size:])[0]]
+        if SUB_IFDS in ifd:
+            following = list(np.atleast_1d(ifd[SUB_IFDS]).tolist()) + following
+            if tags is not None and SUB_IFDS not in tags:
+                del ifd[SUB_IFDS]
+        ifds.append(ifd)
+        pending = following + pending
+    return ifds
+
+
+def read_header(path: str) -> Tuple[Dict, ...]:
+    """
+    read_header Read the header tags (see HEADER_TAGS) of the first two directories of a TIFF, enough to tell its
+    format, layout and whether it is a pyramid. The result is cached by file signature, so that the several
+    inspections of a file while it is opened parse it once.
+
+    :param path: Filepath to the TIFF
+    :type path: str
+    :raises TiffFormatException: The file isn't a TIFF or its directories are truncated or corrupt
+    :return: A {tag: value} dict per directory, shared between callers and not to be modified
+    :rtype: Tuple[Dict, ...]
+    """
+    path = os.path.abspath(path)
+    return _read_header(path, util.file_signature(path))
+
+
+@functools.lru_cache(maxsize=config.TIFF_HEADER_CACHE_SIZE)
+def _read_header(path: str, file_signature: Tuple[int, int]) -> Tuple[Dict, ...]:
+    """
+    _read_header Read the header tags of a version of a file for read_header
+
+    :return: A {tag: value} dict per directory
+    :rtype: Tuple[Dict, ...]
+    """
+    return tuple(read_ifds(path, max_ifds=2, tags=HEADER_TAGS))
+
+
+def layout(ifd: Dict) -> Dict:
+    """
+    layout Summarize the pixel layout of a directory
+
+    :param ifd: A directory from read_ifds
+    :type ifd: Dict
+    :return: width, height, compression name, tile_width and tile_height (None for stripped images) and samples
+    :rtype: Dict
+    """
+    compression = ifd.get(COMPRESSION, 1)
+    return {
+        "width": ifd.get(IMAGE_WIDTH),
+        "height": ifd.get(IMAGE_LENGTH),
+        "compression": COMPRESSION_NAMES.get(compression, str(compression)),
+        "tile_width": ifd.get(TILE_WIDTH),
+        "tile_height": ifd.get(TILE_LENGTH),
+        "samples": ifd.get(SAMPLES_PER_PIXEL, 1)
+    }
+
+
+def byte_order(path: str) -> str:
+    """
+    byte_order Get the byte order of a TIFF
+
+    :param path: Filepath to the TIFF
+    :type path: str
+    :raises TiffFormatException: The file isn't a TIFF
+    :return: "<" for little endian or ">" for big endian
+    :rtype: str
+    """
+    with open(path, "rb") as f:
+        order = {b"II": "<", b"MM": ">"}.get(f.read(2))
+    if order is None:
+        raise TiffFormatException(f"{path} is not a TIFF")
+    return order
+
+
+def sample_dtype(ifd: Dict, order: str = "<") -> np.dtype:
+    """
+    sample_dtype Get the numpy dtype of the samples of a directory
+
+    :param ifd: A directory from read_ifds
+    :type ifd: Dict
+    :param order: The byte order of the file, defaults to "<"
+    :type order: str, optional
+    :return: The dtype
+    :rtype: np.dtype
+    """
+    bits = int(np.atleast_1d(ifd.get(BITS_PER_SAMPLE, 1))[0])
+    kind = SAMPLE_FORMATS.get(int(np.atleast_1d(ifd.get(SAMPLE_FORMAT, 1))[0]), "u")
+    return np.dtype(f"{order}{kind}{max(1, bits // 8)}")
+
+
+def read_tile(path: str, ifd: Dict, tile_index: int) -> bytes:
+    """
+    read_tile Read the stored (still compressed) bytes of a tile
+
+    :param path: Filepath to the TIFF
+    :type path: str
+    :param ifd: The directory of the tile from read_ifds
+    :type ifd: Dict
+    :param tile_index: The tile's index in row-major order
+    :type tile_index: int
+    :return: The tile's bytes
+    :rtype: bytes
+    """
+    # a directory of a single tile stores its offset and byte count as scalars
+    offset = int(np.atleast_1d(ifd[TILE_OFFSETS])[tile_index])
+    byte_count = int(np.atleast_1d(ifd[TILE_BYTE_COUNTS])[tile_index])
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(byte_count)
@@ -0,0 +1,72 @@
+"""
+    Materialize every region of an image into a tile store that the TileStore adapter reads back with near-zero CPU
+"""
+
+import json
+import os
+from typing import Iterable, Union
+
+import numpy as np
+
+from . import config
+from . import image
+from . import image_reader
+from . import util
+from .adapters.tile_store import TILE_STORE_VERSION
+
+TILE_STORE_EXTENSION = "tiles"
+
+
+def materialize(source: Union[str, "image.Image", "image_reader.ImageReader"], output_path: str,
+                region_dims: Iterable = config.DEFAULT_REGION_DIMS, level: int = 0) -> str:
+    """
+    materialize Decode every region of an image once and write them uncompressed into a tile store. The store is an
+    index file (output_path, which should end in .tiles) next to a .npy file of shape (rows, columns, height, width, bands).
+    Both are written to temporary files first so that an interrupted run never leaves a store that looks complete.
+
+    :param source: A filepath, Image or ImageReader of the image to materialize
+    :type source: Union[str, Image, ImageReader]
+    :param output_path: Filepath of the tile store's index file
+    :type output_path: str
+    :param region_dims: A set of (width, height) coordinates representing the dimensions of a tile, defaults to DEFAULT_REGION_DIMS
+    :type region_dims: Iterable, optional
+    :param level: The pyramid level to materialize, defaults to 0
+    :type level: int, optional
+    :return: output_path
+    :rtype: str
+    """
+    if isinstance(source, str):
+        source = image_reader.ImageReader(source)
+    elif isinstance(source, image.Image):
+        source = source.reader
+    region_width, region_height = region_dims
+    # the source's own grid, so that tile k of the store is region k of the source
+    tile_grid = source.grid(region_dims, level)
+    if tile_grid.stride != (region_width, region_height):
+        raise ValueError(f"a tile store's tiles are adjacent, but the source's regions are {tile_grid.stride} apart")
+    columns, rows = tile_grid.columns, tile_grid.rows
+    data_path = f"{output_path}.npy"
+    with util.atomic_path(data_path) as temporary_data_path:
+        tiles = np.lib.format.open_memmap(
+            temporary_data_path, mode="w+", dtype=source.adapter.get_dtype(),
+            shape=(rows, columns, region_height, region_width, source.adapter.get_bands()))
+        try:
+            # one batched read per row of tiles, decoded straight into the memory-mapped file as the adapter returns them
+            # (the source's output_spec isn't applied: a reader of the store applies its own)
+            for row in range(rows):
+                source._get_regions(tile_grid.indices_to_coordinates(np.arange(row * columns, (row + 1) * columns)),
+                                    region_dims, level, out=tiles[row])
+            tiles.flush()
+        finally:
+            del tiles
+    index = {
+        "version": TILE_STORE_VERSION,
+        "data": os.path.basename(data_path),
+        "source": os.path.abspath(source.filepath),
+        "source_signature": list(util.file_signature(source.filepath)),
+        "level": level,
+        "region_dims": [region_width, region_height],
+        "grid": [rows, columns]
+    }
+    util.write_atomically(output_path, lambda f: json.dump(index, f, indent=2), mode="w")
+    return output_path
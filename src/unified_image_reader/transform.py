@@ -0,0 +1,143 @@
+"""
+    Declarative conversion of pixel regions into the layout, dtype, channel order and normalization a consumer expects,
+    written into the final buffer in one pass
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+LAYOUTS = ("HWC", "CHW")
+CHANNEL_ORDERS = ("RGB", "BGR")
+
+
+class OutputSpec():
+
+    """
+    OutputSpec How regions are handed to a consumer: their layout (HWC or CHW), dtype, channel order, whether an alpha band
+    is dropped and a per-channel (x - mean) / std normalization, with mean and std in the units of the stored pixels
+    (e.g. 0-255 for uint8). Every output channel is written straight from its source channel, so converting a region
+    allocates nothing but the output.
+    """
+
+    def __init__(self, layout: str = "HWC", dtype=None, channel_order: str = "RGB", drop_alpha: bool = False,
+                 mean: Optional[Iterable[float]] = None, std: Optional[Iterable[float]] = None):
+        """
+        __init__ Initialize OutputSpec object
+
+        :param layout: "HWC" (height, width, channels) or "CHW" (channels, height, width), defaults to "HWC"
+        :type layout: str, optional
+        :param dtype: The dtype of the output, defaults to None (float32 when normalizing, otherwise the stored dtype)
+        :type dtype: np.dtype, optional
+        :param channel_order: "RGB" or "BGR", applied to images of 3 or more bands, defaults to "RGB"
+        :type channel_order: str, optional
+        :param drop_alpha: Whether to drop the last band of images of 2 or 4 bands, defaults to False
+        :type drop_alpha: bool, optional
+        :param mean: The value subtracted from every output channel (or one value for all), defaults to None (0)
+        :type mean: Optional[Iterable[float]], optional
+        :param std: The value every output channel is divided by (or one value for all), defaults to None (1)
+        :type std: Optional[Iterable[float]], optional
+        :raises ValueError: layout or channel_order isn't supported, or std has a zero
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"{layout=} should be one of {LAYOUTS}")
+        if channel_order not in CHANNEL_ORDERS:
+            raise ValueError(f"{channel_order=} should be one of {CHANNEL_ORDERS}")
+        self.layout = layout
+        self.channel_order = channel_order
+        self.drop_alpha = drop_alpha
+        self.mean = None if mean is None else np.atleast_1d(np.asarray(mean, dtype=np.float64))
+        self.std = None if std is None else np.atleast_1d(np.asarray(std, dtype=np.float64))
+        if self.std is not None and not self.std.all():
+            raise ValueError(f"{std=} should not have a zero")
+        self.normalizes = self.mean is not None or self.std is not None
+        self.dtype = np.dtype(dtype) if dtype is not None else \
+            (np.dtype(np.float32) if self.normalizes else None)
+
+    def source_channels(self, bands: int, source_channel_order: str = "RGB") -> np.ndarray:
+        """
+        source_channels Get the source band each output channel is read from
+
+        :param bands: The number of bands of the source regions
+        :type bands: int
+        :param source_channel_order: The channel order of the source regions, defaults to "RGB"
+        :type source_channel_order: str, optional
+        :return: The source band of every output channel
+        :rtype: np.ndarray
+        """
+        channels = np.arange(bands)
+        if self.drop_alpha and bands in (2, 4):
+            channels = channels[:-1]
+        if len(channels) >= 3 and source_channel_order != self.channel_order:
+            channels[:3] = channels[2::-1]
+        return channels
+
+    def output_shape(self, shape: Tuple[int, ...], source_channel_order: str = "RGB") -> Tuple[int, ...]:
+        """
+        output_shape Get the shape of the output of regions (or batches of them) of a shape
+
+        :param shape: The (..., height, width, bands) shape of the source
+        :type shape: Tuple[int, ...]
+        :param source_channel_order: The channel order of the source regions, defaults to "RGB"
+        :type source_channel_order: str, optional
+        :return: The (..., height, width, channels) or (..., channels, height, width) shape of the output
+        :rtype: Tuple[int, ...]
+        """
+        *leading, height, width, bands = shape
+        channels = len(self.source_channels(bands, source_channel_order))
+        if self.layout == "CHW":
+            return (*leading, channels, height, width)
+        return (*leading, height, width, channels)
+
+    def _per_channel(self, values: Optional[np.ndarray], channels: int, default: float) -> np.ndarray:
+        """
+        _per_channel Broadcast mean or std to one value per output channel
+
+        :raises ValueError: values has neither one value nor one per channel
+        :return: One value per output channel
+        :rtype: np.ndarray
+        """
+        if values is None:
+            return np.full(channels, default)
+        if len(values) not in (1, channels):
+            raise ValueError(f"{len(values)} values were given for {channels} channels")
+        return np.broadcast_to(values, (channels,))
+
+    def apply(self, region: np.ndarray, source_channel_order: str = "RGB", out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        apply Convert a region (or a batch of them) into the output, reading every source band once
+
+        :param region: A (..., height, width, bands) array
+        :type region: np.ndarray
+        :param source_channel_order: The channel order of region, defaults to "RGB"
+        :type source_channel_order: str, optional
+        :param out: An array of the output's shape and dtype to write into instead of allocating one, defaults to None
+        :type out: Optional[np.ndarray], optional
+        :raises ValueError: out doesn't have the output's shape
+        :return: The output (out when given)
+        :rtype: np.ndarray
+        """
+        channels = self.source_channels(region.shape[-1], source_channel_order)
+        shape = self.output_shape(region.shape, source_channel_order)
+        dtype = self.dtype or region.dtype
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape:
+            raise ValueError(f"out should have the shape of the output {shape} but has {out.shape}")
+        if self.layout == "HWC" and not self.normalizes and \
+                np.array_equal(channels, np.arange(region.shape[-1])):
+            np.copyto(out, region, casting="unsafe")
+            return out
+        scales = 1 / self._per_channel(self.std, len(channels), 1.0)
+        offsets = -self._per_channel(self.mean, len(channels), 0.0) * scales
+        for channel, source in enumerate(channels):
+            destination = out[..., channel, :, :] if self.layout == "CHW" else out[..., channel]
+            if not self.normalizes:
+                np.copyto(destination, region[..., source], casting="unsafe")
+            elif np.issubdtype(out.dtype, np.floating):
+                # x * (1 / std) - mean / std, computed in place in the output
+                np.multiply(region[..., source], scales[channel], out=destination, casting="unsafe")
+                destination += offsets[channel]
+            else:
+                np.copyto(destination, region[..., source] * scales[channel] + offsets[channel], casting="unsafe")
+        return out
@@ -3,8 +3,10 @@
     Utility functions and classes for the Unified Image Reader
 """
 
+import contextlib
 import os
-from typing import List, NewType, Tuple, Union
+import threading
+from typing import IO, Callable, Iterator, List, NewType, Tuple, Union
 
 RegionDimensions = NewType('RegionDimensions', Tuple[int, int])
 
@@ -33,3 +35,88 @@ def listdir_recursive(path: FilePath) -> List[FilePath]:
             for file_node in file_nodes
         ]
     return files
+
+
+def sidecar_path(path: FilePath, suffix: str) -> FilePath:
+    """
+    sidecar_path gets the path of a file persisted next to an image, such as a cached index
+
+    :param path: the path to the image
+    :type path: FilePath
+    :param suffix: the suffix identifying the sidecar file, e.g. ".foreground.npz"
+    :type suffix: str
+    :return: the path to the sidecar file
+    :rtype: FilePath
+    """
+    return path + suffix
+
+
+@contextlib.contextmanager
+def atomic_path(path: FilePath) -> Iterator[FilePath]:
+    """
+    atomic_path gets a temporary path to write a file at, which replaces the file at path once the block completes so
+    that readers never see a partial file. The temporary file is removed when the block raises.
+
+    :param path: the path of the file written
+    :type path: FilePath
+    :return: the temporary path, unique to the process and thread
+    :rtype: Iterator[FilePath]
+    """
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary_path)
+        raise
+
+
+def write_atomically(path: FilePath, write: Callable[[IO], None], mode: str = "wb") -> None:
+    """
+    write_atomically writes a file through a temporary file (see atomic_path)
+
+    :param path: the path of the file written
+    :type path: FilePath
+    :param write: writes the content into the open temporary file
+    :type write: Callable[[IO], None]
+    :param mode: the mode the temporary file is opened in, defaults to "wb"
+    :type mode: str, optional
+    """
+    with atomic_path(path) as temporary_path:
+        with open(temporary_path, mode) as f:
+            write(f)
+
+
+def write_sidecar(path: FilePath, write: Callable[[IO], None], mode: str = "wb") -> bool:
+    """
+    write_sidecar writes a file persisted next to an image (see sidecar_path) atomically. Sidecars only save work, so
+    one that can't be written, e.g. because the image lives in a read-only directory, is skipped.
+
+    :param path: the path of the sidecar file
+    :type path: FilePath
+    :param write: writes the content into the open temporary file
+    :type write: Callable[[IO], None]
+    :param mode: the mode the temporary file is opened in, defaults to "wb"
+    :type mode: str, optional
+    :return: whether the sidecar was written
+    :rtype: bool
+    """
+    try:
+        write_atomically(path, write, mode)
+        return True
+    except OSError:
+        return False
+
+
+def file_signature(path: FilePath) -> Tuple[int, int]:
+    """
+    file_signature identifies a version of a file so that persisted results derived from it can be invalidated
+
+    :param path: the path to the file
+    :type path: FilePath
+    :return: the size and modification time (in nanoseconds) of the file
+    :rtype: Tuple[int, int]
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,75 @@
+"""
+    Shared fixtures: the sample image shipped with the tests and small synthetic pyramids written once per session
+"""
+
+import os
+import shutil
+
+import pytest
+import pyvips
+
+IMAGES_DIRECTORY = os.path.join(os.path.dirname(__file__), "images")
+
+# slideio's SVS driver only opens TIFFs whose description identifies them as written by Aperio
+APERIO_DESCRIPTION = "Aperio Image Library v10.0.0\n{width}x{height} [0,0 {width}x{height}] (256x256) JPEG/RGB Q=90|AppMag = 20|MPP = 0.5"
+
+# odd dimensions so that the last tiles and the downsampled levels don't divide evenly
+PYRAMID_DIMS = (1201, 901)
+
+
+def texture(width: int, height: int) -> pyvips.Image:
+    """
+    texture An RGB image of smooth noise, so that neighbouring pixels differ but compress like tissue does
+
+    :param width: Width in pixels
+    :type width: int
+    :param height: Height in pixels
+    :type height: int
+    :return: The lazily evaluated image
+    :rtype: pyvips.Image
+    """
+    bands = [pyvips.Image.perlin(width, height, cell_size=64, seed=band) for band in range(3)]
+    return ((bands[0].bandjoin(bands[1:]) + 1) * 127.5).cast("uchar")
+
+
+@pytest.fixture(scope="session")
+def test_image() -> str:
+    """
+    test_image The 474x474 RGB JPEG-compressed TIFF shipped with the tests
+    """
+    return os.path.join(IMAGES_DIRECTORY, "test-image.tiff")
+
+
+@pytest.fixture
+def image_copy(tmp_path, test_image) -> str:
+    """
+    image_copy A copy of the test image in a test's own directory, for tests writing sidecars next to it
+    """
+    path = str(tmp_path / "image.tiff")
+    shutil.copy(test_image, path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def pyramid(tmp_path_factory) -> str:
+    """
+    pyramid A tiled JPEG TIFF pyramid of PYRAMID_DIMS with 256x256 tiles, described as an Aperio SVS so that both
+    VIPS and SlideIO read its levels
+    """
+    path = str(tmp_path_factory.mktemp("pyramid") / "pyramid.svs")
+    image = texture(*PYRAMID_DIMS).copy()
+    image.set_type(pyvips.GValue.gstr_type, "image-description",
+                   APERIO_DESCRIPTION.format(width=PYRAMID_DIMS[0], height=PYRAMID_DIMS[1]))
+    image.tiffsave(path, tile=True, tile_width=256, tile_height=256, pyramid=True, compression="jpeg", Q=90)
+    return path
+
+
+@pytest.fixture(scope="session")
+def deflate_pyramid(tmp_path_factory) -> str:
+    """
+    deflate_pyramid A tiled BigTIFF pyramid of PYRAMID_DIMS with 128x128 deflate tiles and a horizontal predictor
+    """
+    path = str(tmp_path_factory.mktemp("deflate") / "deflate.tiff")
+    texture(*PYRAMID_DIMS).tiffsave(path, tile=True, tile_width=128, tile_height=128, pyramid=True,
+                                    compression="deflate", predictor="horizontal", bigtiff=True)
+    return path
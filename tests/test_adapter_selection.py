@@ -0,0 +1,106 @@
+"""
+    Adapters chosen by content: magic bytes, TIFF directories and calibrated choices per image signature
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader, adapter_selection, config, tiff
+
+from conftest import PYRAMID_DIMS, texture
+
+
+@pytest.fixture
+def calibration_path(tmp_path, monkeypatch) -> str:
+    # calibrated choices go to a test's own file rather than the user's
+    path = str(tmp_path / "calibration" / "adapters.json")
+    monkeypatch.setattr(config, "ADAPTER_CALIBRATION_PATH", path)
+    monkeypatch.setattr(adapter_selection, "_calibration_caches", {})
+    return path
+
+
+@pytest.mark.parametrize("name, save, image_format", [
+    ("image.png", lambda image, path: image.pngsave(path), "png"),
+    ("image.jpg", lambda image, path: image.jpegsave(path), "jpeg"),
+    ("image.webp", lambda image, path: image.webpsave(path), "webp"),
+    ("image.tiff", lambda image, path: image.tiffsave(path), "tiff"),
+    ("image.tiff", lambda image, path: image.tiffsave(path, bigtiff=True), "bigtiff")
+])
+def test_formats_are_detected_by_content(tmp_path, name, save, image_format):
+    path = str(tmp_path / name)
+    save(texture(64, 48), path)
+    assert tiff.detect_format(path) == image_format
+
+
+def test_unknown_content(tmp_path):
+    path = str(tmp_path / "notes.tiff")
+    with open(path, "wb") as f:
+        f.write(b"RIFF\x00\x00\x00\x00WAVEfmt plain text")
+    assert tiff.detect_format(path) is None
+    assert adapter_selection.candidate_adapters(path) == []
+
+
+def test_mislabelled_files_are_read_by_content(pyramid, tmp_path):
+    # an SVS whose extension says nothing of its format
+    path = str(tmp_path / "slide.dat")
+    shutil.copy(pyramid, path)
+    assert tiff.detect_format(path) == "svs"
+    reader = ImageReader(path)
+    assert type(reader.adapter).__name__ == "SlideIO" and reader.dims == PYRAMID_DIMS
+    assert np.array_equal(reader.get_region((0, 0), (64, 64)), ImageReader(pyramid).get_region((0, 0), (64, 64)))
+
+
+def test_directories(pyramid, deflate_pyramid):
+    ifds = tiff.read_ifds(pyramid)
+    assert [(ifd[tiff.IMAGE_WIDTH], ifd[tiff.IMAGE_LENGTH]) for ifd in ifds] == ImageReader(pyramid, adapter="VIPS").levels
+    layout = tiff.layout(ifds[0])
+    assert (layout["compression"], layout["tile_width"], layout["tile_height"], layout["samples"]) == ("jpeg", 256, 256, 3)
+    assert tiff.read_ifds(pyramid, max_ifds=1, tags=[tiff.COMPRESSION]) == [{tiff.COMPRESSION: 7}]
+    # BigTIFF directories, with 64 bit offsets
+    header = tiff.read_header(deflate_pyramid)
+    assert len(header) == 2 and tiff.layout(header[0])["compression"] == "deflate"
+    assert tiff.read_header(deflate_pyramid) is header
+    assert tiff.TILE_OFFSETS not in header[0]
+    assert adapter_selection.signature(deflate_pyramid) == "bigtiff/deflate/tiles128x128/samples3/pyramid"
+
+
+def test_corrupt_directories(tmp_path):
+    path = str(tmp_path / "truncated.tiff")
+    with open(path, "wb") as f:
+        f.write(b"II*\x00\xff\xff\x00\x00")
+    with pytest.raises(tiff.TiffFormatException):
+        tiff.read_ifds(path)
+    assert tiff.detect_format(path) == "tiff" and adapter_selection.signature(path) == "tiff"
+
+
+def test_calibration_is_remembered(pyramid, calibration_path):
+    adapter = adapter_selection.calibrate(pyramid, reads=2)
+    with open(calibration_path) as f:
+        choices = json.load(f)
+    choice = choices[adapter_selection.signature(pyramid)]
+    assert choice["adapter"] == adapter.__name__ and set(choice["seconds_per_read"]) == {"SlideIO", "VIPS"}
+    # a fresh process reads the persisted choice
+    adapter_selection._calibration_caches.clear()
+    assert adapter_selection.select_adapter(pyramid) is adapter
+
+
+def test_calibrated_choices_are_followed(pyramid, calibration_path):
+    assert adapter_selection.select_adapter(pyramid).__name__ == "SlideIO"
+    adapter_selection.calibration_cache().put(adapter_selection.signature(pyramid), "VIPS", {"VIPS": 0.1})
+    assert type(ImageReader(pyramid).adapter).__name__ == "VIPS"
+    # other processes' choices are read again once the file changes
+    with open(calibration_path, "w") as f:
+        json.dump({adapter_selection.signature(pyramid): {"adapter": "SlideIO"}}, f)
+    os.utime(calibration_path, ns=(0, 1))
+    assert adapter_selection.select_adapter(pyramid).__name__ == "SlideIO"
+
+
+def test_calibrate_on_open(pyramid, calibration_path):
+    ImageReader(pyramid, calibrate=True)
+    assert os.path.isfile(calibration_path)
+    # without a candidate able to read the image there is nothing to choose
+    assert adapter_selection.calibrate(pyramid, candidates=[], reads=1) is None
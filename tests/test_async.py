@@ -0,0 +1,78 @@
+"""
+    Awaitable region reads and asynchronous iteration
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from unified_image_reader import AsyncImage, Image, ImageReader
+
+REGION_DIMS = (128, 128)
+
+
+class CountingReader(ImageReader):
+
+    """
+    CountingReader An ImageReader recording the most reads that were ever running at once
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+
+    def get_region(self, *args, **kwargs):
+        with self._lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(0.01)
+            return super().get_region(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+def test_reads_match_the_reader(pyramid):
+    reader = ImageReader(pyramid)
+
+    async def read():
+        async with AsyncImage(pyramid) as image:
+            return await asyncio.gather(image.get_region(3, REGION_DIMS), image.get_regions([1, 2], REGION_DIMS),
+                                        reader.aget_region((10, 20), REGION_DIMS, level=1))
+
+    region, regions, level_region = asyncio.run(read())
+    assert np.array_equal(region, reader.get_region(3, REGION_DIMS))
+    assert np.array_equal(regions, reader.get_regions([1, 2], REGION_DIMS))
+    assert np.array_equal(level_region, reader.get_region((10, 20), REGION_DIMS, level=1))
+
+
+def test_iteration_is_ordered_and_bounded(pyramid):
+    reader = CountingReader(pyramid)
+
+    async def iterate():
+        async with AsyncImage(pyramid, reader, concurrency=2) as image:
+            return [region async for region in image]
+
+    regions = asyncio.run(iterate())
+    assert len(regions) == len(Image(pyramid)) > 0
+    assert all(np.array_equal(region, r) for region, r in zip(regions, Image(pyramid)))
+    assert reader.most_running <= 2
+
+
+def test_concurrency_is_bounded(pyramid):
+    reader = CountingReader(pyramid)
+
+    async def read():
+        async with AsyncImage(pyramid, reader, concurrency=3) as image:
+            return await asyncio.gather(*(image.get_region(i, REGION_DIMS) for i in range(12)))
+
+    assert len(asyncio.run(read())) == 12
+    assert 1 < reader.most_running <= 3
+    with pytest.raises(ValueError):
+        AsyncImage(pyramid, concurrency=0)
@@ -0,0 +1,67 @@
+"""
+    Streaming a grid's regions a band of rows at a time, as views into the band
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import Image, ImageReader, OutputSpec
+from unified_image_reader.adapters import config as adapter_config
+
+REGION_DIMS = (128, 96)
+
+
+@pytest.mark.parametrize("rows_per_band", [1, 3])
+def test_bands_yield_every_region_in_order(pyramid, rows_per_band):
+    reader = ImageReader(pyramid)
+    regions = [(i, region.copy()) for i, region in reader.iter_bands(REGION_DIMS, rows_per_band=rows_per_band)]
+    assert [i for i, _ in regions] == list(range(reader.number_of_regions(REGION_DIMS)))
+    assert all(np.array_equal(region, reader.get_region(i, REGION_DIMS)) for i, region in regions)
+
+
+def test_start_and_stop_within_rows(pyramid):
+    reader = ImageReader(pyramid)
+    assert [i for i, _ in reader.iter_bands(REGION_DIMS, rows_per_band=2, start=7, stop=30)] == list(range(7, 30))
+    assert list(reader.iter_bands(REGION_DIMS, start=5, stop=5)) == []
+
+
+def test_overlapping_regions_and_levels(pyramid):
+    reader = ImageReader(pyramid)
+    stride = (64, 48)
+    for i, region in reader.iter_bands(REGION_DIMS, stride=stride, rows_per_band=2):
+        assert np.array_equal(region, reader.get_region(reader.grid(REGION_DIMS, stride=stride).index_to_coordinates(i),
+                                                        REGION_DIMS))
+    # SlideIO resamples its levels from full resolution coordinates, so a band and a region differ by a fraction
+    reader = ImageReader(pyramid, adapter="VIPS")
+    for i, region in reader.iter_bands((64, 64), level=1):
+        assert np.array_equal(region, reader.get_region(i, (64, 64), level=1))
+
+
+def test_regions_are_views_into_the_band(pyramid):
+    (_, first), (_, second) = list(ImageReader(pyramid).iter_bands(REGION_DIMS))[:2]
+    assert first.base is not None and first.base is second.base
+
+
+def test_wide_bands_are_read_in_chunks(pyramid, monkeypatch):
+    reader = ImageReader(pyramid)
+    expected = reader.get_regions(range(reader.number_of_regions(REGION_DIMS)), REGION_DIMS)
+    # room for three regions per adapter call
+    monkeypatch.setattr(adapter_config, "BULK_READ_MAX_PIXELS", 3 * 128 * 96)
+    calls = []
+    read = reader._adapter_get_region
+    monkeypatch.setattr(reader, "_adapter_get_region", lambda *args: calls.append(args) or read(*args))
+    regions = [region.copy() for _, region in reader.iter_bands(REGION_DIMS)]
+    assert np.array_equal(np.stack(regions), expected)
+    assert all(dims[0] <= 3 * 128 for _, dims, _ in calls)
+
+
+def test_output_spec_and_images(pyramid):
+    spec = OutputSpec(layout="CHW")
+    reader = ImageReader(pyramid, output_spec=spec)
+    _, region = next(reader.iter_bands(REGION_DIMS))
+    assert region.shape == (3, 96, 128)
+    image = Image(pyramid)
+    image.slice(1, 2)
+    assert len(list(image.iter_bands())) == 1
+    with pytest.raises(ValueError):
+        next(reader.iter_bands(REGION_DIMS, rows_per_band=0))
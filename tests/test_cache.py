@@ -0,0 +1,58 @@
+"""
+    The byte-budgeted LRU cache of decoded regions, alone and inside ImageReader
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader, RegionCache
+
+
+def region(value: int, size: int = 10) -> np.ndarray:
+    return np.full((size, size, 1), value, dtype=np.uint8)
+
+
+def test_least_recently_used_regions_are_evicted():
+    cache = RegionCache(300)
+    keys = [RegionCache.key("image", (i, 0), (10, 10)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, region(i))
+    assert cache.get(keys[0]) is not None  # now the most recently used
+    cache.put(RegionCache.key("image", (3, 0), (10, 10)), region(3))
+    assert keys[1] not in cache and keys[0] in cache and keys[2] in cache
+    assert cache.current_bytes == 300 and cache.evictions == 1
+    assert cache.stats()["hits"] == 1 and len(cache) == 3
+
+
+def test_regions_over_the_budget_are_not_cached():
+    cache = RegionCache(50)
+    key = RegionCache.key("image", (0, 0), (10, 10))
+    returned = cache.put(key, region(1))
+    assert key not in cache and not returned.flags.writeable
+    with pytest.raises(ValueError):
+        RegionCache(-1)
+
+
+def test_keys_tell_images_and_levels_apart():
+    keys = {RegionCache.key("a", (0, 0), (10, 10)), RegionCache.key("b", (0, 0), (10, 10)),
+            RegionCache.key("a", (0, 0), (10, 10), level=1), RegionCache.key("a", (0, 0), (10, 20))}
+    assert len(keys) == 4
+
+
+def test_reader_serves_repeated_reads_from_the_cache(test_image):
+    reader = ImageReader(test_image, cache=1 << 20)
+    first = reader.get_region((10, 20), (32, 32))
+    second = reader.get_region((10, 20), (32, 32))
+    assert second is first and not first.flags.writeable
+    assert reader.cache.stats()["hits"] == 1 and reader.cache.stats()["misses"] == 1
+    assert np.array_equal(first, ImageReader(test_image).get_region((10, 20), (32, 32)))
+    # a caller's buffer gets a copy, never the cached array
+    out = np.empty_like(first)
+    assert reader.get_region((10, 20), (32, 32), out=out) is out and out.flags.writeable
+
+
+def test_readers_share_a_cache(test_image, pyramid):
+    cache = RegionCache(1 << 20)
+    a, b = ImageReader(test_image, cache=cache), ImageReader(pyramid, cache=cache)
+    assert not np.array_equal(a.get_region((0, 0), (16, 16)), b.get_region((0, 0), (16, 16)))
+    assert len(cache) == 2 and cache.hits == 0
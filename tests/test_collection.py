@@ -0,0 +1,104 @@
+"""
+    ImageCollection: one region index across images, read through a bounded set of open readers
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageCollection, ImageReader
+
+from conftest import texture
+
+REGION_DIMS = (128, 128)
+
+
+@pytest.fixture
+def filepaths(tmp_path, pyramid, test_image) -> list:
+    # 9 and 63 regions around an image too small for a single region
+    small = str(tmp_path / "small.tiff")
+    texture(100, 100).tiffsave(small)
+    return [test_image, small, pyramid]
+
+
+def expected_region(filepaths: list, region_index: int) -> np.ndarray:
+    for path in filepaths:
+        reader = ImageReader(path)
+        count = reader.number_of_regions(REGION_DIMS)
+        if region_index < count:
+            return reader.get_region(region_index, REGION_DIMS)
+        region_index -= count
+    raise IndexError(region_index)
+
+
+def test_global_index(filepaths):
+    with ImageCollection(filepaths, REGION_DIMS) as collection:
+        assert collection.counts.tolist() == [9, 0, 63] and len(collection) == 72
+        image_indices, local_indices = collection.locate([0, 8, 9, 71])
+        assert image_indices.tolist() == [0, 0, 2, 2] and local_indices.tolist() == [0, 8, 0, 62]
+        for region_index in (0, 8, 9, 40, 71):
+            assert np.array_equal(collection[region_index], expected_region(filepaths, region_index))
+        for region_index in (-1, 72):
+            with pytest.raises(IndexError):
+                collection.get_region(region_index)
+
+
+def test_counts_given_open_nothing(filepaths):
+    collection = ImageCollection(filepaths, REGION_DIMS, counts=[9, 0, 63])
+    assert collection.opened == 0 and len(collection) == 72
+    with pytest.raises(ValueError):
+        ImageCollection(filepaths, REGION_DIMS, counts=[9, 0])
+    with pytest.raises(ValueError):
+        ImageCollection(filepaths, REGION_DIMS, max_open=-1)
+
+
+def test_batches_keep_their_order(filepaths):
+    collection = ImageCollection(filepaths, REGION_DIMS)
+    region_indices = [70, 3, 12, 0, 3]
+    regions = collection.get_regions(region_indices)
+    assert regions.shape == (5, 128, 128, 3)
+    for region_index, region in zip(region_indices, regions):
+        assert np.array_equal(region, expected_region(filepaths, region_index))
+    out = np.empty((128, 128, 3), dtype=np.uint8)
+    assert collection.get_region(20, out=out) is out
+
+
+def test_open_readers_are_bounded(filepaths):
+    opened = []
+
+    def factory(path):
+        opened.append(path)
+        return ImageReader(path)
+
+    collection = ImageCollection(filepaths, REGION_DIMS, max_open=1, reader_factory=factory, counts=[9, 0, 63])
+    for region_index in (0, 1, 9, 10, 2):
+        collection.get_region(region_index)
+        assert len(collection._readers) == 1
+    assert opened == filepaths[0:1] + filepaths[2:3] + filepaths[0:1]
+
+
+def test_schedule_mixes_images_and_covers_every_region(filepaths):
+    collection = ImageCollection(filepaths, REGION_DIMS, max_open=2)
+    batches = list(collection.schedule(8))
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(collection)))
+    assert all(len(batch) == 8 for batch in batches)
+    first_images, _ = collection.locate(batches[0])
+    assert set(first_images.tolist()) == {0, 2}
+    # every image contributes a run of consecutive regions in order
+    assert batches[0].tolist() == [0, 1, 2, 3, 9, 10, 11, 12]
+    with pytest.raises(ValueError):
+        next(collection.schedule(0))
+
+
+def test_shuffled_schedules_are_reproducible(filepaths):
+    collection = ImageCollection(filepaths, REGION_DIMS)
+    first = [batch.tolist() for batch in collection.schedule(5, shuffle=True, seed=3)]
+    assert first == [batch.tolist() for batch in collection.schedule(5, shuffle=True, seed=3)]
+    assert first != [batch.tolist() for batch in collection.schedule(5)]
+    assert sorted(sum(first, [])) == list(range(len(collection)))
+
+
+def test_iter_batches_without_reopening(filepaths):
+    collection = ImageCollection(filepaths, REGION_DIMS, max_open=2, counts=[9, 0, 63])
+    for region_indices, regions in collection.iter_batches(16, images_per_batch=2):
+        assert len(regions) == len(region_indices)
+    assert collection.opened == 2
@@ -0,0 +1,119 @@
+"""
+    ImageReaderDirectory and the header index it persists next to the directory
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from unified_image_reader import directory_index
+from unified_image_reader.image_reader import ImageReaderDirectory
+
+
+@pytest.fixture
+def patches(tmp_path) -> str:
+    """
+    patches A directory of 6 PNG patches of 48x32 pixels, two of them in a subdirectory
+    """
+    directory = tmp_path / "patches"
+    (directory / "sub").mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    for i in range(6):
+        path = directory / ("sub" if i % 3 == 0 else "") / f"p{i}.png"
+        cv2.imwrite(str(path), rng.integers(0, 256, (32, 48, 3), dtype=np.uint8))
+    return str(directory)
+
+
+def index_path(directory: str) -> str:
+    return os.path.abspath(directory) + directory_index.SIDECAR_SUFFIX
+
+
+def test_index_is_written_next_to_the_directory(patches):
+    reader = ImageReaderDirectory(patches)
+    assert reader.number_of_regions() == 4
+    assert reader.dims == (48, 32)
+    assert os.path.isfile(index_path(patches))
+    assert not any(directory_index.is_index_file(name) for name in os.listdir(patches))
+
+
+def test_reopen_reuses_the_index(patches, monkeypatch):
+    first = ImageReaderDirectory(patches, recursive=True)
+    expected = first.get_regions(range(6))
+
+    def no_header(path):
+        raise AssertionError(f"the header of {path} was read again")
+
+    monkeypatch.setattr(directory_index, "read_header", no_header)
+    second = ImageReaderDirectory(patches, recursive=True)
+    assert second.index.paths == first.index.paths
+    assert np.array_equal(second.get_regions(range(6)), expected)
+
+
+def test_reopen_rereads_changed_files(patches):
+    ImageReaderDirectory(patches)
+    changed = os.path.join(patches, "p1.png")
+    cv2.imwrite(changed, np.zeros((20, 10, 3), dtype=np.uint8))
+    os.utime(changed, ns=(0, 1))
+    reader = ImageReaderDirectory(patches)
+    assert reader.get_region_dims(reader.index.paths.index(changed)) == (10, 20)
+    with pytest.raises(NotImplementedError):
+        reader.dims
+
+
+def test_reopen_the_current_directory(patches, monkeypatch):
+    monkeypatch.chdir(patches)
+    first = ImageReaderDirectory(".", recursive=True)
+    assert os.path.isfile(index_path(patches))
+    second = ImageReaderDirectory(".", recursive=True)
+    assert second.number_of_regions() == first.number_of_regions() == 6
+    assert np.array_equal(second.get_region(5), first.get_region(5))
+
+
+def test_index_files_and_other_files_are_skipped(patches):
+    # the index of the subdirectory, as written by ImageReaderDirectory(patches + "/sub"), sits in patches
+    ImageReaderDirectory(os.path.join(patches, "sub"))
+    assert os.path.isfile(index_path(os.path.join(patches, "sub")))
+    with open(os.path.join(patches, "notes.txt"), "w") as f:
+        f.write("not an image")
+    reader = ImageReaderDirectory(patches, recursive=True)
+    assert reader.number_of_regions() == 6
+    assert all(path.endswith(".png") for path in reader.index.paths)
+
+
+def test_regions_are_decoded_as_bgr(patches):
+    reader = ImageReaderDirectory(patches)
+    for i, path in enumerate(reader.index.paths):
+        assert np.array_equal(reader.get_region(i), cv2.imread(path))
+
+
+def test_batches_after_close(patches):
+    reader = ImageReaderDirectory(patches)
+    expected = reader.get_regions(range(4))
+    reader.close()
+    assert np.array_equal(reader.get_regions(range(4)), expected)
+    reader.close()
+    reader.close()
+
+
+def test_bands_and_dtypes_are_indexed_as_decoded(tmp_path):
+    rng = np.random.default_rng(1)
+    images = {"gray.png": rng.integers(0, 256, (32, 48), dtype=np.uint8),
+              "rgba.png": rng.integers(0, 256, (32, 48, 4), dtype=np.uint8),
+              "deep.png": rng.integers(0, 65536, (32, 48, 3), dtype=np.uint16)}
+    for name, image in images.items():
+        cv2.imwrite(str(tmp_path / name), image)
+    reader = ImageReaderDirectory(str(tmp_path))
+    for i, path in enumerate(reader.index.paths):
+        region = reader.get_region(i)
+        assert region.shape[2] == reader.get_region_bands(i) and region.dtype == reader.get_region_dtype(i)
+        assert np.array_equal(region, images[os.path.basename(path)].reshape(region.shape))
+
+
+def test_batches_of_one_shape_are_decoded_in_place(patches):
+    reader = ImageReaderDirectory(patches)
+    assert (reader.get_region_bands(0), reader.get_region_dtype(0)) == (3, np.uint8)
+    regions = reader.get_regions([3, 0, 2])
+    assert regions.shape == (3, 32, 48, 3)
+    assert np.array_equal(regions[0], reader.get_region(3))
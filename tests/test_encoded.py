@@ -0,0 +1,91 @@
+"""
+    Encoded tile passthrough: stored tiles decode to the pixels get_tile reads
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader.encoded import decode_tile
+from unified_image_reader.image_reader import UnsupportedFormatException
+
+from conftest import texture
+
+
+def tile_indices(reader: ImageReader, level: int):
+    # the first, second, middle and last tiles, which include tiles cut by the right and bottom edges
+    count = reader.number_of_tiles(level)
+    return sorted({0, min(1, count - 1), count // 2, count - 1})
+
+
+@pytest.mark.parametrize("adapter", ["VIPS", "SlideIO"])
+def test_jpeg_tiles_decode_like_get_tile(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    for level in range(len(reader.levels)):
+        for tile_index in tile_indices(reader, level):
+            tile = reader.get_encoded_tile(tile_index, level)
+            assert tile.codec == "jpeg" and (tile.level, tile.tile_index) == (level, tile_index)
+            decoded, expected = decode_tile(tile), reader.get_tile(tile_index, level)
+            assert decoded.shape == expected.shape
+            if adapter == "VIPS" or level == 0:
+                assert np.array_equal(decoded, expected)
+            else:
+                # SlideIO resamples its levels from full resolution coordinates, off the stored pixels by a fraction
+                assert np.abs(decoded.astype(int) - expected).mean() < 3
+
+
+def test_deflate_tiles_decode_exactly(deflate_pyramid):
+    reader = ImageReader(deflate_pyramid)
+    for level in range(len(reader.levels)):
+        for tile_index in tile_indices(reader, level):
+            tile = reader.get_encoded_tile(tile_index, level)
+            assert tile.codec == "deflate" and tile.predictor == 2
+            assert np.array_equal(decode_tile(tile), reader.get_tile(tile_index, level))
+
+
+def test_encoded_region_of_an_aligned_reader(pyramid):
+    reader = ImageReader(pyramid, adapter="VIPS", aligned=True)
+    # the aligned grid only has whole tiles, while the tiles cut by the right edge are numbered too
+    grid_columns, tile_columns = reader.grid((256, 256)).columns, -(-reader.width // 256)
+    assert grid_columns == tile_columns - 1
+    assert reader.get_encoded_region(grid_columns + 1, (256, 256)).tile_index == tile_columns + 1
+    assert reader.get_encoded_region((256, 0), (256, 256)).tile_index == 1
+    # off the tile grid or not one whole tile
+    assert reader.get_encoded_region((10, 0), (256, 256)) is None
+    assert reader.get_encoded_region(0, (512, 512)) is None
+
+
+def test_tile_index_out_of_range(pyramid):
+    reader = ImageReader(pyramid, adapter="VIPS")
+    with pytest.raises(IndexError):
+        reader.get_encoded_tile(reader.number_of_tiles())
+
+
+def test_stripped_tiffs_have_no_tiles(tmp_path):
+    path = str(tmp_path / "stripped.tiff")
+    texture(300, 200).tiffsave(path, compression="lzw")
+    reader = ImageReader(path)
+    assert reader.get_encoded_region(0, (256, 256)) is None
+    with pytest.raises(UnsupportedFormatException):
+        reader.get_encoded_tile(0)
+
+
+@pytest.mark.parametrize("compression", ["lzw", "packbits"])
+def test_undecodable_tiles_are_refused(tmp_path, compression):
+    path = str(tmp_path / f"{compression}.tiff")
+    texture(300, 200).tiffsave(path, tile=True, tile_width=128, tile_height=128, compression=compression)
+    reader = ImageReader(path)
+    assert reader.tile_info().compression == compression
+    with pytest.raises(UnsupportedFormatException):
+        reader.get_encoded_tile(0)
+    assert reader.get_encoded_region(0, (128, 128)) is None
+
+
+def test_uncompressed_tiles_decode_exactly(tmp_path):
+    path = str(tmp_path / "none.tiff")
+    texture(300, 200).tiffsave(path, tile=True, tile_width=128, tile_height=128, compression="none")
+    reader = ImageReader(path)
+    for tile_index in tile_indices(reader, 0):
+        tile = reader.get_encoded_tile(tile_index)
+        assert tile.codec == "none"
+        assert np.array_equal(decode_tile(tile), reader.get_tile(tile_index))
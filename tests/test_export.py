@@ -0,0 +1,126 @@
+"""
+    Bulk export: shards hold the regions the reader reads, and a rerun resumes from the manifest
+"""
+
+import json
+import os
+import shutil
+import tarfile
+
+import cv2
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader.export import MANIFEST_NAME, ExportException, export, main
+
+REGION_DIMS = (128, 128)
+SHARD_SIZE = 4
+
+
+@pytest.fixture
+def slide(tmp_path, test_image) -> str:
+    # a copy, so that changing its signature doesn't touch the shipped image
+    path = str(tmp_path / "slide.tiff")
+    shutil.copy(test_image, path)
+    return path
+
+
+def read_manifest(output_directory: str) -> dict:
+    with open(os.path.join(output_directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def test_npz_shards_hold_the_regions(slide, tmp_path):
+    output_directory = str(tmp_path / "out")
+    summary = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    reader = ImageReader(slide)
+    count = reader.number_of_regions(REGION_DIMS)
+    assert summary["failures"] == [] and summary["regions"] == count
+    assert summary["shards"] == -(-count // SHARD_SIZE)
+    indices = []
+    for shard in sorted(os.listdir(os.path.join(output_directory, "slide"))):
+        with np.load(os.path.join(output_directory, "slide", shard)) as data:
+            indices.extend(data["indices"].tolist())
+            assert np.array_equal(data["regions"], reader.get_regions(data["indices"], REGION_DIMS))
+    assert indices == list(range(count))
+
+
+def test_rerun_resumes_unfinished_shards(slide, tmp_path):
+    output_directory = str(tmp_path / "out")
+    first = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    # as if the run had been interrupted before the last shard was recorded
+    manifest = read_manifest(output_directory)
+    manifest["slides"]["slide"]["done"].remove(first["shards"] - 1)
+    with open(os.path.join(output_directory, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+    second = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert second["shards"] == 1 and second["skipped_shards"] == first["shards"] - 1
+    assert second["regions"] + second["skipped_regions"] == first["regions"]
+    assert sorted(read_manifest(output_directory)["slides"]["slide"]["done"]) == list(range(first["shards"]))
+    third = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert third["shards"] == 0 and third["skipped_shards"] == first["shards"]
+
+
+def test_changed_slides_are_exported_again(slide, tmp_path):
+    output_directory = str(tmp_path / "out")
+    first = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    os.utime(slide, ns=(0, 1))
+    second = export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert second["shards"] == first["shards"] and second["skipped_shards"] == 0
+
+
+def test_other_parameters_are_rejected(slide, tmp_path):
+    output_directory = str(tmp_path / "out")
+    export([slide], output_directory, REGION_DIMS, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    with pytest.raises(ExportException):
+        export([slide], output_directory, (64, 64), export_format="npz", shard_size=SHARD_SIZE, workers=1)
+
+
+def test_cli_tar_shards(slide, tmp_path):
+    output_directory = str(tmp_path / "out")
+    assert main([slide, "-o", output_directory, "--region-dims", "128,128", "--format", "tar",
+                 "--shard-size", str(SHARD_SIZE), "--workers", "1", "-q"]) == 0
+    with tarfile.open(os.path.join(output_directory, "slide", "shard-000000.tar")) as tar:
+        assert tar.getnames() == [f"{i:08d}.png" for i in range(SHARD_SIZE)]
+    assert not any(name.endswith(".tmp") for name in os.listdir(os.path.join(output_directory, "slide")))
+
+
+@pytest.fixture
+def patches(tmp_path) -> str:
+    directory = tmp_path / "patches"
+    directory.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(6):
+        cv2.imwrite(str(directory / f"p{i}.png"), rng.integers(0, 256, (32, 48, 3), dtype=np.uint8))
+    return str(directory)
+
+
+def test_directories_are_exported_in_batches(patches, tmp_path):
+    output_directory = str(tmp_path / "out")
+    summary = export([patches], output_directory, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert summary["regions"] == 6 and summary["failures"] == []
+    with np.load(os.path.join(output_directory, "patches", "shard-000000.npz")) as data:
+        assert data["indices"].tolist() == list(range(SHARD_SIZE))
+        expected = [cv2.cvtColor(cv2.imread(os.path.join(patches, f"p{i}.png")), cv2.COLOR_BGR2RGB)
+                    for i in range(SHARD_SIZE)]
+        assert np.array_equal(data["regions"], np.stack(expected))
+
+
+def test_changed_files_of_directories_are_exported_again(patches, tmp_path):
+    output_directory = str(tmp_path / "out")
+    first = export([patches], output_directory, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    directory_mtime = os.stat(patches).st_mtime_ns
+    # overwritten in place, which leaves the directory's own modification time alone
+    changed = os.path.join(patches, "p5.png")
+    cv2.imwrite(changed, np.zeros((32, 48, 3), dtype=np.uint8))
+    os.utime(changed, ns=(0, 1))
+    os.utime(patches, ns=(directory_mtime, directory_mtime))
+    second = export([patches], output_directory, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert second["shards"] == first["shards"] and second["skipped_shards"] == 0
+    with np.load(os.path.join(output_directory, "patches", "shard-000001.npz")) as data:
+        assert not data["regions"][-1].any()
+    # and files added to the directory are counted
+    cv2.imwrite(os.path.join(patches, "p6.png"), np.zeros((32, 48, 3), dtype=np.uint8))
+    third = export([patches], output_directory, export_format="npz", shard_size=SHARD_SIZE, workers=1)
+    assert third["regions"] == 7 and third["skipped_shards"] == 0
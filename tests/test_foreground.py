@@ -0,0 +1,60 @@
+"""
+    The foreground index of an image's regions, persisted next to the image
+"""
+
+import os
+
+import numpy as np
+
+from unified_image_reader import Image, ImageReader, config
+from unified_image_reader.foreground import SIDECAR_SUFFIX, ForegroundIndex
+
+REGION_DIMS = (64, 64)
+
+
+def test_index_matches_the_grid(image_copy):
+    reader = ImageReader(image_copy)
+    index = ForegroundIndex.for_reader(reader, REGION_DIMS)
+    grid = reader.grid(REGION_DIMS)
+    assert index.fractions.shape == (grid.rows, grid.columns)
+    assert ((index.fractions >= 0) & (index.fractions <= 1)).all()
+    assert list(index.indices()) == [i for i in range(reader.number_of_regions(REGION_DIMS)) if i in index]
+    assert len(index) == len(index.indices())
+
+
+def test_default_index_is_persisted(image_copy):
+    index = ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS)
+    assert os.path.isfile(image_copy + SIDECAR_SUFFIX)
+    loaded = ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS, min_fraction=1.0)
+    assert np.array_equal(loaded.fractions, index.fractions) and loaded.min_fraction == 1.0
+
+
+def test_mask_functions_are_told_apart(image_copy):
+    everything = ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS,
+                                            mask_function=lambda t: np.ones(t.shape[:2], dtype=bool))
+    nothing = ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS,
+                                         mask_function=lambda t: np.zeros(t.shape[:2], dtype=bool))
+    assert (everything.fractions == 1).all() and (nothing.fractions == 0).all()
+    assert not os.path.exists(image_copy + SIDECAR_SUFFIX)
+
+
+def test_keyed_mask_functions_are_persisted(image_copy):
+    def everything(thumbnail):
+        return np.ones(thumbnail.shape[:2], dtype=bool)
+    ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS, mask_function=everything, mask_key="everything")
+    assert os.path.isfile(image_copy + SIDECAR_SUFFIX)
+    loaded = ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS,
+                                        mask_function=lambda t: np.zeros(t.shape[:2], dtype=bool),
+                                        mask_key="everything")
+    assert (loaded.fractions == 1).all()
+    # the default mask isn't read from an index another key wrote
+    assert (ForegroundIndex.for_reader(ImageReader(image_copy), REGION_DIMS).fractions < 1).any()
+
+
+def test_only_foreground(pyramid):
+    image = Image(pyramid)
+    index = image.only_foreground(mask_function=lambda t: t[..., 0] < 128, min_fraction=0.5)
+    assert 0 < len(image) == len(index) < index.fractions.size
+    regions = list(image)
+    assert len(regions) == len(index)
+    assert np.array_equal(regions[0], image.reader.get_region(int(index.indices()[0]), config.DEFAULT_REGION_DIMS))
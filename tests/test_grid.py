@@ -0,0 +1,69 @@
+"""
+    Region grids, computed once per region dimensions, and the reads that skip validation
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader.grid import TileGrid
+
+
+def test_regions_past_the_edges_are_left_out():
+    grid = TileGrid((1000, 500), (300, 200))
+    assert (grid.columns, grid.rows, len(grid)) == (3, 2, 6)
+    assert grid.index_to_coordinates(4) == (300, 200)
+    assert grid.coordinates.tolist() == [[0, 0], [300, 0], [600, 0], [0, 200], [300, 200], [600, 200]]
+    assert not grid.coordinates.flags.writeable
+    assert len(TileGrid((100, 100), (200, 50))) == 0
+
+
+def test_overlapping_regions():
+    grid = TileGrid((100, 100), (50, 50), stride=(25, 25))
+    assert (grid.columns, grid.rows) == (3, 3)
+    assert grid.index_to_coordinates(8) == (50, 50)
+
+
+def test_conversions_agree():
+    grid = TileGrid((1201, 901), (128, 96), stride=(100, 64))
+    indices = np.arange(len(grid))
+    coordinates = grid.indices_to_coordinates(indices)
+    assert np.array_equal(coordinates, grid.coordinates)
+    assert [grid.index_to_coordinates(i) for i in indices] == [tuple(c) for c in coordinates.tolist()]
+    assert np.array_equal(grid.coordinates_to_indices(coordinates), indices)
+    # off the grid: between regions, before the first or past the last
+    assert grid.coordinates_to_indices([[1, 0], [0, 65], [-100, 0], [grid.columns * 100, 0]]).tolist() == [-1] * 4
+    assert grid.contains(len(grid) - 1) and not grid.contains(len(grid)) and not grid.contains(-1)
+
+
+@pytest.mark.parametrize("region_dims, stride", [((0, 10), None), ((10, 10), (10, 0))])
+def test_invalid_grids(region_dims, stride):
+    with pytest.raises(ValueError):
+        TileGrid((100, 100), region_dims, stride)
+
+
+def test_reader_grids_are_computed_once(pyramid):
+    reader = ImageReader(pyramid)
+    assert reader.grid((128, 128)) is reader.grid((128, 128))
+    assert reader.grid((128, 128), level=1) is not reader.grid((128, 128))
+    assert reader.number_of_regions((128, 128)) == len(reader.grid((128, 128))) == 9 * 7
+    assert reader.region_index_to_coordinates(10, (128, 128)) == (128, 128)
+
+
+def test_unchecked_reads_match_checked_ones(pyramid):
+    reader = ImageReader(pyramid)
+    for identifier in (0, 62, (1000, 700)):
+        assert np.array_equal(reader.get_region(identifier, (128, 128), validate=False),
+                              reader.get_region(identifier, (128, 128)))
+    assert np.array_equal(reader.get_regions(range(5), (128, 128), validate=False),
+                          reader.get_regions(range(5), (128, 128)))
+
+
+def test_checked_reads_refuse_regions_out_of_bounds(pyramid):
+    reader = ImageReader(pyramid)
+    with pytest.raises(IndexError):
+        reader.get_region(63, (128, 128))
+    with pytest.raises(IndexError):
+        reader.get_region((1100, 0), (128, 128))
+    with pytest.raises(IndexError):
+        reader.get_regions([[0, 0], [1100, 0]], (128, 128))
@@ -0,0 +1,58 @@
+"""
+    Batched reads: get_regions returns what get_region returns region by region
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader, OutputSpec, RegionCache
+
+
+@pytest.mark.parametrize("adapter", ["VIPS", "SlideIO"])
+def test_get_regions_matches_get_region(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    region_dims = (200, 150)
+    indices = np.arange(reader.number_of_regions(region_dims))
+    regions = reader.get_regions(indices, region_dims)
+    assert regions.shape == (len(indices), 150, 200, 3)
+    for i in indices:
+        assert np.array_equal(regions[i], reader.get_region(int(i), region_dims))
+
+
+def test_get_regions_by_coordinates(test_image):
+    reader = ImageReader(test_image)
+    coordinates = [(0, 0), (13, 200), (474 - 64, 474 - 64)]
+    regions = reader.get_regions(coordinates, (64, 64))
+    for region, region_coordinates in zip(regions, coordinates):
+        assert np.array_equal(region, reader.get_region(region_coordinates, (64, 64)))
+
+
+def test_get_regions_into_out(test_image):
+    reader = ImageReader(test_image)
+    expected = reader.get_regions([0, 3, 8], (128, 128))
+    out = np.zeros_like(expected)
+    assert reader.get_regions([0, 3, 8], (128, 128), out=out) is out
+    assert np.array_equal(out, expected)
+    with pytest.raises(ValueError):
+        reader.get_regions([0, 3], (128, 128), out=out)
+
+
+def test_get_regions_through_the_cache(test_image):
+    reader = ImageReader(test_image, cache=RegionCache(1 << 24))
+    uncached = ImageReader(test_image).get_regions([1, 2, 5], (100, 100))
+    reader.get_region(2, (100, 100))
+    assert np.array_equal(reader.get_regions([1, 2, 5], (100, 100)), uncached)
+    assert np.array_equal(reader.get_regions([1, 2, 5], (100, 100)), uncached)
+
+
+def test_get_regions_with_an_output_spec(test_image):
+    reader = ImageReader(test_image, output_spec=OutputSpec(layout="CHW", dtype=np.float32))
+    regions = reader.get_regions([0, 4], (64, 32))
+    assert regions.shape == (2, 3, 32, 64) and regions.dtype == np.float32
+    assert np.array_equal(regions[1], reader.get_region(4, (64, 32)))
+
+
+def test_get_regions_validates(test_image):
+    reader = ImageReader(test_image)
+    with pytest.raises(IndexError):
+        reader.get_regions([(0, 0), (450, 0)], (64, 64))
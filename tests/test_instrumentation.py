@@ -0,0 +1,57 @@
+"""
+    Timings of the stages of reads, reported to pluggable sinks
+"""
+
+import logging
+
+import pytest
+
+from unified_image_reader import ImageReader, Instrumentation
+from unified_image_reader.instrumentation import (CallbackSink, InMemorySink, LoggingSink, Measurement,
+                                                  histogram_bucket)
+
+
+def test_reads_report_their_stages(pyramid):
+    instrumentation = Instrumentation()
+    reader = ImageReader(pyramid, adapter="VIPS", instrumentation=instrumentation)
+    region = reader.get_region(0, (128, 128))
+    reader.get_regions(range(4), (128, 128))
+    stages = instrumentation.snapshot()["slides"][pyramid]["VIPS"]
+    assert {"validate", "get_region", "get_regions"} <= set(stages)
+    assert stages["get_region"]["count"] == 1 and stages["get_region"]["bytes"] == region.nbytes
+    assert stages["get_regions"]["bytes"] == 4 * region.nbytes
+    assert instrumentation.snapshot()["adapters"]["VIPS"]["get_region"]["count"] == 1
+
+
+def test_uninstrumented_readers_report_nothing(pyramid):
+    instrumentation = Instrumentation()
+    reader = ImageReader(pyramid, instrumentation=instrumentation)
+    reader.instrument(None)
+    reader.get_region(0, (128, 128))
+    assert instrumentation.snapshot() == {"slides": {}, "adapters": {}}
+
+
+def test_summaries():
+    sink = InMemorySink()
+    for seconds in (0.001, 0.001, 0.004):
+        sink.emit(Measurement("slide", "VIPS", "decode", seconds, 1024 * 1024))
+    decode = sink.snapshot()["slides"]["slide"]["VIPS"]["decode"]
+    assert decode["count"] == 3 and decode["bytes"] == 3 * 1024 * 1024
+    assert decode["mean_ms"] == pytest.approx(2)
+    # percentiles are the upper bounds of power of two buckets of microseconds
+    assert decode["p50_ms"] == 1.024 and decode["p99_ms"] == 4.096
+    assert sum(decode["histogram_us"].values()) == 3
+    sink.reset()
+    assert sink.snapshot()["slides"] == {}
+    assert histogram_bucket(0) == 0 and histogram_bucket(1e6) == 31
+
+
+def test_other_sinks(caplog):
+    measurements = []
+    instrumentation = Instrumentation([CallbackSink(measurements.append), LoggingSink(level=logging.INFO)])
+    with caplog.at_level(logging.INFO, logger="unified_image_reader"):
+        instrumentation.recorder("slide", "VIPS").record("decode", 0.002, 10)
+    assert measurements == [Measurement("slide", "VIPS", "decode", 0.002, 10)]
+    assert "slide VIPS decode 2.000 ms 10 bytes" in caplog.text
+    with pytest.raises(ValueError):
+        instrumentation.snapshot()
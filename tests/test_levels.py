@@ -0,0 +1,77 @@
+"""
+    Pyramid level reads with every adapter able to read a pyramid
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader.image_reader import InvalidLevelException
+
+ADAPTERS = ["VIPS", "SlideIO"]
+
+
+def mean_difference(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.abs(a.astype(np.float64) - b.astype(np.float64)).mean())
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_levels(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    assert reader.levels[0] == reader.dims
+    assert len(reader.levels) > 2
+    for (width, height), downsample in zip(reader.levels, reader.level_downsamples):
+        assert width == pytest.approx(reader.width / downsample, abs=1)
+        assert height == pytest.approx(reader.height / downsample, abs=1)
+    assert reader.best_level_for_downsample(1) == 0
+    assert reader.best_level_for_downsample(2.5) == 1
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_level_region_downsamples_full_resolution(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    region = reader.get_region((100, 60), (128, 96), level=1)
+    assert region.shape == (96, 128, 3)
+    full = reader.get_region((200, 120), (256, 192)).astype(np.float64)
+    pooled = full.reshape(96, 2, 128, 2, 3).mean(axis=(1, 3))
+    assert mean_difference(region, pooled) < 4
+
+
+@pytest.mark.parametrize("level", [1, 2])
+def test_adapters_agree_on_levels(pyramid, level):
+    vips, slideio = ImageReader(pyramid, adapter="VIPS"), ImageReader(pyramid, adapter="SlideIO")
+    assert vips.levels == slideio.levels
+    width, height = vips.level_dims(level)
+    # the first region and the one in the bottom-right corner, whose source rect ends at the image's edge
+    for coordinates in [(0, 0), (width - 64, height - 48)]:
+        a = vips.get_region(coordinates, (64, 48), level)
+        b = slideio.get_region(coordinates, (64, 48), level)
+        assert a.shape == b.shape == (48, 64, 3)
+        assert mean_difference(a, b) < 2
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_level_regions_are_validated_in_the_level(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    width, height = reader.level_dims(2)
+    reader.get_region((width - 10, height - 10), (10, 10), level=2)
+    with pytest.raises(IndexError):
+        reader.get_region((width - 10, 0), (11, 10), level=2)
+    with pytest.raises(InvalidLevelException):
+        reader.get_region((0, 0), (10, 10), level=len(reader.levels))
+
+
+def test_vips_discovers_levels_on_first_use(pyramid):
+    reader = ImageReader(pyramid, adapter="VIPS")
+    reader.get_region((0, 0), (32, 32))
+    assert not reader.adapter._levels_discovered
+    reader.get_region((0, 0), (32, 32), level=1)
+    assert reader.adapter._levels_discovered
+
+
+def test_shrink_on_load_levels(test_image):
+    reader = ImageReader(test_image)
+    assert reader.levels[0] == (474, 474)
+    for level in range(1, len(reader.levels)):
+        width, height = reader.level_dims(level)
+        assert reader.get_region((0, 0), (width, height), level).shape == (height, width, 3)
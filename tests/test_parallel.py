@@ -0,0 +1,57 @@
+"""
+    Sharded reading in worker processes that hand regions over through shared memory
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import Image, ImageReader, OutputSpec
+from unified_image_reader.parallel import ParallelImageReader, _shard
+
+REGION_DIMS = (128, 128)
+
+
+def test_shards_cover_every_region_once():
+    shards = _shard(range(50), 3, 4)
+    indices = [i for shard in shards for _, chunk in shard for i in chunk]
+    assert sorted(indices) == list(range(50))
+    positions = [position for shard in shards for position, _ in shard]
+    assert sorted(positions) == list(range(0, 50, 4))
+
+
+def test_ordered_regions_match_the_reader(pyramid):
+    reader = ImageReader(pyramid)
+    parallel = ParallelImageReader(pyramid, REGION_DIMS, num_workers=2, chunk_size=3, slots_per_worker=2)
+    regions = list(parallel)
+    assert len(parallel) == len(regions) == reader.number_of_regions(REGION_DIMS)
+    assert [i for i, _ in regions] == list(range(len(regions)))
+    assert all(np.array_equal(region, reader.get_region(i, REGION_DIMS)) for i, region in regions)
+
+
+def test_unordered_regions_of_chosen_indices(pyramid):
+    reader = ImageReader(pyramid)
+    indices = [3, 17, 4, 40, 2]
+    regions = dict(ParallelImageReader(pyramid, REGION_DIMS, num_workers=2, ordered=False, chunk_size=1,
+                                       region_indices=indices))
+    assert sorted(regions) == sorted(indices)
+    assert all(np.array_equal(regions[i], reader.get_region(i, REGION_DIMS)) for i in indices)
+
+
+def test_workers_apply_the_output_spec(pyramid):
+    spec = OutputSpec(layout="CHW", dtype=np.float32, mean=[128], std=[64])
+    expected = ImageReader(pyramid, output_spec=spec).get_region(5, REGION_DIMS)
+    (index, region), = ParallelImageReader(pyramid, REGION_DIMS, num_workers=1, start=5, stop=6, output_spec=spec)
+    assert index == 5 and region.shape == expected.shape == (3, 128, 128) and region.dtype == np.float32
+    assert np.allclose(region, expected)
+
+
+def test_worker_failures_are_raised(pyramid):
+    with pytest.raises(RuntimeError):
+        list(ParallelImageReader(pyramid, REGION_DIMS, num_workers=1, region_indices=[0, 10_000]))
+
+
+def test_image_parallel_iter(pyramid):
+    image = Image(pyramid)
+    image.slice(0, 1)
+    (index, region), = image.parallel_iter(num_workers=1)
+    assert index == 0 and np.array_equal(region, image.get_region(0))
@@ -0,0 +1,82 @@
+"""
+    PooledImageReader and the pool of adapter handles its reads borrow
+"""
+
+import concurrent.futures
+import threading
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader, PooledImageReader
+from unified_image_reader.pool import AdapterPool, PoolClosedException
+from unified_image_reader.server import SlidePool
+
+
+class Handle():
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_handles_are_reused():
+    opened = []
+    pool = AdapterPool(lambda: opened.append(Handle()) or opened[-1], max_handles=2)
+    for _ in range(3):
+        with pool.lend():
+            pass
+    assert len(opened) == 1
+    with pool.lend() as first, pool.lend() as second:
+        assert first is not second
+    with pytest.raises(TimeoutError):
+        with pool.lend(), pool.lend(), pool.lend(timeout=0.01):
+            pass
+    assert len(opened) == 2 and pool.waits == 1
+
+
+def test_closed_pools_lend_no_more_handles():
+    pool = AdapterPool(Handle, max_handles=1)
+    lent = pool.acquire()
+    waiting = concurrent.futures.ThreadPoolExecutor(1).submit(pool.acquire)
+    pool.close()
+    with pytest.raises(PoolClosedException):
+        waiting.result(timeout=5)
+    with pytest.raises(PoolClosedException):
+        pool.acquire()
+    # the handle lent out when the pool closed is closed when it is returned
+    assert not lent.closed
+    pool.release(lent)
+    assert lent.closed and pool.handles == []
+
+
+def test_concurrent_reads_match(pyramid):
+    reader = PooledImageReader(pyramid, max_handles=4)
+    expected = ImageReader(pyramid)
+    indices = range(reader.number_of_regions((128, 128)))
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        regions = list(executor.map(lambda i: reader.get_region(i, (128, 128)), indices))
+    assert all(np.array_equal(region, expected.get_region(i, (128, 128))) for i, region in zip(indices, regions))
+    assert 1 <= len(reader.pool.handles) <= 4
+    reader.close()
+    with pytest.raises(PoolClosedException):
+        reader.get_region(0, (128, 128))
+
+
+def test_slide_pool_reopens_evicted_slides(pyramid, test_image):
+    slides = SlidePool({"pyramid": pyramid, "test-image": test_image}, max_open=1)
+    evicted = threading.Event()
+
+    def read(reader, deep_zoom):
+        if not evicted.is_set():
+            # another request opens the other slide between this one getting its reader and reading from it
+            slides.get("test-image")
+            evicted.set()
+        return reader, reader.get_region((0, 0), (64, 64))
+
+    reader, region = slides.read("pyramid", read)
+    assert reader.pool.closed is False and len(slides) == 1
+    assert np.array_equal(region, ImageReader(pyramid).get_region((0, 0), (64, 64)))
+    slides.close()
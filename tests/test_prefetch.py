@@ -0,0 +1,64 @@
+"""
+    Read-ahead prefetching: regions arrive in order while the following ones are decoded in the background
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import Image
+from unified_image_reader.prefetch import RegionPrefetcher
+
+
+def test_regions_arrive_in_order():
+    with RegionPrefetcher(lambda i: np.full((4, 4, 3), i, dtype=np.uint8), range(20), prefetch=4, workers=3) as regions:
+        assert [int(region[0, 0, 0]) for region in regions] == list(range(20))
+
+
+def test_read_ahead_is_bounded():
+    submitted = []
+
+    def identifiers():
+        for i in range(100):
+            submitted.append(i)
+            yield i
+
+    prefetcher = RegionPrefetcher(lambda i: np.zeros((10, 10, 3), dtype=np.uint8), identifiers(), prefetch=8,
+                                  max_inflight_bytes=3 * 300)
+    for consumed in range(1, 10):
+        next(prefetcher)
+        # at most three regions of 300 bytes are decoded ahead of the consumer
+        assert len(submitted) <= consumed + 3
+    prefetcher.close()
+    assert len(submitted) < 100
+
+
+def test_errors_reach_the_consumer():
+    def get_region(i):
+        if i == 2:
+            raise ValueError("unreadable region")
+        return np.zeros((1, 1, 1), dtype=np.uint8)
+
+    prefetcher = RegionPrefetcher(get_region, range(5), prefetch=3)
+    next(prefetcher), next(prefetcher)
+    with pytest.raises(ValueError):
+        next(prefetcher)
+    prefetcher.close()
+
+
+def test_invalid_depths():
+    with pytest.raises(ValueError):
+        RegionPrefetcher(lambda i: None, range(1), prefetch=0)
+    with pytest.raises(ValueError):
+        RegionPrefetcher(lambda i: None, range(1), prefetch=1, workers=0)
+
+
+def test_image_iterates_the_same_with_prefetching(pyramid):
+    expected = list(Image(pyramid))
+    with Image(pyramid, prefetch=2, workers=2) as image:
+        regions = list(image)
+    assert len(regions) == len(expected) > 0
+    assert all(np.array_equal(a, b) for a, b in zip(regions, expected))
+    image = Image(pyramid)
+    image.slice(1, 2)
+    with image.iter_prefetch(prefetch=4) as regions:
+        assert [r.shape for r in regions] == [expected[1].shape]
@@ -0,0 +1,80 @@
+"""
+    The adapter registry: adapters and the imaging libraries they wrap are imported on first use
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import unified_image_reader
+from unified_image_reader import ImageReader, adapters
+from unified_image_reader.adapters import Adapter, registry
+
+
+@pytest.fixture
+def targets(monkeypatch):
+    # registrations made by a test don't outlive it
+    monkeypatch.setattr(registry, "_targets", dict(registry._targets))
+    return registry._targets
+
+
+def imported_modules(statement: str) -> list:
+    # runs in a fresh interpreter, since this one has long imported everything
+    probe = (f"import json, sys\n{statement}\n"
+             "print(json.dumps([m for m in ('cv2', 'pyvips', 'slideio', 'asyncio') if m in sys.modules]))")
+    return json.loads(subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout)
+
+
+def test_importing_the_package_imports_no_imaging_library():
+    assert imported_modules("import unified_image_reader") == []
+
+
+def test_adapters_are_imported_when_first_opened(test_image):
+    assert imported_modules(f"from unified_image_reader import ImageReader\nImageReader({test_image!r}, adapter='VIPS')") == ["pyvips"]
+
+
+def test_lookups(targets):
+    assert {"VIPS", "SlideIO", "TileStore"} <= set(registry.names())
+    vips = registry.get("VIPS")
+    assert issubclass(vips, Adapter) and registry.get(vips) is vips
+    # the imported class replaces its "module:Class" string
+    assert targets["VIPS"] is vips
+    assert adapters.VIPS is vips
+    with pytest.raises(KeyError):
+        registry.get("Missing")
+    with pytest.raises(AttributeError):
+        adapters.Missing
+    with pytest.raises(AttributeError):
+        adapters.missing
+
+
+def test_registered_adapters_open_images(targets, test_image):
+    class Renamed(registry.get("VIPS")):
+        pass
+
+    registry.register("Renamed", Renamed)
+    assert "Renamed" in registry.names()
+    reader = ImageReader(test_image, adapter="Renamed")
+    assert isinstance(reader.adapter, Renamed) and reader.dims == (474, 474)
+    # and by a "module:Class" string, imported on the first lookup
+    registry.register("Stored", "unified_image_reader.adapters.tile_store:TileStore")
+    assert registry.get("Stored") is registry.get("TileStore")
+
+
+def test_entry_points_are_registered_without_importing(targets, monkeypatch):
+    class EntryPoint():
+        name, value = "Plugin", "unified_image_reader.adapters.vips:VIPS"
+
+    monkeypatch.setattr(registry, "_entry_points_loaded", False)
+    monkeypatch.setattr("importlib.metadata.entry_points", lambda **kwargs: [EntryPoint()])
+    assert "Plugin" in registry.names() and targets["Plugin"] == EntryPoint.value
+    assert registry.get("Plugin") is registry.get("VIPS")
+
+
+def test_async_image_is_imported_on_first_use():
+    assert "asyncio" in imported_modules("from unified_image_reader import AsyncImage")
+    assert unified_image_reader.AsyncImage.__name__ == "AsyncImage"
+    with pytest.raises(AttributeError):
+        unified_image_reader.Missing
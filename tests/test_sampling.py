@@ -0,0 +1,86 @@
+"""
+    LocalitySampler: reproducible shuffled epochs whose regions are read a block of neighbours at a time
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import Image, ImageReader, LocalitySampler
+
+from conftest import PYRAMID_DIMS
+
+REGION_DIMS = (128, 128)
+
+
+def indices(samples) -> list:
+    return [sample.region_index for sample in samples]
+
+
+def test_epochs_visit_every_region_once(pyramid):
+    sampler = ImageReader(pyramid).sampler(REGION_DIMS, seed=1)
+    first = indices(sampler)
+    second = indices(sampler)
+    assert sorted(first) == sorted(second) == list(range(63)) and len(sampler) == 63
+    assert first != second and sampler.epoch == 2
+    # the same seed and epoch draw the same stream, reading the regions or not
+    assert indices(LocalitySampler(ImageReader(pyramid), REGION_DIMS, seed=1).samples(1)) == second
+    assert indices(sampler.order(0)) == first
+    assert indices(LocalitySampler(ImageReader(pyramid), REGION_DIMS, seed=2).order(0)) != first
+
+
+def test_samples_hold_their_regions(pyramid):
+    reader = ImageReader(pyramid)
+    for sample in LocalitySampler(reader, REGION_DIMS, seed=0, block_regions=6).samples():
+        assert sample.coordinates == reader.region_index_to_coordinates(sample.region_index, REGION_DIMS)
+        assert np.array_equal(sample.region, reader.get_region(sample.coordinates, REGION_DIMS))
+
+
+def test_local_blocks_are_read_together(pyramid, monkeypatch):
+    reader = ImageReader(pyramid)
+    reads = []
+    get_regions = reader.get_regions
+    monkeypatch.setattr(reader, "get_regions", lambda coordinates, *args, **kwargs:
+                        reads.append(len(coordinates)) or get_regions(coordinates, *args, **kwargs))
+    sampler = LocalitySampler(reader, REGION_DIMS, block_regions=4, locality=1, buffer_regions=1, seed=0)
+    cells = [(i // 9 // 2, i % 9 // 2) for i in indices(sampler.samples())]
+    # the 2x2 cells of the 9x7 grid, each read with one call and, with a buffer of one, yielded one after another
+    assert len(reads) == 5 * 4 and sum(reads) == 63
+    assert sum(a != b for a, b in zip(cells, cells[1:])) == 5 * 4 - 1
+
+
+def test_uniform_shuffles_scatter_blocks(pyramid):
+    sampler = LocalitySampler(ImageReader(pyramid), REGION_DIMS, block_regions=4, locality=0, seed=0)
+    blocks = sampler._blocks(sampler._rng(0))
+    assert sum(len(block) for block in blocks) == 63 and max(len(block) for block in blocks) == 4
+    assert any(np.ptp(block // 9) > 1 for block in blocks)
+
+
+def test_jitter_stays_within_the_level(pyramid):
+    sampler = LocalitySampler(ImageReader(pyramid), REGION_DIMS, jitter=0.5, seed=0)
+    coordinates = np.array([sample.coordinates for sample in sampler.order()])
+    assert (coordinates >= 0).all()
+    assert (coordinates <= np.array(PYRAMID_DIMS) - REGION_DIMS).all()
+    assert (coordinates % 128).any()
+    region = next(iter(sampler.samples())).region
+    assert region.shape == (128, 128, 3)
+
+
+def test_candidate_regions(pyramid):
+    reader = ImageReader(pyramid)
+    assert sorted(indices(reader.sampler(REGION_DIMS, region_indices=[3, 40, 7], seed=0).order())) == [3, 7, 40]
+    assert list(reader.sampler(REGION_DIMS, region_indices=[], seed=0).samples()) == []
+    with pytest.raises(IndexError):
+        reader.sampler(REGION_DIMS, region_indices=[63])
+
+
+@pytest.mark.parametrize("kwargs", [{"block_regions": -1}, {"buffer_regions": -1}, {"locality": 1.5}, {"jitter": -1}])
+def test_invalid_samplers(pyramid, kwargs):
+    with pytest.raises(ValueError):
+        LocalitySampler(ImageReader(pyramid), REGION_DIMS, **kwargs)
+
+
+def test_images_sample_the_regions_they_iterate(pyramid):
+    image = Image(pyramid)
+    image.slice(1, 2)
+    assert indices(image.sampler(seed=0)) == [1]
+    assert len(image.sampler(REGION_DIMS, seed=0)) == 63
@@ -0,0 +1,133 @@
+"""
+    The tile server's endpoints, requested over HTTP from a server on a free local port
+"""
+
+import io
+import json
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree
+
+import numpy as np
+import pytest
+import pyvips
+
+from unified_image_reader import ImageReader, config
+from unified_image_reader.server import DeepZoom, TileServer
+
+
+@pytest.fixture(scope="module")
+def server(pyramid, test_image):
+    # the default DeepZoom tiles, and a single open slide so that requests alternating between slides reopen them
+    with TileServer({"pyramid": pyramid, "test-image": test_image}, port=0, max_open=1).start() as server:
+        yield server
+
+
+def get(server: TileServer, path: str, headers=None, method: str = "GET"):
+    request = urllib.request.Request(server.url + path, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_slides(server):
+    status, _, body = get(server, "/slides")
+    assert status == 200
+    assert json.loads(body) == {name: {"info": f"/slides/{name}", "dzi": f"/slides/{name}.dzi"}
+                                for name in ("pyramid", "test-image")}
+
+
+def test_info(server, pyramid):
+    status, _, body = get(server, "/slides/pyramid")
+    info = json.loads(body)
+    reader = ImageReader(pyramid)
+    assert status == 200
+    assert info["dims"] == list(reader.dims)
+    assert info["levels"] == [list(dims) for dims in reader.levels]
+    assert info["tile"]["width"] == 256 and info["deep_zoom"]["tile_size"] == config.SERVER_TILE_SIZE
+
+
+def test_dzi(server, pyramid):
+    status, headers, body = get(server, "/slides/pyramid.dzi")
+    assert status == 200 and headers["Content-Type"] == "application/xml"
+    size = xml.etree.ElementTree.fromstring(body).find("{*}Size")
+    assert (int(size.get("Width")), int(size.get("Height"))) == ImageReader(pyramid).dims
+
+
+def test_tiles_match_the_slide(server, pyramid):
+    deep_zoom = DeepZoom(ImageReader(pyramid))
+    top = deep_zoom.level_count - 1
+    for level in (top, top - 1, 0):
+        columns, rows = deep_zoom.tiles(level)
+        for column, row in {(0, 0), (columns - 1, rows - 1)}:
+            status, headers, body = get(server, f"/slides/pyramid_files/{level}/{column}_{row}.png")
+            assert status == 200 and headers["Content-Type"] == "image/png"
+            tile = pyvips.Image.new_from_buffer(body, "")
+            _, _, _, tile_dims = deep_zoom.tile_region(level, column, row)
+            assert (tile.width, tile.height) == tuple(tile_dims)
+
+
+def test_full_resolution_tiles_are_exact(server, pyramid):
+    reader = ImageReader(pyramid)
+    deep_zoom = DeepZoom(reader)
+    level = deep_zoom.level_count - 1
+    _, coordinates, region_dims, _ = deep_zoom.tile_region(level, 1, 1)
+    _, _, body = get(server, f"/slides/pyramid_files/{level}/1_1.png")
+    tile = pyvips.Image.new_from_buffer(body, "").numpy()
+    assert np.array_equal(tile, reader.get_region(coordinates, region_dims))
+
+
+def test_conditional_requests(server):
+    path = "/slides/pyramid_files/9/0_0.jpeg"
+    status, headers, body = get(server, path)
+    assert status == 200 and body and "max-age" in headers["Cache-Control"]
+    status, _, body = get(server, path, {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+    status, _, _ = get(server, path, {"If-Modified-Since": headers["Last-Modified"]})
+    assert status == 304
+    status, _, _ = get(server, path, {"If-None-Match": '"another"'})
+    assert status == 200
+
+
+def test_head(server):
+    _, _, body = get(server, "/slides/pyramid.dzi")
+    status, headers, head_body = get(server, "/slides/pyramid.dzi", method="HEAD")
+    assert status == 200 and int(headers["Content-Length"]) == len(body) and head_body == b""
+
+
+def test_region(server, test_image):
+    status, _, body = get(server, "/slides/test-image/region?x=100&y=200&width=30&height=20&format=npy")
+    assert status == 200
+    assert np.array_equal(np.load(io.BytesIO(body)), ImageReader(test_image).get_region((100, 200), (30, 20)))
+    status, headers, _ = get(server, "/slides/test-image/region?x=0&y=0&width=30&height=20&level=1&format=png")
+    assert status == 200 and headers["Content-Type"] == "image/png"
+
+
+@pytest.mark.parametrize("path, status", [
+    ("/slides/missing", 404),
+    ("/slides/missing.dzi", 404),
+    ("/unknown", 404),
+    ("/slides/pyramid_files/99/0_0.jpeg", 404),
+    ("/slides/pyramid_files/5/9_9.jpeg", 404),
+    ("/slides/pyramid_files/5/0_0.gif", 404),
+    ("/slides/test-image/region?x=1", 400),
+    ("/slides/test-image/region?x=470&y=0&width=30&height=10", 400),
+    ("/slides/test-image/region?x=0&y=0&width=30&height=10&level=9", 400),
+    ("/slides/test-image/region?x=0&y=0&width=30&height=10&format=gif", 400)
+])
+def test_errors(server, path, status):
+    response_status, headers, body = get(server, path)
+    assert response_status == status
+    assert headers["Cache-Control"] == "no-store" and "error" in json.loads(body)
+
+
+def test_metrics(server):
+    get(server, "/slides/pyramid_files/8/0_0.jpeg")
+    status, headers, body = get(server, "/metrics")
+    metrics = json.loads(body)
+    assert status == 200 and headers["Cache-Control"] == "no-store"
+    assert metrics["endpoints"]["tile"]["count"] >= 1
+    assert metrics["open_slides"] <= 1
+    assert {"regions", "tiles"} <= set(metrics["caches"])
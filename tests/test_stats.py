@@ -0,0 +1,113 @@
+"""
+    Whole-slide statistics and thumbnails, cached in memory and persisted next to the image
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader import stats as slide_stats
+from unified_image_reader.foreground import ForegroundIndex
+
+
+def expected_stats(pixels: np.ndarray):
+    pixels = pixels.reshape(-1, pixels.shape[-1]).astype(np.float64)
+    return len(pixels), pixels.mean(axis=0), pixels.std(axis=0)
+
+
+def test_stats_of_a_level(image_copy):
+    reader = ImageReader(image_copy)
+    stats = reader.stats(level=0)
+    count, mean, std = expected_stats(reader.get_region((0, 0), reader.dims))
+    assert stats.count == count
+    assert np.allclose(stats.mean, mean) and np.allclose(stats.std, std)
+    assert stats.histogram.sum(axis=1).tolist() == [count] * 3
+    assert os.path.isfile(image_copy + slide_stats.SIDECAR_SUFFIX)
+    assert np.array_equal(ImageReader(image_copy).stats(level=0).histogram, stats.histogram)
+
+
+def test_running_stats_merge():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (1000, 3), dtype=np.uint8)
+    whole, first, second = slide_stats.RunningStats(3), slide_stats.RunningStats(3), slide_stats.RunningStats(3)
+    whole.update(pixels)
+    first.update(pixels[:300])
+    second.update(pixels[300:])
+    merged = first.merge(second)
+    assert merged.count == whole.count
+    assert np.allclose(merged.mean, whole.mean) and np.allclose(merged.variance, whole.variance)
+    assert np.array_equal(merged.histogram, whole.histogram)
+
+
+def test_mask_functions_are_told_apart(image_copy):
+    reader = ImageReader(image_copy)
+    pixels = reader.get_region((0, 0), reader.dims)
+    bright = reader.stats(level=0, mask=lambda p: p[..., 0] > 200)
+    dark = reader.stats(level=0, mask=lambda p: p[..., 0] < 50)
+    assert bright.count == int((pixels[..., 0] > 200).sum())
+    assert dark.count == int((pixels[..., 0] < 50).sum())
+    # nor are they reused from the sidecar by another reader
+    assert ImageReader(image_copy).stats(level=0, mask=lambda p: p[..., 0] < 50).count == dark.count
+
+
+def test_keyed_mask_functions_are_persisted(image_copy):
+    def dark(p):
+        return p[..., 0] < 50
+    stats = ImageReader(image_copy).stats(level=0, mask=dark, mask_key="dark")
+    persisted = slide_stats.RunningStats.load(image_copy + slide_stats.SIDECAR_SUFFIX)
+    assert persisted is not None and persisted.count == stats.count
+
+
+@pytest.mark.parametrize("mask_dims", [(474, 474), (10, 10)])
+def test_array_masks(image_copy, mask_dims):
+    reader = ImageReader(image_copy)
+    mask = np.zeros(mask_dims[::-1], dtype=bool)
+    mask[:, :mask_dims[0] // 2] = True
+    stats = reader.stats(level=0, mask=mask)
+    assert 0 < stats.count < reader.width * reader.height
+
+
+def test_thumbnail(image_copy):
+    reader = ImageReader(image_copy)
+    thumbnail = reader.thumbnail((100, 80))
+    assert max(thumbnail.shape[:2]) <= 100 and thumbnail.shape[0] <= 80 and thumbnail.shape[2] == 3
+    assert not thumbnail.flags.writeable
+    assert os.path.isfile(image_copy + slide_stats.THUMBNAIL_SIDECAR_SUFFIX)
+    assert np.array_equal(ImageReader(image_copy).thumbnail((100, 80)), thumbnail)
+
+
+def test_foreground_masks(image_copy):
+    reader = ImageReader(image_copy)
+    fractions = np.zeros((3, 3))
+    fractions[:, 0] = 1
+    stats = reader.stats(level=0, mask=ForegroundIndex(fractions, (158, 158)))
+    count, mean, std = expected_stats(reader.get_region((0, 0), (158, 474)))
+    assert stats.count == count
+    assert np.allclose(stats.mean, mean) and np.allclose(stats.std, std)
+
+
+def test_changed_images_are_computed_again(image_copy, monkeypatch):
+    ImageReader(image_copy).stats(level=0)
+    computed = []
+    compute = slide_stats.compute
+    monkeypatch.setattr(slide_stats, "compute", lambda *args: computed.append(args) or compute(*args))
+    ImageReader(image_copy).stats(level=0)
+    assert computed == []
+    os.utime(image_copy, ns=(0, 1))
+    ImageReader(image_copy).stats(level=0)
+    assert len(computed) == 1
+
+
+def test_adequate_level(pyramid):
+    reader = ImageReader(pyramid)
+    assert slide_stats.adequate_level(reader, min_pixels=300 * 225) == 2
+    assert slide_stats.adequate_level(reader, min_pixels=1) == len(reader.levels) - 1
+    assert slide_stats.adequate_level(reader, min_pixels=1 << 40) == 0
+
+
+@pytest.mark.parametrize("dtype, expected", [(np.uint8, (0, 256)), (np.uint16, (0, 65536)), (np.int8, (-128, 128)),
+                                             (np.float32, (0, 1))])
+def test_value_ranges(dtype, expected):
+    assert slide_stats.value_range(dtype) == expected
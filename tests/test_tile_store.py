@@ -0,0 +1,89 @@
+"""
+    Tile stores: every region of an image decoded once into a memory-mapped file and read back without decoding
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from unified_image_reader import Image, ImageReader
+from unified_image_reader.adapters.tile_store import TileStore
+from unified_image_reader.tile_store import materialize
+
+TILE_DIMS = (128, 128)
+
+
+@pytest.fixture(scope="module")
+def store(pyramid, tmp_path_factory) -> str:
+    return materialize(pyramid, str(tmp_path_factory.mktemp("store") / "pyramid.tiles"), TILE_DIMS)
+
+
+def test_tiles_are_the_regions_of_the_source(store, pyramid):
+    source = ImageReader(pyramid)
+    reader = ImageReader(store)
+    assert isinstance(reader.adapter, TileStore)
+    count = source.number_of_regions(TILE_DIMS)
+    assert reader.number_of_regions(TILE_DIMS) == count
+    # the store covers the whole tiles of the source, leaving out the partial ones along its edges
+    assert reader.dims == (source.width // 128 * 128, source.height // 128 * 128)
+    assert np.array_equal(reader.get_regions(range(count), TILE_DIMS), source.get_regions(range(count), TILE_DIMS))
+
+
+def test_regions_across_tiles(store, pyramid):
+    source, reader = ImageReader(pyramid), ImageReader(store)
+    for coordinates, dims in [((100, 50), (200, 150)), ((0, 0), (384, 128)), ((130, 260), (5, 5))]:
+        assert np.array_equal(reader.get_region(coordinates, dims), source.get_region(coordinates, dims))
+    coordinates = np.array([[128, 0], [64, 64], [256, 128]])
+    assert np.array_equal(reader.get_regions(coordinates, TILE_DIMS), source.get_regions(coordinates, TILE_DIMS))
+
+
+def test_whole_tiles_are_read_without_copies(store):
+    region = ImageReader(store).get_region((128, 256), TILE_DIMS)
+    assert isinstance(region.base, np.memmap) or isinstance(region, np.memmap)
+    assert not region.flags.writeable
+    tile = ImageReader(store).get_encoded_tile(11)
+    assert tile.codec == "none" and tile.tile_index == 11
+
+
+def test_index(store, pyramid):
+    with open(store) as f:
+        index = json.load(f)
+    assert index["source"] == os.path.abspath(pyramid) and index["region_dims"] == list(TILE_DIMS)
+    assert os.path.isfile(os.path.join(os.path.dirname(store), index["data"]))
+    assert not any(name.endswith(".tmp") for name in os.listdir(os.path.dirname(store)))
+
+
+def test_unsupported_versions_are_refused(store, tmp_path):
+    with open(store) as f:
+        index = json.load(f)
+    index["version"] += 1
+    with open(tmp_path / "future.tiles", "w") as f:
+        json.dump({**index, "data": os.path.join(os.path.dirname(store), index["data"])}, f)
+    with pytest.raises(ValueError):
+        TileStore(str(tmp_path / "future.tiles"))
+
+
+def test_grids_splitting_tiles_are_refused(pyramid, tmp_path):
+    # an aligned reader's regions are whole native tiles of 256x256
+    with pytest.raises(ValueError):
+        materialize(ImageReader(pyramid, aligned=True), str(tmp_path / "split.tiles"), TILE_DIMS)
+    assert os.listdir(tmp_path) == []
+
+
+def test_interrupted_runs_leave_no_store(pyramid, tmp_path, monkeypatch):
+    source = ImageReader(pyramid)
+
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(source, "_get_regions", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        materialize(source, str(tmp_path / "interrupted.tiles"), TILE_DIMS)
+    assert os.listdir(tmp_path) == []
+
+
+def test_materialize_an_image(test_image, tmp_path):
+    path = materialize(Image(test_image), str(tmp_path / "image.tiles"), (64, 64))
+    assert np.array_equal(ImageReader(path).get_region(5, (64, 64)), ImageReader(test_image).get_region(5, (64, 64)))
@@ -0,0 +1,87 @@
+"""
+    Native tiles: the tile layout adapters report, grids aligned to it and reads of one tile at a time
+"""
+
+import numpy as np
+import pytest
+
+from unified_image_reader import ImageReader
+from unified_image_reader.adapters import TileInfo
+from unified_image_reader.image_reader import InvalidLevelException, UnsupportedFormatException
+
+from conftest import PYRAMID_DIMS, texture
+
+
+@pytest.fixture
+def stripped(tmp_path) -> str:
+    path = str(tmp_path / "stripped.tiff")
+    texture(300, 200).tiffsave(path)
+    return path
+
+
+@pytest.mark.parametrize("adapter", ["VIPS", "SlideIO"])
+def test_tile_layouts(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    for level in range(len(reader.levels)):
+        assert reader.tile_info(level) == TileInfo(256, 256, "jpeg")
+    with pytest.raises(InvalidLevelException):
+        reader.tile_info(len(reader.levels))
+
+
+def test_other_layouts(deflate_pyramid, stripped):
+    assert ImageReader(deflate_pyramid).tile_info() == TileInfo(128, 128, "deflate")
+    reader = ImageReader(stripped)
+    assert reader.tile_info() is None
+    with pytest.raises(UnsupportedFormatException):
+        reader.number_of_tiles()
+    with pytest.raises(UnsupportedFormatException):
+        reader.get_tile(0)
+
+
+def test_aligned_grids_are_whole_tiles(pyramid):
+    reader = ImageReader(pyramid, aligned=True)
+    width, height = PYRAMID_DIMS
+    assert reader.aligned_stride((512, 256)) == (512, 256)
+    assert reader.number_of_regions((256, 256)) == (width // 256) * (height // 256)
+    for region_index in (0, 5, reader.number_of_regions((256, 256)) - 1):
+        left, top = reader.region_index_to_coordinates(region_index, (256, 256))
+        assert left % 256 == 0 and top % 256 == 0
+    for region_dims in ((300, 300), (128, 128), (512, 200)):
+        with pytest.raises(ValueError):
+            reader.grid(region_dims)
+    # an explicit stride is the caller's choice
+    assert reader.grid((128, 128), stride=(128, 128)).columns == width // 128
+    # while the regions of other readers may split tiles
+    assert ImageReader(pyramid).number_of_regions((300, 300)) == (width // 300) * (height // 300)
+
+
+def test_aligned_regions_are_single_tiles(pyramid):
+    reader = ImageReader(pyramid, adapter="VIPS", aligned=True)
+    tile_columns = -(-PYRAMID_DIMS[0] // 256)
+    grid = reader.grid((256, 256))
+    for region_index in range(len(grid)):
+        tile_index = (region_index // grid.columns) * tile_columns + region_index % grid.columns
+        assert np.array_equal(reader.get_region(region_index, (256, 256)), reader.get_tile(tile_index))
+
+
+def test_stripped_images_align_to_anything(stripped):
+    reader = ImageReader(stripped, aligned=True)
+    assert reader.aligned_stride((30, 20)) == (30, 20) and reader.number_of_regions((30, 20)) == 100
+
+
+@pytest.mark.parametrize("adapter", ["VIPS", "SlideIO"])
+def test_tiles(pyramid, adapter):
+    reader = ImageReader(pyramid, adapter=adapter)
+    width, height = PYRAMID_DIMS
+    columns, rows = -(-width // 256), -(-height // 256)
+    assert reader.number_of_tiles() == columns * rows
+    assert reader.number_of_tiles(1) == 3 * 2
+    assert np.array_equal(reader.get_tile(columns + 1), reader.get_region((256, 256), (256, 256)))
+    # tiles along the right and bottom edges are cropped to the image
+    assert reader.get_tile(columns - 1).shape == (256, width - (columns - 1) * 256, 3)
+    assert reader.get_tile(columns * rows - 1).shape == (height - (rows - 1) * 256, width - (columns - 1) * 256, 3)
+    out = np.empty((256, 256, 3), dtype=np.uint8)
+    assert reader.get_tile(0, out=out) is out
+    for tile_index in (-1, columns * rows):
+        with pytest.raises(IndexError):
+            reader.get_tile(tile_index)
@@ -0,0 +1,84 @@
+"""
+    OutputSpec: layout, dtype, channel order, alpha and normalization applied in one pass into the output
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from unified_image_reader import Image, ImageReader, OutputSpec
+from unified_image_reader.image_reader import ImageReaderDirectory
+
+RNG = np.random.default_rng(0)
+RGBA = RNG.integers(0, 256, (2, 5, 7, 4), dtype=np.uint8)
+
+
+def test_the_default_spec_copies():
+    region = RGBA[0, ..., :3]
+    output = OutputSpec().apply(region)
+    assert np.array_equal(output, region) and output.dtype == np.uint8
+    assert not np.shares_memory(output, region)
+
+
+def test_layout_dtype_and_channels():
+    spec = OutputSpec(layout="CHW", dtype=np.float32, channel_order="BGR", drop_alpha=True)
+    assert spec.output_shape(RGBA.shape) == (2, 3, 5, 7)
+    output = spec.apply(RGBA)
+    assert output.dtype == np.float32
+    assert np.array_equal(output, RGBA[..., 2::-1].transpose(0, 3, 1, 2))
+    # the channels of BGR sources are already in order
+    assert np.array_equal(spec.apply(RGBA[..., [2, 1, 0, 3]], source_channel_order="BGR"), output)
+
+
+@pytest.mark.parametrize("bands, channels", [(1, [0]), (2, [0]), (3, [2, 1, 0]), (4, [2, 1, 0])])
+def test_source_channels(bands, channels):
+    assert OutputSpec(channel_order="BGR", drop_alpha=True).source_channels(bands).tolist() == channels
+
+
+def test_normalization():
+    mean, std = [120.0, 110.0, 100.0], [60.0, 50.0, 40.0]
+    region = RGBA[0, ..., :3]
+    output = OutputSpec(mean=mean, std=std).apply(region)
+    assert output.dtype == np.float32
+    assert np.allclose(output, (region - np.array(mean)) / np.array(std), atol=1e-5)
+    # one value for every channel, and integer outputs rounded towards zero
+    single = OutputSpec(mean=128, std=2, dtype=np.int16).apply(region)
+    assert np.array_equal(single, ((region.astype(np.float64) - 128) / 2).astype(np.int16))
+    with pytest.raises(ValueError):
+        OutputSpec(mean=[1, 2]).apply(region)
+
+
+@pytest.mark.parametrize("kwargs", [{"layout": "WHC"}, {"channel_order": "GBR"}, {"std": [1, 0, 1]}])
+def test_invalid_specs(kwargs):
+    with pytest.raises(ValueError):
+        OutputSpec(**kwargs)
+
+
+def test_outputs_are_written_in_place():
+    spec = OutputSpec(layout="CHW", mean=128)
+    out = np.empty((4, 5, 7), dtype=np.float32)
+    assert spec.apply(RGBA[0], out=out) is out
+    with pytest.raises(ValueError):
+        spec.apply(RGBA[0], out=np.empty((5, 7, 4), dtype=np.float32))
+
+
+def test_readers_apply_their_spec(test_image):
+    spec = OutputSpec(layout="CHW", channel_order="BGR", mean=[0, 0, 0], std=[255, 255, 255])
+    plain, reader = ImageReader(test_image), ImageReader(test_image, output_spec=spec)
+    expected = spec.apply(plain.get_region(3, (64, 48)))
+    assert np.array_equal(reader.get_region(3, (64, 48)), expected)
+    out = np.empty_like(expected)
+    assert reader.get_region(3, (64, 48), out=out) is out
+    # an Image's spec leaves the reader it was given alone
+    image = Image(test_image, reader=plain, output_spec=spec)
+    assert np.array_equal(image.get_region(3, (64, 48)), expected)
+    assert plain.output_spec is None
+
+
+def test_directories_and_slides_agree_on_the_channel_order(tmp_path, test_image):
+    region = ImageReader(test_image).get_region(0, (64, 48))
+    path = str(tmp_path / "region.png")
+    cv2.imwrite(path, cv2.cvtColor(region, cv2.COLOR_RGB2BGR))
+    directory = ImageReaderDirectory(str(tmp_path), persist=False, output_spec=OutputSpec())
+    assert np.array_equal(directory.get_region(0), region)
+    assert np.array_equal(directory.get_regions([0]), region[None])
@@ -0,0 +1,61 @@
+"""
+    Atomic writes of sidecars and other outputs
+"""
+
+import os
+import threading
+
+import pytest
+
+from unified_image_reader import util
+
+
+def test_write_atomically_replaces_the_file(tmp_path):
+    path = str(tmp_path / "file")
+    util.write_atomically(path, lambda f: f.write(b"first"))
+    util.write_atomically(path, lambda f: f.write("second"), mode="w")
+    with open(path) as f:
+        assert f.read() == "second"
+    assert os.listdir(tmp_path) == ["file"]
+
+
+def test_failed_writes_leave_the_file_alone(tmp_path):
+    path = str(tmp_path / "file")
+    util.write_atomically(path, lambda f: f.write(b"complete"))
+
+    def partial(f):
+        f.write(b"partial")
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        util.write_atomically(path, partial)
+    with open(path, "rb") as f:
+        assert f.read() == b"complete"
+    assert os.listdir(tmp_path) == ["file"]
+
+
+def test_concurrent_writes_use_their_own_temporary_files(tmp_path):
+    path = str(tmp_path / "file")
+    both_writing = threading.Barrier(2)
+    temporary_paths = []
+
+    def write(f):
+        temporary_paths.append(f.name)
+        both_writing.wait(timeout=5)
+        f.write(threading.current_thread().name.encode())
+
+    threads = [threading.Thread(target=util.write_atomically, args=(path, write), name=name) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(temporary_paths)) == 2
+    with open(path, "rb") as f:
+        assert f.read() in (b"a", b"b")
+    assert os.listdir(tmp_path) == ["file"]
+
+
+def test_unwritable_sidecars_are_skipped(tmp_path):
+    path = str(tmp_path / "missing" / "image.tiff.stats.npz")
+    assert not util.write_sidecar(path, lambda f: f.write(b"stats"))
+    assert util.write_sidecar(str(tmp_path / "image.tiff.stats.npz"), lambda f: f.write(b"stats"))